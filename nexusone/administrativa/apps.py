@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class AdministrativaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "nexusone.administrativa"
+
+    def ready(self):
+        # Miniaturas y tamaño medio de las imágenes subidas
+        from .imagenes import conectar_senales
+        conectar_senales()
@@ -0,0 +1,247 @@
+# nexusone/administrativa/archivos.py
+"""
+Entrega de archivos de MEDIA_ROOT para usuarios autenticados.
+La usan la vista `servir_media` y las descargas de documentos (OT, contratos).
+
+- ETag / Last-Modified con GET condicional (304 sin leer el archivo)
+- Rangos de bytes (206 / 416) para reanudar descargas y ver PDFs grandes
+- Cache-Control privado; los blobs direccionados por contenido son inmutables
+- Opcional: delegar la transferencia al proxy (X-Accel-Redirect de nginx o
+  X-Sendfile de Apache) con MEDIA_SENDFILE, para no ocupar un worker de gunicorn
+- ZIP armado al vuelo (`respuesta_zip`) para "descargar todo" de una OT o proyecto
+"""
+import mimetypes
+import os
+import re
+import zipfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+CACHE_MAX_AGE = 24 * 3600
+CACHE_MAX_AGE_INMUTABLE = 365 * 24 * 3600
+TAMANO_BLOQUE = 256 * 1024
+
+RANGO_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _rango_solicitado(request, tamano, etag):
+    """
+    (inicio, fin) inclusive del header Range, None si se debe enviar todo,
+    o "invalido" si el rango no se puede satisfacer.
+    Solo se atiende un rango; varios rangos se responden con el archivo completo.
+    """
+    encabezado = request.headers.get("Range", "")
+    if not encabezado:
+        return None
+    si_rango = request.headers.get("If-Range")
+    if si_rango and si_rango != etag:
+        return None
+
+    coincide = RANGO_RE.match(encabezado.strip())
+    if not coincide:
+        return None
+    inicio, fin = coincide.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        largo = int(fin)
+        if largo == 0:
+            return "invalido"
+        return max(0, tamano - largo), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return "invalido"
+    return inicio, fin
+
+
+def _leer_rango(ruta, inicio, largo):
+    with open(ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        while largo > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE, largo))
+            if not bloque:
+                break
+            largo -= len(bloque)
+            yield bloque
+
+
+def _respuesta_sendfile(ruta, tipo):
+    modo = getattr(settings, "MEDIA_SENDFILE", "")
+    if modo == "x-accel":
+        relativa = os.path.relpath(ruta, settings.MEDIA_ROOT).replace(os.sep, "/")
+        respuesta = HttpResponse(content_type=tipo)
+        respuesta["X-Accel-Redirect"] = settings.MEDIA_SENDFILE_PREFIX + quote(relativa)
+        return respuesta
+    if modo == "x-sendfile":
+        respuesta = HttpResponse(content_type=tipo)
+        respuesta["X-Sendfile"] = ruta
+        return respuesta
+    return None
+
+
+def respuesta_archivo(request, ruta, nombre=None, adjunto=False, inmutable=False):
+    """
+    Respuesta HTTP para un archivo del disco.
+
+    Args:
+        ruta: ruta absoluta (ya validada por quien llama)
+        nombre: nombre para Content-Disposition (default: el del archivo)
+        adjunto: forzar descarga en vez de mostrar en el navegador
+        inmutable: el contenido nunca cambia para esta URL (blobs por hash)
+    """
+    try:
+        estado = os.stat(ruta)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Archivo no encontrado")
+    if not os.path.isfile(ruta):
+        raise Http404("Archivo no encontrado")
+
+    tamano = estado.st_size
+    etag = f'"{estado.st_mtime_ns:x}-{tamano:x}"'
+    nombre = nombre or os.path.basename(ruta)
+    tipo, codificacion = mimetypes.guess_type(nombre)
+    # Un .gz se entrega tal cual (no como Content-Encoding), igual que FileResponse
+    tipo = {
+        "gzip": "application/gzip",
+        "bzip2": "application/x-bzip",
+        "xz": "application/x-xz",
+    }.get(codificacion, tipo) or "application/octet-stream"
+
+    def encabezados(respuesta):
+        respuesta["ETag"] = etag
+        respuesta["Last-Modified"] = http_date(estado.st_mtime)
+        respuesta["Accept-Ranges"] = "bytes"
+        if inmutable:
+            respuesta["Cache-Control"] = f"private, max-age={CACHE_MAX_AGE_INMUTABLE}, immutable"
+        else:
+            respuesta["Cache-Control"] = f"private, max-age={CACHE_MAX_AGE}"
+        disposicion = content_disposition_header(adjunto, nombre)
+        if disposicion:
+            respuesta["Content-Disposition"] = disposicion
+        return respuesta
+
+    # 304 / 412 sin tocar el contenido
+    condicional = get_conditional_response(request, etag=etag, last_modified=int(estado.st_mtime))
+    if condicional is not None:
+        return encabezados(condicional)
+
+    # El proxy atiende Range y la transferencia
+    delegada = _respuesta_sendfile(ruta, tipo)
+    if delegada is not None:
+        return encabezados(delegada)
+
+    rango = _rango_solicitado(request, tamano, etag)
+    if rango == "invalido":
+        respuesta = HttpResponse(status=416)
+        respuesta["Content-Range"] = f"bytes */{tamano}"
+        return encabezados(respuesta)
+
+    if rango:
+        inicio, fin = rango
+        largo = fin - inicio + 1
+        respuesta = StreamingHttpResponse(_leer_rango(ruta, inicio, largo), status=206, content_type=tipo)
+        respuesta["Content-Length"] = str(largo)
+        respuesta["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+        return encabezados(respuesta)
+
+    respuesta = FileResponse(open(ruta, "rb"), content_type=tipo)
+    respuesta["Content-Length"] = str(tamano)
+    return encabezados(respuesta)
+
+
+# ---------- ZIP en streaming ----------
+
+# Formatos ya comprimidos: se guardan tal cual (recomprimir gasta CPU sin ganar bytes)
+EXTENSIONES_SIN_COMPRESION = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".pdf", ".zip", ".rar", ".7z", ".gz", ".bz2", ".xz",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods",
+    ".mp4", ".mov", ".avi", ".mp3", ".m4a",
+}
+
+
+class _SalidaZip:
+    """
+    Destino de escritura para ZipFile que solo acumula lo escrito.
+    No tiene seek/tell: zipfile lo trata como no posicionable y escribe
+    cada entrada con descriptor de datos, sin volver atrás en el flujo.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _generar_zip(entradas):
+    """Produce el ZIP por bloques; en memoria solo hay un bloque a la vez"""
+    salida = _SalidaZip()
+    with zipfile.ZipFile(salida, mode="w", allowZip64=True) as zip_salida:
+        for ruta, nombre in entradas:
+            try:
+                info = zipfile.ZipInfo.from_file(ruta, nombre)
+            except OSError:
+                continue  # el archivo ya no está en disco
+            if os.path.splitext(nombre)[1].lower() in EXTENSIONES_SIN_COMPRESION:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with open(ruta, "rb") as origen, zip_salida.open(info, "w") as destino:
+                while bloque := origen.read(TAMANO_BLOQUE):
+                    destino.write(bloque)
+                    yield salida.vaciar()
+            yield salida.vaciar()
+    # Directorio central
+    yield salida.vaciar()
+
+
+def _nombres_unicos(entradas):
+    """Evita nombres repetidos dentro del ZIP ('plano.pdf', 'plano (2).pdf')"""
+    usados = set()
+    for ruta, nombre in entradas:
+        nombre = nombre.replace("\\", "/").lstrip("/")
+        base, extension = os.path.splitext(nombre)
+        candidato, n = nombre, 1
+        while candidato.lower() in usados:
+            n += 1
+            candidato = f"{base} ({n}){extension}"
+        usados.add(candidato.lower())
+        yield ruta, candidato
+
+
+def respuesta_zip(nombre_zip, entradas):
+    """
+    Descarga de varios archivos como un ZIP construido mientras se envía.
+
+    Args:
+        nombre_zip: nombre del archivo para Content-Disposition
+        entradas: iterable de (ruta absoluta, nombre dentro del ZIP);
+            los archivos que no existan se omiten
+
+    No se conoce el tamaño final, así que no hay Content-Length ni Range.
+    """
+    respuesta = StreamingHttpResponse(
+        (bloque for bloque in _generar_zip(_nombres_unicos(entradas)) if bloque),
+        content_type="application/zip",
+    )
+    respuesta["Content-Disposition"] = content_disposition_header(True, nombre_zip)
+    respuesta["Cache-Control"] = "private, no-store"
+    # nginx: no acumular la respuesta antes de enviarla al cliente
+    respuesta["X-Accel-Buffering"] = "no"
+    return respuesta
@@ -19,8 +19,9 @@ class ProveedorAdmin(admin.ModelAdmin):
 class DetalleOrdenInline(admin.TabularInline):
     model = DetalleOrden
     extra = 1
-    fields = ("producto", "cantidad", "precio_unitario", "total")
+    fields = ("insumo", "producto", "cantidad", "precio_unitario", "total")
     readonly_fields = ("total",)
+    autocomplete_fields = ("insumo",)
 
     # ✅ para que Django sepa mostrar la propiedad total
     def total(self, obj):
@@ -33,9 +34,9 @@ class DetalleOrdenInline(admin.TabularInline):
 # -------------------------
 @admin.register(OrdenCompra)
 class OrdenCompraAdmin(admin.ModelAdmin):
-    list_display = ("numero", "proveedor", "estado", "fecha_emision", "total")
+    list_display = ("numero", "proveedor", "estado", "origen", "fecha_emision", "total")
     search_fields = ("numero", "proveedor__nombre")
-    list_filter = ("estado", "fecha_emision")
+    list_filter = ("estado", "origen", "fecha_emision")
     ordering = ("-fecha_emision",)
     inlines = [DetalleOrdenInline]
     date_hierarchy = "fecha_emision"
@@ -0,0 +1,37 @@
+"""
+Comando para generar órdenes de compra de reabastecimiento
+Uso: python manage.py generar_ordenes_reabastecimiento [--dry-run]
+
+Pensado para ejecutarse periódicamente (cron): es idempotente, los insumos
+que ya están en una orden abierta no se vuelven a pedir.
+"""
+
+from django.core.management.base import BaseCommand
+
+from nexusone.administrativa.compras.reabastecimiento import generar_ordenes
+
+
+class Command(BaseCommand):
+    help = 'Genera órdenes de compra por proveedor para los insumos por debajo del stock mínimo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra las órdenes que se generarían, sin guardarlas'
+        )
+
+    def handle(self, *args, **options):
+        resultado = generar_ordenes(dry_run=options['dry_run'])
+
+        for orden in resultado.ordenes:
+            self.stdout.write(f'🛒 OC {orden.numero} - {orden.proveedor}: ${orden.total:,.2f}')
+        if resultado.sin_proveedor:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {resultado.sin_proveedor} insumo(s) bajo mínimo sin proveedor asignado'
+            ))
+
+        resumen = f'📊 {len(resultado.ordenes)} orden(es) con {resultado.detalles} insumo(s)'
+        if resultado.dry_run:
+            resumen += ' (dry-run, sin cambios)'
+        self.stdout.write(self.style.SUCCESS(resumen))
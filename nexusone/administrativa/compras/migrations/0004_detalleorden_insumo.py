@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0003_alter_ordencompra_presupuesto_disponible_al_crear'),
+        ('inventario', '0004_cierres_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detalleorden',
+            name='insumo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='detalles_orden', to='inventario.insumo', verbose_name='Insumo'),
+        ),
+    ]
@@ -2,6 +2,8 @@
 from django.db import models
 from django.utils import timezone
 
+from nexusone.administrativa.models import Secuencia
+
 
 # ==================================================
 # PROVEEDOR (sin cambios)
@@ -39,6 +41,9 @@ class OrdenCompra(models.Model):
         ("cerrada", "Cerrada"),
     ]
 
+    # Estados en los que la orden aún no ha entregado el material
+    ESTADOS_ABIERTOS = ["generada", "borrador", "pendiente", "aprobada", "ejecutada"]
+
     DESTINOS = [
         ("constructora", "Constructora"),
         ("proyecto", "Proyecto"),
@@ -142,12 +147,7 @@ class OrdenCompra(models.Model):
         """Generar número automático y validar presupuesto"""
         # Generar número si no tiene
         if not self.numero:
-            ultimo = OrdenCompra.objects.all().order_by("id").last()
-            if not ultimo:
-                nuevo_numero = 1
-            else:
-                nuevo_numero = int(ultimo.numero) + 1
-            self.numero = str(nuevo_numero).zfill(5)
+            self.numero = OrdenCompra.siguientes_numeros(1)[0]
         
         # Validar presupuesto al crear (solo para OCs con presupuesto asignado)
         if not self.pk and self.presupuesto_compras:
@@ -161,6 +161,12 @@ class OrdenCompra(models.Model):
         if self.presupuesto_compras:
             self._actualizar_presupuesto()
     
+    @classmethod
+    def siguientes_numeros(cls, cantidad):
+        """Números consecutivos para `cantidad` órdenes nuevas (también para bulk_create)"""
+        semilla = lambda: Secuencia.ultimo_entero(cls.objects.all(), "numero")
+        return [str(n).zfill(5) for n in Secuencia.reservar("OC", cantidad, semilla)]
+
     def _actualizar_presupuesto(self):
         """Actualiza los montos del presupuesto según el estado de la OC"""
         presupuesto = self.presupuesto_compras
@@ -191,7 +197,7 @@ class OrdenCompra(models.Model):
 
 
 # ==================================================
-# DETALLE ORDEN (sin cambios)
+# DETALLE ORDEN
 # ==================================================
 class DetalleOrden(models.Model):
     orden = models.ForeignKey(
@@ -199,6 +205,15 @@ class DetalleOrden(models.Model):
         on_delete=models.CASCADE,
         related_name="detalles"
     )
+    # 🆕 Insumo del inventario (opcional: los servicios no tienen insumo)
+    insumo = models.ForeignKey(
+        "inventario.Insumo",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="detalles_orden",
+        verbose_name="Insumo"
+    )
     producto = models.CharField(max_length=200, verbose_name="Producto / Servicio")
     cantidad = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     precio_unitario = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -0,0 +1,131 @@
+# nexusone/administrativa/compras/reabastecimiento.py
+"""
+Reabastecimiento automático de insumos.
+Lo usan el comando `generar_ordenes_reabastecimiento` y la acción del admin de insumos.
+
+- Una sola consulta encuentra los insumos con stock < stock_minimo que tienen
+  proveedor y que no están ya en una orden abierta
+- Pide hasta stock_maximo, agrupando por proveedor (una OC "generada" por proveedor)
+- Escribe órdenes y detalles con bulk_create dentro de una transacción
+- Es idempotente: volver a ejecutarlo no duplica insumos con órdenes abiertas
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+
+from nexusone.administrativa.inventario.models import Insumo
+from .models import DetalleOrden, OrdenCompra
+
+CENTAVOS = Decimal("0.01")
+
+
+class ResultadoReabastecimiento:
+    """Resumen de una ejecución (o de una simulación con dry_run)"""
+
+    def __init__(self):
+        self.ordenes = []        # OrdenCompra creadas
+        self.detalles = 0
+        self.sin_proveedor = 0   # insumos bajo mínimo que no se pueden pedir
+        self.dry_run = False
+
+
+def insumos_bajo_minimo(insumos=None):
+    """
+    Insumos con stock por debajo del mínimo y sin una orden abierta que los incluya.
+    Anota `saldo_stock` (ver InsumoQuerySet.con_stock).
+    """
+    insumos = insumos if insumos is not None else Insumo.objects.all()
+    orden_abierta = DetalleOrden.objects.filter(
+        insumo=OuterRef("pk"),
+        orden__estado__in=OrdenCompra.ESTADOS_ABIERTOS,
+    )
+    return (
+        insumos.con_stock()
+        .filter(saldo_stock__lt=F("stock_minimo"), stock_maximo__gt=F("saldo_stock"))
+        .exclude(Exists(orden_abierta))
+        .order_by("proveedor_id", "codigo")
+    )
+
+
+def _precio_neto(insumo):
+    precio = insumo.precio_unitario * (1 - insumo.descuento_proveedor / 100)
+    return precio.quantize(CENTAVOS)
+
+
+def generar_ordenes(insumos=None, dry_run=False):
+    """
+    Genera una OrdenCompra (estado "generada", origen "automatica") por proveedor
+    con un DetalleOrden por insumo bajo mínimo, pidiendo hasta stock_maximo.
+
+    Args:
+        insumos: queryset de Insumo para limitar la revisión (default: todos)
+        dry_run: calcula las órdenes y revierte la transacción
+    """
+    resultado = ResultadoReabastecimiento()
+    resultado.dry_run = dry_run
+
+    with transaction.atomic():
+        por_proveedor = defaultdict(list)
+        for insumo in insumos_bajo_minimo(insumos):
+            if insumo.proveedor_id is None:
+                resultado.sin_proveedor += 1
+            else:
+                por_proveedor[insumo.proveedor_id].append(insumo)
+
+        if not por_proveedor:
+            return resultado
+
+        numeros = OrdenCompra.siguientes_numeros(len(por_proveedor))
+        ordenes = []
+        pendientes = []  # (orden, [(insumo, cantidad, precio)])
+
+        for numero, (proveedor_id, lista) in zip(numeros, por_proveedor.items()):
+            lineas = []
+            subtotal = impuestos = Decimal("0")
+            for insumo in lista:
+                cantidad = Decimal(insumo.stock_maximo - insumo.saldo_stock)
+                precio = _precio_neto(insumo)
+                lineas.append((insumo, cantidad, precio))
+                subtotal += cantidad * precio
+                impuestos += cantidad * precio * insumo.iva / 100
+
+            subtotal = subtotal.quantize(CENTAVOS)
+            impuestos = impuestos.quantize(CENTAVOS)
+            orden = OrdenCompra(
+                numero=numero,
+                proveedor_id=proveedor_id,
+                estado="generada",
+                origen="automatica",
+                destino="interna",
+                descripcion="Reabastecimiento automático: insumos por debajo del stock mínimo",
+                subtotal=subtotal,
+                impuestos=impuestos,
+                total=subtotal + impuestos,
+            )
+            ordenes.append(orden)
+            pendientes.append((orden, lineas))
+
+        # bulk_create no pasa por OrdenCompra.save(): el número se asignó arriba
+        OrdenCompra.objects.bulk_create(ordenes)
+        detalles = [
+            DetalleOrden(
+                orden=orden,
+                insumo=insumo,
+                producto=f"{insumo.codigo} - {insumo.nombre}"[:200],
+                cantidad=cantidad,
+                precio_unitario=precio,
+            )
+            for orden, lineas in pendientes
+            for insumo, cantidad, precio in lineas
+        ]
+        DetalleOrden.objects.bulk_create(detalles, batch_size=1000)
+
+        resultado.ordenes = ordenes
+        resultado.detalles = len(detalles)
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return resultado
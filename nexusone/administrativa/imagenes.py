@@ -0,0 +1,159 @@
+# nexusone/administrativa/imagenes.py
+"""
+Derivados (miniatura y tamaño medio) de las imágenes subidas.
+Los usan las señales post_save registradas en AdministrativaConfig.ready(),
+el filtro de plantilla `rendicion` y el comando `generar_derivados_imagenes`.
+
+- Se generan con Pillow en WebP (JPEG si Pillow no tiene WebP)
+- Los JPEG se decodifican ya reducidos (Image.draft) y se respeta la
+  orientación EXIF de las fotos de celular
+- Se guardan en MEDIA_ROOT/_derivados/<ruta original>.<rendición>.<ext>
+- `generar_derivados` trabaja solo con rutas absolutas (sin ORM), para poder
+  ejecutarse en un pool de procesos
+"""
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, features
+
+# Lado mayor en píxeles de cada rendición
+RENDICIONES = {
+    "media": 800,
+    "miniatura": 160,
+}
+CARPETA_DERIVADOS = "_derivados"
+EXTENSION = "webp" if features.check("webp") else "jpg"
+CALIDAD = 80
+
+# (app_label, modelo, campo) de los ImageField con derivados
+CAMPOS_CON_DERIVADOS = [
+    ("produccion", "AvanceProduccion", "evidencia"),
+    ("talento_humano", "Empleado", "foto"),
+    ("talento_humano", "EntregaEPP", "firma_empleado"),
+    ("proyectos", "APU", "imagen"),
+    ("talento_humano", "ActividadBienestar", "foto"),
+]
+
+CACHE_EXISTE_TTL = 24 * 3600
+
+# Lo que Pillow lanza con archivos ilegibles; DecompressionBombError no hereda de OSError
+ERRORES_IMAGEN = (OSError, ValueError, Image.DecompressionBombError)
+
+
+def nombre_derivado(nombre, rendicion):
+    """
+    Ruta relativa (dentro de MEDIA_ROOT) del derivado de `nombre`.
+    Conserva la extensión original: perfil.jpg y perfil.png no comparten derivado.
+    """
+    return f"{CARPETA_DERIVADOS}/{nombre}.{rendicion}.{EXTENSION}"
+
+
+def destinos_de(nombre):
+    """{rendición: ruta absoluta} de los derivados de un archivo de MEDIA_ROOT"""
+    return {
+        rendicion: os.path.join(settings.MEDIA_ROOT, nombre_derivado(nombre, rendicion))
+        for rendicion in RENDICIONES
+    }
+
+
+def _preparar_modo(imagen):
+    """RGB/RGBA según haya transparencia (firmas PNG); JPEG no admite alfa"""
+    tiene_alfa = imagen.mode in ("RGBA", "LA") or (imagen.mode == "P" and "transparency" in imagen.info)
+    if not tiene_alfa:
+        return imagen.convert("RGB") if imagen.mode != "RGB" else imagen
+    imagen = imagen.convert("RGBA")
+    if EXTENSION == "webp":
+        return imagen
+    fondo = Image.new("RGB", imagen.size, (255, 255, 255))
+    fondo.paste(imagen, mask=imagen.getchannel("A"))
+    return fondo
+
+
+def generar_derivados(origen, destinos, forzar=False):
+    """
+    Genera los derivados de la imagen `origen` (ruta absoluta).
+
+    Args:
+        origen: ruta del archivo original
+        destinos: {rendición: ruta absoluta de salida}
+        forzar: regenerar aunque el derivado ya exista
+
+    Returns:
+        lista de rendiciones generadas
+    """
+    pendientes = {r: d for r, d in destinos.items() if forzar or not os.path.exists(d)}
+    if not pendientes:
+        return []
+
+    lado_mayor = max(RENDICIONES[r] for r in pendientes)
+    with Image.open(origen) as imagen:
+        # JPEG: decodifica directamente a 1/2, 1/4 u 1/8 si alcanza para el lado mayor
+        imagen.draft("RGB", (lado_mayor, lado_mayor))
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen = _preparar_modo(imagen)
+
+        generadas = []
+        # De mayor a menor: cada rendición parte de la anterior (menos píxeles que escalar)
+        for rendicion in sorted(pendientes, key=RENDICIONES.get, reverse=True):
+            lado = RENDICIONES[rendicion]
+            imagen.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            destino = pendientes[rendicion]
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporal = f"{destino}.tmp"
+            imagen.save(temporal, format="WEBP" if EXTENSION == "webp" else "JPEG",
+                        quality=CALIDAD, optimize=True)
+            os.replace(temporal, destino)
+            generadas.append(rendicion)
+    return generadas
+
+
+def derivados_de_archivo(campo_archivo, forzar=False):
+    """Genera los derivados de un FieldFile (ignora archivos vacíos o ilegibles)"""
+    if not campo_archivo or not campo_archivo.name:
+        return []
+    origen = os.path.join(settings.MEDIA_ROOT, campo_archivo.name)
+    if not os.path.isfile(origen):
+        return []
+    try:
+        return generar_derivados(origen, destinos_de(campo_archivo.name), forzar=forzar)
+    except ERRORES_IMAGEN:
+        # No es una imagen que Pillow pueda leer (o es demasiado grande): se sigue usando el original
+        return []
+
+
+def url_rendicion(campo_archivo, rendicion):
+    """URL del derivado si existe; si no, la del original"""
+    if not campo_archivo or not campo_archivo.name:
+        return ""
+    nombre = nombre_derivado(campo_archivo.name, rendicion)
+    clave = f"derivado:{nombre}"
+    if not cache.get(clave):
+        if not os.path.exists(os.path.join(settings.MEDIA_ROOT, nombre)):
+            return campo_archivo.url
+        cache.set(clave, True, CACHE_EXISTE_TTL)
+    return f"{settings.MEDIA_URL}{nombre}"
+
+
+# ---------- hook de subida ----------
+
+def _al_guardar(sender, instance, **kwargs):
+    """post_save: genera los derivados que falten después del commit"""
+    for campo in sender._campos_con_derivados:
+        archivo = getattr(instance, campo)
+        if archivo and archivo.name:
+            # robust: un error inesperado se registra en el log y no convierte la respuesta en 500
+            transaction.on_commit(lambda archivo=archivo: derivados_de_archivo(archivo), robust=True)
+
+
+def conectar_senales():
+    """Conecta el post_save de cada modelo con ImageField derivables"""
+    por_modelo = {}
+    for app_label, nombre_modelo, campo in CAMPOS_CON_DERIVADOS:
+        por_modelo.setdefault(apps.get_model(app_label, nombre_modelo), []).append(campo)
+    for modelo, campos in por_modelo.items():
+        modelo._campos_con_derivados = campos
+        post_save.connect(_al_guardar, sender=modelo, dispatch_uid=f"derivados_{modelo._meta.label}")
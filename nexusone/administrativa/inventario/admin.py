@@ -1,4 +1,4 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import (
     Insumo,
     MovimientoKardex,
@@ -6,17 +6,90 @@ from .models import (
     MovimientoHerramienta,
     Maquinaria,
     MovimientoMaquinaria,
+    StockInsumo,
+    CierreInventario,
+    SaldoCierre,
+    PronosticoInsumo,
+    DocumentoKardex,
 )
 
 # ---- Insumos ----
 @admin.register(Insumo)
 class InsumoAdmin(admin.ModelAdmin):
     list_display = ("id", "nombre", "stock_minimo", "stock_maximo", "stock_actual_display")
-    search_fields = ("nombre",)
+    search_fields = ("codigo", "nombre")
+    actions = ["generar_ordenes_compra"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).con_stock()
+
+    def get_search_results(self, request, queryset, search_term):
+        # También la usa el autocompletado de los FK a Insumo (autocomplete_fields)
+        if not search_term:
+            return queryset, False
+        return queryset.buscar(search_term), False
+
+    def generar_ordenes_compra(self, request, queryset):
+        from nexusone.administrativa.compras.reabastecimiento import generar_ordenes
+
+        resultado = generar_ordenes(Insumo.objects.filter(pk__in=queryset.values("pk")))
+        self.message_user(
+            request,
+            f"{len(resultado.ordenes)} orden(es) de compra generada(s) con {resultado.detalles} insumo(s) 🛒",
+        )
+        if resultado.sin_proveedor:
+            self.message_user(
+                request,
+                f"{resultado.sin_proveedor} insumo(s) bajo mínimo sin proveedor asignado",
+                level=messages.WARNING,
+            )
+    generar_ordenes_compra.short_description = "Generar órdenes de compra (bajo stock mínimo)"
 
     def stock_actual_display(self, obj):
-        return obj.stock_actual()
+        return obj.stock_actual
     stock_actual_display.short_description = "Stock actual"
+    stock_actual_display.admin_order_field = "saldo_stock"
+
+
+@admin.register(StockInsumo)
+class StockInsumoAdmin(admin.ModelAdmin):
+    list_display = ("insumo", "cantidad", "actualizado")
+    search_fields = ("insumo__codigo", "insumo__nombre")
+    list_select_related = ("insumo",)
+    readonly_fields = ("insumo", "cantidad", "actualizado")
+
+@admin.register(PronosticoInsumo)
+class PronosticoInsumoAdmin(admin.ModelAdmin):
+    list_display = ("insumo", "metodo", "demanda_semanal", "stock_seguridad",
+                    "stock_minimo_sugerido", "stock_maximo_sugerido", "actualizado")
+    list_filter = ("metodo",)
+    search_fields = ("insumo__codigo", "insumo__nombre")
+    list_select_related = ("insumo",)
+
+# ---- Cierres mensuales ----
+class SaldoCierreInline(admin.TabularInline):
+    model = SaldoCierre
+    extra = 0
+    fields = ("insumo", "cantidad", "costo_unitario", "valor")
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(CierreInventario)
+class CierreInventarioAdmin(admin.ModelAdmin):
+    list_display = ("periodo", "fecha_corte", "vigente", "total_valor", "actualizado")
+    list_filter = ("vigente",)
+    ordering = ("-periodo",)
+    readonly_fields = ("fecha_corte", "vigente", "total_valor", "creado", "actualizado")
+    inlines = [SaldoCierreInline]
+    actions = ["recalcular"]
+
+    def recalcular(self, request, queryset):
+        for cierre in queryset.order_by("periodo"):
+            CierreInventario.cerrar(cierre.periodo)
+        self.message_user(request, f"{queryset.count()} cierre(s) recalculado(s) 🔄")
+    recalcular.short_description = "Recalcular cierres seleccionados"
+
 
 # ---- Kardex ----
 @admin.register(MovimientoKardex)
@@ -27,6 +100,28 @@ class MovimientoKardexAdmin(admin.ModelAdmin):
     ordering = ("-fecha",)
 
 
+class MovimientoDocumentoInline(admin.TabularInline):
+    model = MovimientoKardex
+    extra = 0
+    fields = ("insumo", "tipo", "cantidad", "observacion")
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(DocumentoKardex)
+class DocumentoKardexAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "referencia", "fecha", "creado_por")
+    list_filter = ("tipo", "fecha")
+    search_fields = ("referencia", "observacion")
+    ordering = ("-fecha",)
+    readonly_fields = ("tipo", "fecha", "creado_por", "creado")
+    inlines = [MovimientoDocumentoInline]
+
+    def has_add_permission(self, request):
+        # Se registran desde el kardex para que el saldo se ajuste en bloque
+        return False
+
+
 # ---- Herramientas ----
 @admin.register(Herramienta)
 class HerramientaAdmin(admin.ModelAdmin):
@@ -37,9 +132,10 @@ class HerramientaAdmin(admin.ModelAdmin):
 
 @admin.register(MovimientoHerramienta)
 class MovimientoHerramientaAdmin(admin.ModelAdmin):
-    list_display = ("herramienta", "tipo", "cantidad", "fecha")
+    list_display = ("herramienta", "tipo", "empleado", "cantidad", "fecha", "fecha_devolucion", "pendiente")
     list_filter = ("tipo", "fecha")
-    search_fields = ("herramienta__nombre",)
+    search_fields = ("herramienta__nombre", "empleado__primer_nombre", "empleado__primer_apellido")
+    list_select_related = ("herramienta", "empleado")
     ordering = ("-fecha",)
 
 
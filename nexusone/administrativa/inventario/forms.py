@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from django import forms
-from .models import Insumo, Maquinaria, Herramienta, MovimientoKardex
+from .models import Insumo, Maquinaria, Herramienta, MovimientoHerramienta, MovimientoKardex, DocumentoKardex
+from .widgets import InsumoAutocomplete
 
 # ==============================
 # 📦 INSUMOS
@@ -133,6 +136,28 @@ class HerramientaForm(forms.ModelForm):
             }),
         }
 
+class MovimientoHerramientaForm(forms.ModelForm):
+    class Meta:
+        model = MovimientoHerramienta
+        fields = ["herramienta", "tipo", "empleado", "cantidad", "fecha", "fecha_devolucion", "descripcion"]
+        widgets = {
+            "herramienta": forms.Select(attrs={"class": "form-control"}),
+            "tipo": forms.Select(attrs={"class": "form-control"}),
+            "empleado": forms.Select(attrs={"class": "form-control"}),
+            "cantidad": forms.NumberInput(attrs={"class": "form-control", "min": "1"}),
+            "fecha": forms.DateInput(attrs={"class": "form-control", "type": "date"}, format="%Y-%m-%d"),
+            "fecha_devolucion": forms.DateInput(attrs={"class": "form-control", "type": "date"}, format="%Y-%m-%d"),
+            "descripcion": forms.Textarea(attrs={"class": "form-control", "rows": 2}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from nexusone.talento_humano.models import Empleado
+        self.fields["herramienta"].queryset = Herramienta.objects.order_by("nombre")
+        self.fields["empleado"].queryset = Empleado.objects.filter(estado="activo").order_by(
+            "primer_apellido", "primer_nombre"
+        )
+
 # ==============================
 # 📋 KARDEX
 # ==============================
@@ -141,11 +166,12 @@ class MovimientoKardexForm(forms.ModelForm):
         model = MovimientoKardex
         fields = ["insumo", "tipo", "cantidad", "observacion", "fecha"]
         widgets = {
-            "insumo": forms.Select(attrs={"class": "form-control"}),
+            "insumo": InsumoAutocomplete(),
             "tipo": forms.Select(attrs={"class": "form-control"}),
             "cantidad": forms.NumberInput(attrs={
                 "class": "form-control", 
-                "min": "1"
+                "min": "0.001",
+                "step": "0.001"
             }),
             "observacion": forms.Textarea(attrs={
                 "class": "form-control", 
@@ -156,4 +182,83 @@ class MovimientoKardexForm(forms.ModelForm):
                 "class": "form-control", 
                 "type": "date"
             }),
-        }
\ No newline at end of file
+        }
+
+# ==============================
+# 📑 DOCUMENTOS DE KARDEX (varias líneas)
+# ==============================
+class DocumentoKardexForm(forms.ModelForm):
+    class Meta:
+        model = DocumentoKardex
+        fields = ["tipo", "referencia", "fecha", "observacion"]
+        widgets = {
+            "tipo": forms.Select(attrs={"class": "form-control"}),
+            "referencia": forms.TextInput(attrs={
+                "class": "form-control",
+                "placeholder": "Remisión, factura, OT..."
+            }),
+            "fecha": forms.DateTimeInput(attrs={
+                "class": "form-control",
+                "type": "datetime-local"
+            }, format="%Y-%m-%dT%H:%M"),
+            "observacion": forms.Textarea(attrs={
+                "class": "form-control",
+                "rows": 2,
+                "placeholder": "Observación general (se copia a las líneas sin observación)"
+            }),
+        }
+
+
+class LineaDocumentoForm(forms.Form):
+    # Solo el id: el formset valida que existan todos con una consulta
+    insumo = forms.IntegerField(widget=InsumoAutocomplete())
+    cantidad = forms.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        min_value=Decimal("0.001"),
+        widget=forms.NumberInput(attrs={"class": "form-control", "min": "0.001", "step": "0.001"})
+    )
+    observacion = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"class": "form-control"})
+    )
+
+
+class BaseLineaDocumentoFormSet(forms.BaseFormSet):
+    def _filas(self):
+        return [
+            form for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get("DELETE")
+        ]
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        ids = {form.cleaned_data["insumo"] for form in self._filas()}
+        existentes = set(Insumo.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        for form in self._filas():
+            if form.cleaned_data["insumo"] not in existentes:
+                form.add_error("insumo", "El insumo no existe")
+
+    def lineas(self):
+        """[(insumo_id, cantidad, observacion)] de las filas diligenciadas"""
+        return [
+            (form.cleaned_data["insumo"], form.cleaned_data["cantidad"], form.cleaned_data["observacion"])
+            for form in self._filas()
+        ]
+
+
+LineaDocumentoFormSet = forms.formset_factory(
+    LineaDocumentoForm,
+    formset=BaseLineaDocumentoFormSet,
+    extra=5,
+    min_num=1,
+    validate_min=True,
+    can_delete=True,
+)
+
+
+class FiltroKardexForm(forms.Form):
+    # Filtro del kardex: solo se renderiza el insumo elegido (autocompletado)
+    insumo = forms.IntegerField(required=False, widget=InsumoAutocomplete(attrs={"id": "insumo"}))
@@ -0,0 +1,203 @@
+# nexusone/administrativa/inventario/importacion.py
+"""
+Motor de importación de insumos desde Excel.
+Lo usan la vista `importar_excel` y el comando `importar_insumos`.
+
+- Lee el libro en modo read-only (streaming, sin cargarlo completo en memoria)
+- Valida las filas por lotes
+- Consulta los códigos existentes una sola vez (y solo actualiza nombres que cambian)
+- Escribe con bulk_create / bulk_update dentro de una sola transacción
+  (bulk_* no pasa por Insumo.save(): `busqueda` se calcula aquí)
+"""
+from decimal import Decimal, InvalidOperation
+
+import openpyxl
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CierreInventario, Insumo, MovimientoKardex, StockInsumo
+
+HOJA_POR_DEFECTO = "Inventario_Procesado"
+TAMANO_LOTE = 1000
+
+MAX_CODIGO = Insumo._meta.get_field("codigo").max_length
+MAX_NOMBRE = Insumo._meta.get_field("nombre").max_length
+DECIMALES_STOCK = Decimal("0.001")  # StockInsumo.cantidad / MovimientoKardex.cantidad
+
+
+class ResultadoImportacion:
+    """Resumen de una importación (o de una simulación con dry_run)"""
+
+    def __init__(self, hoja):
+        self.hoja = hoja
+        self.creados = 0
+        self.actualizados = 0
+        self.eliminados = 0
+        self.filas_leidas = 0
+        self.errores = []  # [(fila, codigo, mensaje)]
+        self.dry_run = False
+
+    @property
+    def procesados(self):
+        return self.creados + self.actualizados
+
+
+def _leer_fila(row):
+    """Valida una fila y retorna (codigo, nombre, stock) o lanza ValueError"""
+    if not row or len(row) < 3:
+        raise ValueError("la fila debe tener Código, Nombre y Stock")
+
+    codigo = str(row[0]).strip() if row[0] is not None else ""
+    nombre = str(row[1]).strip() if row[1] is not None else ""
+
+    if not codigo or not nombre:
+        raise ValueError("código o nombre vacío")
+    if len(codigo) > MAX_CODIGO:
+        raise ValueError(f"el código supera {MAX_CODIGO} caracteres")
+
+    try:
+        stock = Decimal(str(row[2]).strip().replace(",", ".")) if row[2] not in (None, "") else Decimal("0")
+    except InvalidOperation:
+        raise ValueError(f"stock inválido: {row[2]!r}")
+    if not stock.is_finite():
+        raise ValueError(f"stock inválido: {row[2]!r}")
+    if stock < 0:
+        raise ValueError("el stock no puede ser negativo")
+    if stock != stock.quantize(DECIMALES_STOCK):
+        raise ValueError(f"el stock admite máximo 3 decimales: {row[2]!r}")
+    stock = stock.quantize(DECIMALES_STOCK)
+
+    return codigo, nombre[:MAX_NOMBRE], stock
+
+
+def _guardar_lote(lote, existentes, resultado):
+    """Escribe un lote validado: crea insumos nuevos y actualiza nombres"""
+    nuevos = []
+    stock_inicial = {}
+    a_actualizar = []
+    sin_cambios = 0
+
+    for codigo, nombre, stock in lote:
+        if codigo in existentes:
+            pk, nombre_actual = existentes[codigo]
+            if nombre_actual == nombre:
+                sin_cambios += 1
+            else:
+                a_actualizar.append(Insumo(
+                    pk=pk, codigo=codigo, nombre=nombre,
+                    busqueda=Insumo.texto_busqueda(codigo, nombre),
+                ))
+        else:
+            nuevos.append(Insumo(
+                codigo=codigo,
+                nombre=nombre,
+                busqueda=Insumo.texto_busqueda(codigo, nombre),
+                unidad="UND",
+                precio_unitario=Decimal("0.00"),
+                stock_minimo=0,
+                stock_maximo=1000,
+                iva=Decimal("19.00"),
+                descuento_proveedor=Decimal("0.00"),
+            ))
+            stock_inicial[codigo] = stock
+
+    if nuevos:
+        Insumo.objects.bulk_create(nuevos)
+        ahora = timezone.now()
+        movimientos = []
+        saldos = []
+        for insumo in nuevos:
+            existentes[insumo.codigo] = (insumo.pk, insumo.nombre)
+            stock = stock_inicial[insumo.codigo]
+            if stock > 0:
+                movimientos.append(MovimientoKardex(
+                    insumo=insumo,
+                    tipo="entrada",
+                    cantidad=stock,
+                    observacion="Stock inicial importado desde Excel",
+                    fecha=ahora,
+                ))
+                saldos.append(StockInsumo(insumo=insumo, cantidad=stock))
+        # bulk_create no pasa por MovimientoKardex.save(): el saldo se crea aquí
+        MovimientoKardex.objects.bulk_create(movimientos)
+        StockInsumo.objects.bulk_create(saldos)
+        if movimientos:
+            CierreInventario.invalidar_desde(ahora)
+
+    if a_actualizar:
+        Insumo.objects.bulk_update(a_actualizar, ["nombre", "busqueda"])
+
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(a_actualizar) + sin_cambios
+
+
+def importar_insumos(archivo, hoja=HOJA_POR_DEFECTO, limpiar=False, dry_run=False,
+                     tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Importa insumos desde un archivo Excel (ruta o archivo subido).
+
+    Columnas esperadas desde la fila 2: Código, Nombre, Stock.
+    Los insumos nuevos se crean con stock inicial (entrada en el kardex);
+    los existentes solo actualizan su nombre.
+
+    Args:
+        archivo: ruta o file-like del .xlsx
+        hoja: hoja a leer; si no existe se usa la hoja activa
+        limpiar: elimina todos los insumos antes de importar
+        dry_run: valida y simula la escritura, luego revierte la transacción
+        tamano_lote: filas por lote de validación/escritura
+        progreso: callable(filas_leidas) llamado después de cada lote
+    """
+    wb = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        ws = wb[hoja] if hoja in wb.sheetnames else wb.active
+        resultado = ResultadoImportacion(ws.title)
+        resultado.dry_run = dry_run
+
+        with transaction.atomic():
+            if limpiar:
+                resultado.eliminados = Insumo.objects.count()
+                Insumo.objects.all().delete()
+
+            existentes = {
+                codigo: (pk, nombre)
+                for codigo, pk, nombre in Insumo.objects.values_list("codigo", "pk", "nombre")
+            }
+            vistos = set()
+            lote = []
+
+            for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+                if not row or all(valor in (None, "") for valor in row):
+                    continue
+                resultado.filas_leidas += 1
+
+                try:
+                    codigo, nombre, stock = _leer_fila(row)
+                except ValueError as e:
+                    codigo = str(row[0]).strip() if row and row[0] is not None else ""
+                    resultado.errores.append((idx, codigo, str(e)))
+                    continue
+
+                if codigo in vistos:
+                    resultado.errores.append((idx, codigo, "código duplicado en el archivo"))
+                    continue
+                vistos.add(codigo)
+                lote.append((codigo, nombre, stock))
+
+                if len(lote) >= tamano_lote:
+                    _guardar_lote(lote, existentes, resultado)
+                    lote = []
+                    if progreso:
+                        progreso(resultado.filas_leidas)
+
+            if lote:
+                _guardar_lote(lote, existentes, resultado)
+                if progreso:
+                    progreso(resultado.filas_leidas)
+
+            if dry_run:
+                transaction.set_rollback(True)
+    finally:
+        wb.close()
+
+    return resultado
@@ -0,0 +1,54 @@
+"""
+Comando para el cierre mensual de inventario
+Uso:
+    python manage.py cerrar_inventario                 # cierra el mes anterior
+    python manage.py cerrar_inventario --periodo 2025-09
+    python manage.py cerrar_inventario --reconstruir   # recalcula cierres no vigentes
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nexusone.administrativa.inventario.models import CierreInventario
+
+
+class Command(BaseCommand):
+    help = 'Genera la foto mensual de cantidades y valores por insumo (CierreInventario)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            help='Mes a cerrar en formato AAAA-MM (default: mes anterior)'
+        )
+        parser.add_argument(
+            '--reconstruir',
+            action='store_true',
+            help='Recalcula los cierres marcados como no vigentes por ediciones del kardex'
+        )
+
+    def handle(self, *args, **options):
+        if options['reconstruir']:
+            cierres = CierreInventario.reconstruir()
+            for cierre in cierres:
+                self.stdout.write(f'🔄 {cierre}: ${cierre.total_valor:,.2f}')
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(cierres)} cierre(s) recalculado(s)'))
+            return
+
+        if options['periodo']:
+            try:
+                periodo = datetime.strptime(options['periodo'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('El periodo debe tener formato AAAA-MM')
+        else:
+            hoy = timezone.localdate()
+            periodo = hoy.replace(day=1)
+            periodo = periodo.replace(year=periodo.year - 1, month=12) if periodo.month == 1 else periodo.replace(month=periodo.month - 1)
+
+        # Un cierre se apoya en el anterior: primero los pendientes
+        CierreInventario.reconstruir()
+        cierre = CierreInventario.cerrar(periodo)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {cierre}: {cierre.saldos.count()} insumos, valor total ${cierre.total_valor:,.2f}'
+        ))
@@ -0,0 +1,70 @@
+"""
+Comando para pronosticar el consumo de insumos y sugerir stock mínimo/máximo
+Uso: python manage.py pronosticar_consumo [--metodo promedio|exponencial] [--semanas 26]
+                                          [--reposicion 2] [--cobertura 4] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nexusone.administrativa.inventario import pronostico
+
+
+class Command(BaseCommand):
+    help = 'Calcula la demanda semanal por insumo desde las salidas del kardex y guarda el mínimo/máximo sugerido'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metodo',
+            choices=['promedio', 'exponencial'],
+            default='promedio',
+            help='Promedio móvil o suavizado exponencial (default: promedio)'
+        )
+        parser.add_argument(
+            '--semanas',
+            type=int,
+            default=pronostico.SEMANAS_HISTORIA,
+            help=f'Semanas de historia a leer (default: {pronostico.SEMANAS_HISTORIA})'
+        )
+        parser.add_argument(
+            '--reposicion',
+            type=float,
+            default=pronostico.SEMANAS_REPOSICION,
+            help=f'Semanas que tarda el proveedor en entregar (default: {pronostico.SEMANAS_REPOSICION})'
+        )
+        parser.add_argument(
+            '--cobertura',
+            type=float,
+            default=pronostico.SEMANAS_COBERTURA,
+            help=f'Semanas de consumo que cubre un pedido (default: {pronostico.SEMANAS_COBERTURA})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcula y muestra un resumen, sin guardar'
+        )
+
+    def handle(self, *args, **options):
+        for opcion in ('reposicion', 'cobertura'):
+            if options[opcion] < 0:
+                raise CommandError(f'❌ --{opcion} no puede ser negativo ({options[opcion]})')
+
+        pronosticos = pronostico.calcular_pronosticos(
+            metodo=options['metodo'],
+            semanas=max(1, options['semanas']),
+            reposicion=options['reposicion'],
+            cobertura=options['cobertura'],
+        )
+
+        if options['dry_run']:
+            for p in pronosticos[:20]:
+                self.stdout.write(
+                    f'📈 Insumo {p.insumo_id}: demanda {p.demanda_semanal}/sem → '
+                    f'mín {p.stock_minimo_sugerido}, máx {p.stock_maximo_sugerido}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'📊 {len(pronosticos)} insumos, {sum(1 for p in pronosticos if p.demanda_semanal)} con consumo (dry-run, sin cambios)'
+            ))
+            return
+
+        guardados = pronostico.guardar_pronosticos(pronosticos)
+        self.stdout.write(self.style.SUCCESS(f'✅ {guardados} pronósticos actualizados'))
@@ -0,0 +1,50 @@
+"""
+Comando para reconstruir los saldos de stock desde el kardex
+Uso: python manage.py recalcular_stock [--lote 1000] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from nexusone.administrativa.inventario.models import Insumo, StockInsumo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de saldos (StockInsumo) a partir de MovimientoKardex, por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Cantidad de insumos por lote (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo reporta las diferencias, sin escribir'
+        )
+
+    def handle(self, *args, **options):
+        lote = max(1, options['lote'])
+        dry_run = options['dry_run']
+
+        ids = list(Insumo.objects.order_by('pk').values_list('pk', flat=True))
+        total_cambios = 0
+
+        for inicio in range(0, len(ids), lote):
+            bloque = ids[inicio:inicio + lote]
+            with transaction.atomic():
+                cambios = StockInsumo.reconstruir(bloque)
+                if dry_run:
+                    transaction.set_rollback(True)
+
+            for insumo_id, anterior, nuevo in cambios:
+                self.stdout.write(f'🔄 Insumo {insumo_id}: {anterior} → {nuevo}')
+            total_cambios += len(cambios)
+            self.stdout.write(f'   Lote {inicio // lote + 1}: {len(bloque)} insumos revisados')
+
+        resumen = f'📊 {len(ids)} insumos revisados, {total_cambios} saldos corregidos'
+        if dry_run:
+            resumen += ' (dry-run, sin cambios)'
+        self.stdout.write(self.style.SUCCESS(resumen))
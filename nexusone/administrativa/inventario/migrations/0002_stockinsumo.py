@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, When
+
+
+def poblar_saldos(apps, schema_editor):
+    """Carga los saldos iniciales agregando el kardex existente"""
+    MovimientoKardex = apps.get_model('inventario', 'MovimientoKardex')
+    StockInsumo = apps.get_model('inventario', 'StockInsumo')
+
+    totales = (
+        MovimientoKardex.objects.values('insumo_id')
+        .annotate(total=Sum(Case(When(tipo='entrada', then=F('cantidad')), default=-F('cantidad'))))
+        .values_list('insumo_id', 'total')
+    )
+    StockInsumo.objects.bulk_create(
+        [StockInsumo(insumo_id=insumo_id, cantidad=total or 0) for insumo_id, total in totales],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockInsumo',
+            fields=[
+                ('insumo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo', serialize=False, to='inventario.insumo')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad en stock')),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Insumo',
+                'verbose_name_plural': 'Saldos de Insumos',
+            },
+        ),
+        migrations.RunPython(poblar_saldos, migrations.RunPython.noop),
+    ]
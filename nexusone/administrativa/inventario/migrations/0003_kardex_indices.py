@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_stockinsumo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientokardex',
+            index=models.Index(fields=['insumo', 'fecha'], name='kardex_insumo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientokardex',
+            index=models.Index(fields=['tipo', 'fecha'], name='kardex_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientokardex',
+            index=models.Index(fields=['-fecha', '-id'], name='kardex_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_kardex_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(help_text='Primer día del mes cerrado', unique=True, verbose_name='Periodo')),
+                ('fecha_corte', models.DateTimeField(db_index=True, verbose_name='Fecha de Corte')),
+                ('vigente', models.BooleanField(default=True, verbose_name='Vigente')),
+                ('total_valor', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Valor Total')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cierre de Inventario',
+                'verbose_name_plural': 'Cierres de Inventario',
+                'ordering': ['-periodo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(verbose_name='Cantidad')),
+                ('costo_unitario', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Costo Unitario')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Valor')),
+                ('cierre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.cierreinventario')),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_cierre', to='inventario.insumo')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cierre',
+                'verbose_name_plural': 'Saldos de Cierre',
+                'unique_together': {('cierre', 'insumo')},
+            },
+        ),
+    ]
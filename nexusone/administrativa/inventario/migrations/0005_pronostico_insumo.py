@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_cierres_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoInsumo',
+            fields=[
+                ('insumo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pronostico', serialize=False, to='inventario.insumo')),
+                ('metodo', models.CharField(choices=[('promedio', 'Promedio móvil'), ('exponencial', 'Suavizado exponencial')], default='promedio', max_length=15, verbose_name='Método')),
+                ('semanas', models.PositiveIntegerField(verbose_name='Semanas de historia')),
+                ('demanda_semanal', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Demanda semanal')),
+                ('desviacion_semanal', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Desviación semanal')),
+                ('stock_seguridad', models.PositiveIntegerField(verbose_name='Stock de seguridad')),
+                ('stock_minimo_sugerido', models.PositiveIntegerField(verbose_name='Stock mínimo sugerido')),
+                ('stock_maximo_sugerido', models.PositiveIntegerField(verbose_name='Stock máximo sugerido')),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Pronóstico de Insumo',
+                'verbose_name_plural': 'Pronósticos de Insumos',
+            },
+        ),
+    ]
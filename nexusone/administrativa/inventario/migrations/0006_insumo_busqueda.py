@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:52
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def poblar_busqueda(apps, schema_editor):
+    """Calcula el texto de búsqueda de los insumos existentes"""
+    Insumo = apps.get_model('inventario', 'Insumo')
+    lote = []
+    for insumo in Insumo.objects.only('pk', 'codigo', 'nombre').iterator(chunk_size=2000):
+        insumo.busqueda = _normalizar(f'{insumo.codigo} {insumo.nombre}')
+        lote.append(insumo)
+        if len(lote) >= 2000:
+            Insumo.objects.bulk_update(lote, ['busqueda'])
+            lote = []
+    if lote:
+        Insumo.objects.bulk_update(lote, ['busqueda'])
+
+
+def crear_indice_trigram(apps, schema_editor):
+    """En PostgreSQL: índice trigram para LIKE '%texto%' (en SQLite basta el índice normal)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS insumo_busqueda_trgm_idx '
+        'ON inventario_insumo USING gin (busqueda gin_trgm_ops)'
+    )
+
+
+def eliminar_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS insumo_busqueda_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_pronostico_insumo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='insumo',
+            name='busqueda',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=130),
+        ),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigram, eliminar_indice_trigram),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:54
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_insumo_busqueda'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimientokardex',
+            name='cantidad',
+            field=models.DecimalField(decimal_places=3, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.001'))]),
+        ),
+        migrations.AlterField(
+            model_name='saldocierre',
+            name='cantidad',
+            field=models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Cantidad'),
+        ),
+        migrations.AlterField(
+            model_name='stockinsumo',
+            name='cantidad',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=14, verbose_name='Cantidad en stock'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0007_cantidades_decimales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoKardex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida')], max_length=10)),
+                ('referencia', models.CharField(blank=True, help_text='Remisión, factura, OT...', max_length=100, verbose_name='Referencia')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('observacion', models.TextField(blank=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+            ],
+            options={
+                'verbose_name': 'Documento de Kardex',
+                'verbose_name_plural': 'Documentos de Kardex',
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movimientokardex',
+            name='documento',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='inventario.documentokardex', verbose_name='Documento'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_documentos_kardex'),
+        ('talento_humano', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimientoherramienta',
+            name='empleado',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos_herramienta', to='talento_humano.empleado', verbose_name='Empleado'),
+        ),
+        migrations.AddField(
+            model_name='movimientoherramienta',
+            name='fecha_devolucion',
+            field=models.DateField(blank=True, null=True, verbose_name='Devolución esperada'),
+        ),
+        migrations.AddField(
+            model_name='movimientoherramienta',
+            name='pendiente',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Pendiente por devolver'),
+        ),
+        migrations.AlterField(
+            model_name='herramienta',
+            name='cantidad',
+            field=models.PositiveIntegerField(default=0, help_text='Unidades adquiridas (las bajas se descuentan en el kardex de herramientas)', verbose_name='Cantidad'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoherramienta',
+            index=models.Index(fields=['herramienta', 'empleado'], name='herr_mov_herr_emp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoherramienta',
+            index=models.Index(condition=models.Q(('pendiente__gt', 0)), fields=['fecha_devolucion'], name='herr_mov_vencimiento_idx'),
+        ),
+    ]
@@ -1,6 +1,61 @@
-from django.db import models
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
+from django.db.models import F, Value, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import date
+from datetime import date, datetime, time
+from decimal import Decimal
+import unicodedata
+
+
+def normalizar_busqueda(texto):
+    """Minúsculas, sin tildes y con espacios simples: 'Tubería  PVC' -> 'tuberia pvc'"""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+# ---------------------------
+# QUERYSET DE INSUMOS
+# ---------------------------
+class InsumoQuerySet(models.QuerySet):
+    def buscar(self, texto):
+        """
+        Búsqueda por código/nombre sin distinguir mayúsculas ni tildes.
+        Cada palabra debe aparecer en `busqueda`; primero los que empiezan por el texto.
+        """
+        termino = normalizar_busqueda(texto)
+        if not termino:
+            return self.none()
+        qs = self
+        for palabra in termino.split():
+            qs = qs.filter(busqueda__contains=palabra)
+        return qs.annotate(
+            es_prefijo=models.Case(
+                models.When(busqueda__startswith=termino, then=Value(0)),
+                default=Value(1),
+                output_field=models.IntegerField(),
+            )
+        ).order_by("es_prefijo", "codigo")
+
+    def con_stock(self):
+        """
+        Anota stock (saldo_stock) y valorización (valor_inventario)
+        leyendo la tabla de saldos en una sola consulta.
+        """
+        return self.select_related("proveedor", "saldo").annotate(
+            saldo_stock=Coalesce(F("saldo__cantidad"), Value(Decimal("0"))),
+        ).annotate(
+            valor_inventario=ExpressionWrapper(
+                F("precio_unitario")
+                * (100 + F("iva"))
+                * (100 - F("descuento_proveedor"))
+                * F("saldo_stock")
+                / Value(Decimal("10000")),
+                output_field=DecimalField(max_digits=20, decimal_places=4),
+            )
+        )
+
 
 # ---------------------------
 # INSUMOS
@@ -30,11 +85,31 @@ class Insumo(models.Model):
     iva = models.DecimalField("IVA (%)", max_digits=5, decimal_places=2, default=19)
     descuento_proveedor = models.DecimalField("Descuento Proveedor (%)", max_digits=5, decimal_places=2, default=0)
 
+    # 🔎 "codigo nombre" normalizado para el autocompletado (ver normalizar_busqueda)
+    busqueda = models.CharField(max_length=130, db_index=True, editable=False, default="")
+
+    objects = InsumoQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.busqueda = self.texto_busqueda(self.codigo, self.nombre)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ({"codigo", "nombre"} & set(update_fields)):
+            kwargs["update_fields"] = set(update_fields) | {"busqueda"}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def texto_busqueda(codigo, nombre):
+        return normalizar_busqueda(f"{codigo} {nombre}")
+
     @property
     def stock_actual(self):
-        entradas = self.movimientos.filter(tipo="entrada").aggregate(models.Sum("cantidad"))["cantidad__sum"] or 0
-        salidas = self.movimientos.filter(tipo="salida").aggregate(models.Sum("cantidad"))["cantidad__sum"] or 0
-        return entradas - salidas
+        """Stock leído de la tabla de saldos (o de la anotación de con_stock)"""
+        if "saldo_stock" in self.__dict__:
+            return self.saldo_stock
+        try:
+            return self.saldo.cantidad
+        except StockInsumo.DoesNotExist:
+            return 0
 
     @property
     def precio_con_iva(self):
@@ -50,6 +125,15 @@ class Insumo(models.Model):
         return f"{self.codigo} - {self.nombre} (Stock: {self.stock_actual})"
 
 
+class StockInsuficiente(ValueError):
+    """No hay saldo suficiente del insumo para registrar la salida"""
+
+    def __init__(self, insumo_id, cantidad):
+        self.insumo_id = insumo_id
+        self.cantidad = cantidad
+        super().__init__(f"Stock insuficiente en inventario (insumo {insumo_id}, se requieren {cantidad})")
+
+
 # ---------------------------
 # MOVIMIENTOS DE KARDEX
 # ---------------------------
@@ -60,13 +144,482 @@ class MovimientoKardex(models.Model):
     ]
     insumo = models.ForeignKey(Insumo, on_delete=models.CASCADE, related_name="movimientos")
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
-    cantidad = models.PositiveIntegerField()
+    cantidad = models.DecimalField(
+        max_digits=12, decimal_places=3, validators=[MinValueValidator(Decimal("0.001"))]
+    )
     fecha = models.DateTimeField(default=timezone.now)
     observacion = models.TextField(blank=True)
+    documento = models.ForeignKey(
+        "DocumentoKardex",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="movimientos",
+        verbose_name="Documento"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["insumo", "fecha"], name="kardex_insumo_fecha_idx"),
+            models.Index(fields=["tipo", "fecha"], name="kardex_tipo_fecha_idx"),
+            models.Index(fields=["-fecha", "-id"], name="kardex_fecha_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.tipo} {self.cantidad} {self.insumo.nombre} ({self.fecha.date()})"
 
+    @property
+    def efecto_stock(self):
+        """Cantidad con signo que este movimiento aporta al saldo"""
+        return self.cantidad if self.tipo == "entrada" else -self.cantidad
+
+    def save(self, *args, **kwargs):
+        """Guarda el movimiento y ajusta los saldos en la misma transacción"""
+        with transaction.atomic():
+            anterior = None
+            if self.pk:
+                anterior = MovimientoKardex.objects.filter(pk=self.pk).values(
+                    "insumo_id", "tipo", "cantidad", "fecha"
+                ).first()
+
+            super().save(*args, **kwargs)
+
+            if anterior:
+                efecto_anterior = anterior["cantidad"] if anterior["tipo"] == "entrada" else -anterior["cantidad"]
+                StockInsumo.ajustar(anterior["insumo_id"], -efecto_anterior)
+                CierreInventario.invalidar_desde(min(anterior["fecha"], self.fecha))
+            else:
+                CierreInventario.invalidar_desde(self.fecha)
+            StockInsumo.ajustar(self.insumo_id, self.efecto_stock)
+
+    @classmethod
+    def registrar_lote(cls, movimientos):
+        """
+        Guarda varios movimientos nuevos (entradas y/o salidas) en una transacción,
+        con un solo bulk_create y un solo ajuste de saldo por insumo.
+
+        Las salidas netas se descuentan con un UPDATE condicional (cantidad >= lo
+        pedido), así dos usuarios no pueden dejar el saldo negativo aunque
+        consulten el stock a la vez. Lanza StockInsuficiente (y revierte todo)
+        si algún insumo no alcanza.
+        """
+        if not movimientos:
+            return []
+
+        netos = {}
+        for movimiento in movimientos:
+            movimiento.cantidad = Decimal(movimiento.cantidad)
+            if movimiento.cantidad <= 0:
+                raise ValueError("La cantidad debe ser mayor que cero")
+            if movimiento.fecha is None:
+                movimiento.fecha = timezone.now()
+            netos[movimiento.insumo_id] = netos.get(movimiento.insumo_id, Decimal("0")) + movimiento.efecto_stock
+
+        with transaction.atomic():
+            # Siempre en el mismo orden para que dos lotes no se bloqueen mutuamente
+            for insumo_id in sorted(netos):
+                delta = netos[insumo_id]
+                if delta < 0 and not StockInsumo.descontar(insumo_id, -delta):
+                    raise StockInsuficiente(insumo_id, -delta)
+                if delta > 0:
+                    StockInsumo.ajustar(insumo_id, delta)
+
+            # bulk_create no pasa por save(): el saldo ya se ajustó arriba
+            movimientos = cls.objects.bulk_create(movimientos, batch_size=1000)
+            CierreInventario.invalidar_desde(min(m.fecha for m in movimientos))
+        return movimientos
+
+    @classmethod
+    def registrar_salidas(cls, lineas, observacion="", fecha=None):
+        """Registra salidas (insumo_id, cantidad) solo si hay stock para todas (ver registrar_lote)"""
+        fecha = fecha or timezone.now()
+        return cls.registrar_lote([
+            cls(insumo_id=insumo_id, tipo="salida", cantidad=cantidad, observacion=observacion, fecha=fecha)
+            for insumo_id, cantidad in lineas
+        ])
+
+    def delete(self, *args, **kwargs):
+        """Elimina el movimiento y revierte su efecto en el saldo"""
+        with transaction.atomic():
+            StockInsumo.ajustar(self.insumo_id, -self.efecto_stock)
+            CierreInventario.invalidar_desde(self.fecha)
+            return super().delete(*args, **kwargs)
+
+
+# ---------------------------
+# DOCUMENTOS DE MOVIMIENTO (varias líneas)
+# ---------------------------
+class DocumentoKardex(models.Model):
+    """
+    Encabezado de un movimiento de varias líneas (ej. una remisión de 80 items).
+    Sus líneas son MovimientoKardex y se registran juntas con `registrar()`.
+    """
+    tipo = models.CharField(max_length=10, choices=MovimientoKardex.TIPO_CHOICES)
+    referencia = models.CharField("Referencia", max_length=100, blank=True,
+                                  help_text="Remisión, factura, OT...")
+    fecha = models.DateTimeField(default=timezone.now)
+    observacion = models.TextField(blank=True)
+    creado_por = models.ForeignKey(
+        "auth.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Creado por"
+    )
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Documento de Kardex"
+        verbose_name_plural = "Documentos de Kardex"
+        ordering = ["-fecha", "-id"]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.referencia or self.pk} ({self.fecha:%Y-%m-%d})"
+
+    def registrar(self, lineas):
+        """
+        Guarda el documento y sus líneas [(insumo_id, cantidad, observacion)] en una
+        transacción: un bulk_create y un ajuste de saldo por insumo (ver
+        MovimientoKardex.registrar_lote). Si una salida no alcanza, no se guarda nada.
+        """
+        try:
+            with transaction.atomic():
+                self.save()
+                MovimientoKardex.registrar_lote([
+                    MovimientoKardex(
+                        documento=self,
+                        insumo_id=insumo_id,
+                        tipo=self.tipo,
+                        cantidad=cantidad,
+                        observacion=observacion or self.observacion,
+                        fecha=self.fecha,
+                    )
+                    for insumo_id, cantidad, observacion in lineas
+                ])
+        except ValueError:
+            self.pk = None  # la transacción se revirtió
+            raise
+        return self
+
+
+# ---------------------------
+# SALDO DE STOCK POR INSUMO
+# ---------------------------
+class StockInsumo(models.Model):
+    """
+    Saldo materializado del kardex por insumo.
+    Lo mantienen MovimientoKardex.save()/delete(); se reconstruye con
+    `python manage.py recalcular_stock`.
+    """
+    insumo = models.OneToOneField(
+        Insumo,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="saldo"
+    )
+    cantidad = models.DecimalField("Cantidad en stock", max_digits=14, decimal_places=3, default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Saldo de Insumo"
+        verbose_name_plural = "Saldos de Insumos"
+
+    def __str__(self):
+        return f"{self.insumo_id}: {self.cantidad}"
+
+    @classmethod
+    def ajustar(cls, insumo_id, delta):
+        """Suma `delta` al saldo del insumo con un UPDATE atómico"""
+        if not delta:
+            return
+        actualizados = cls.objects.filter(insumo_id=insumo_id).update(
+            cantidad=F("cantidad") + delta,
+            actualizado=timezone.now()
+        )
+        if not actualizados:
+            saldo, creado = cls.objects.get_or_create(
+                insumo_id=insumo_id, defaults={"cantidad": delta}
+            )
+            if not creado:
+                cls.objects.filter(insumo_id=insumo_id).update(
+                    cantidad=F("cantidad") + delta,
+                    actualizado=timezone.now()
+                )
+
+    @classmethod
+    def descontar(cls, insumo_id, cantidad):
+        """
+        Resta `cantidad` solo si el saldo alcanza (UPDATE ... WHERE cantidad >= x).
+        Retorna False si no había stock suficiente; no lee el saldo antes de escribir.
+        """
+        return cls.objects.filter(insumo_id=insumo_id, cantidad__gte=cantidad).update(
+            cantidad=F("cantidad") - cantidad,
+            actualizado=timezone.now()
+        ) == 1
+
+    @classmethod
+    def reconstruir(cls, insumo_ids):
+        """
+        Recalcula desde el kardex los saldos de los insumos indicados.
+        Retorna la lista de (insumo_id, saldo_anterior, saldo_nuevo) que cambiaron.
+        """
+        insumo_ids = list(insumo_ids)
+        totales = dict(
+            MovimientoKardex.objects.filter(insumo_id__in=insumo_ids)
+            .values("insumo_id")
+            .annotate(
+                total=models.Sum(
+                    models.Case(
+                        models.When(tipo="entrada", then=F("cantidad")),
+                        default=-F("cantidad"),
+                    )
+                )
+            )
+            .values_list("insumo_id", "total")
+        )
+        actuales = dict(
+            cls.objects.filter(insumo_id__in=insumo_ids).values_list("insumo_id", "cantidad")
+        )
+
+        cambios = []
+        saldos = []
+        ahora = timezone.now()
+        for insumo_id in insumo_ids:
+            nuevo = totales.get(insumo_id) or 0
+            anterior = actuales.get(insumo_id)
+            if (anterior or 0) != nuevo:
+                cambios.append((insumo_id, anterior, nuevo))
+                saldos.append(cls(insumo_id=insumo_id, cantidad=nuevo, actualizado=ahora))
+
+        if saldos:
+            cls.objects.bulk_create(
+                saldos,
+                update_conflicts=True,
+                unique_fields=["insumo"],
+                update_fields=["cantidad", "actualizado"],
+            )
+        return cambios
+
+
+# ---------------------------
+# CIERRES MENSUALES DE INVENTARIO
+# ---------------------------
+class CierreInventario(models.Model):
+    """
+    Foto del inventario (cantidad y valor por insumo) al cierre de un mes.
+    Incluye los movimientos con fecha < fecha_corte (inicio del mes siguiente).
+    Si se edita un movimiento anterior al corte, el cierre queda no vigente
+    y se reconstruye con `reconstruir()` o `python manage.py cerrar_inventario --reconstruir`.
+    """
+    periodo = models.DateField("Periodo", unique=True, help_text="Primer día del mes cerrado")
+    fecha_corte = models.DateTimeField("Fecha de Corte", db_index=True)
+    vigente = models.BooleanField("Vigente", default=True)
+    total_valor = models.DecimalField("Valor Total", max_digits=18, decimal_places=2, default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Cierre de Inventario"
+        verbose_name_plural = "Cierres de Inventario"
+        ordering = ["-periodo"]
+
+    def __str__(self):
+        return f"Cierre {self.periodo:%Y-%m}{'' if self.vigente else ' (por recalcular)'}"
+
+    @staticmethod
+    def corte_de_periodo(periodo):
+        """Inicio (aware) del mes siguiente al periodo"""
+        siguiente = date(periodo.year + periodo.month // 12, periodo.month % 12 + 1, 1)
+        return timezone.make_aware(datetime.combine(siguiente, time.min))
+
+    @classmethod
+    def invalidar_desde(cls, fecha):
+        """Marca como no vigentes los cierres que incluyen movimientos de `fecha`"""
+        cls.objects.filter(fecha_corte__gt=fecha, vigente=True).update(vigente=False)
+
+    @classmethod
+    def base_para(cls, corte):
+        """Cierre vigente más reciente con fecha_corte <= corte (o None)"""
+        return cls.objects.filter(vigente=True, fecha_corte__lte=corte).order_by("-fecha_corte").first()
+
+    @staticmethod
+    def movimiento_neto(corte, desde=None):
+        """Entradas - salidas por insumo con fecha en [desde, corte) (una consulta agrupada)"""
+        movimientos = MovimientoKardex.objects.filter(fecha__lt=corte)
+        if desde:
+            movimientos = movimientos.filter(fecha__gte=desde)
+        return {
+            insumo_id: total or 0
+            for insumo_id, total in movimientos.values("insumo_id").annotate(
+                total=models.Sum(
+                    models.Case(
+                        models.When(tipo="entrada", then=F("cantidad")),
+                        default=-F("cantidad"),
+                    )
+                )
+            ).values_list("insumo_id", "total")
+        }
+
+    @classmethod
+    def cantidades_al(cls, corte, base=None):
+        """
+        Cantidad por insumo a la fecha `corte` (exclusiva): parte de las
+        cantidades del cierre `base` y solo repite los movimientos posteriores.
+        """
+        cantidades = dict(base.saldos.values_list("insumo_id", "cantidad")) if base else {}
+        for insumo_id, neto in cls.movimiento_neto(corte, base.fecha_corte if base else None).items():
+            cantidades[insumo_id] = cantidades.get(insumo_id, 0) + neto
+        return cantidades
+
+    @classmethod
+    def valorizar_al(cls, corte):
+        """
+        Stock y valor por insumo a la fecha `corte` (exclusiva).
+
+        Parte del cierre vigente más cercano con su cantidad, costo y valor guardados,
+        así el resultado en la fecha de un cierre coincide con su total aunque luego
+        cambien los precios. Solo se valorizan los movimientos posteriores al cierre:
+        las entradas netas al precio actual del insumo y las salidas netas al costo
+        del cierre (o al precio actual si el insumo no estaba en el cierre).
+
+        Returns:
+            (base, filas, total): filas ordenadas por código con insumo, cantidad, costo_unitario, valor
+        """
+        base = cls.base_para(corte)
+        saldos = {}
+        if base:
+            saldos = {
+                insumo_id: (cantidad, costo, valor)
+                for insumo_id, cantidad, costo, valor in base.saldos.values_list(
+                    "insumo_id", "cantidad", "costo_unitario", "valor"
+                )
+            }
+        netos = cls.movimiento_neto(corte, base.fecha_corte if base else None)
+
+        filas = []
+        total = Decimal("0")
+        # Un recorrido del catálogo (sin pk__in con miles de parámetros)
+        for insumo in Insumo.objects.order_by("codigo").only(
+            "codigo", "nombre", "precio_unitario", "iva", "descuento_proveedor"
+        ):
+            cantidad_base, costo_base, valor = saldos.get(insumo.pk, (Decimal("0"), None, Decimal("0")))
+            neto = netos.get(insumo.pk, 0)
+            cantidad = cantidad_base + neto
+            if not cantidad:
+                continue
+            if neto:
+                precio = insumo.precio_unitario * (1 + insumo.iva / 100) * (1 - insumo.descuento_proveedor / 100)
+                costo_movimiento = precio if neto > 0 or costo_base is None else costo_base
+                valor = (valor + costo_movimiento * neto).quantize(Decimal("0.01"))
+            total += valor
+            filas.append({
+                "insumo": insumo,
+                "cantidad": cantidad,
+                "costo_unitario": (valor / cantidad).quantize(Decimal("0.0001")),
+                "valor": valor,
+            })
+        return base, filas, total
+
+    @classmethod
+    def cerrar(cls, periodo):
+        """Crea o recalcula el cierre del mes `periodo` (cualquier fecha del mes)"""
+        periodo = periodo.replace(day=1)
+        corte = cls.corte_de_periodo(periodo)
+
+        with transaction.atomic():
+            cierre, _ = cls.objects.select_for_update().get_or_create(
+                periodo=periodo, defaults={"fecha_corte": corte}
+            )
+            base = cls.objects.filter(
+                vigente=True, fecha_corte__lt=corte
+            ).order_by("-fecha_corte").first()
+            cantidades = cls.cantidades_al(corte, base)
+
+            # Un recorrido del catálogo (sin pk__in con miles de parámetros)
+            precios = {
+                insumo.pk: insumo.precio_unitario * (1 + insumo.iva / 100) * (1 - insumo.descuento_proveedor / 100)
+                for insumo in Insumo.objects.only("precio_unitario", "iva", "descuento_proveedor")
+                if cantidades.get(insumo.pk)
+            }
+            saldos = [
+                SaldoCierre(
+                    cierre=cierre,
+                    insumo_id=insumo_id,
+                    cantidad=cantidad,
+                    costo_unitario=precios[insumo_id],
+                    valor=(precios[insumo_id] * cantidad).quantize(Decimal("0.01")),
+                )
+                for insumo_id, cantidad in cantidades.items()
+                if cantidad and insumo_id in precios
+            ]
+
+            cierre.saldos.all().delete()
+            SaldoCierre.objects.bulk_create(saldos, batch_size=1000)
+            cierre.fecha_corte = corte
+            cierre.vigente = True
+            cierre.total_valor = sum((saldo.valor for saldo in saldos), Decimal("0"))
+            cierre.save()
+        return cierre
+
+    @classmethod
+    def reconstruir(cls):
+        """Recalcula en orden cronológico todos los cierres no vigentes"""
+        periodos = list(cls.objects.filter(vigente=False).order_by("periodo").values_list("periodo", flat=True))
+        return [cls.cerrar(periodo) for periodo in periodos]
+
+
+class SaldoCierre(models.Model):
+    cierre = models.ForeignKey(CierreInventario, on_delete=models.CASCADE, related_name="saldos")
+    insumo = models.ForeignKey(Insumo, on_delete=models.CASCADE, related_name="saldos_cierre")
+    cantidad = models.DecimalField("Cantidad", max_digits=14, decimal_places=3)
+    costo_unitario = models.DecimalField("Costo Unitario", max_digits=14, decimal_places=4)
+    valor = models.DecimalField("Valor", max_digits=18, decimal_places=2)
+
+    class Meta:
+        verbose_name = "Saldo de Cierre"
+        verbose_name_plural = "Saldos de Cierre"
+        unique_together = ["cierre", "insumo"]
+
+    def __str__(self):
+        return f"{self.cierre} - {self.insumo_id}: {self.cantidad}"
+
+
+# ---------------------------
+# PRONÓSTICO DE CONSUMO
+# ---------------------------
+class PronosticoInsumo(models.Model):
+    """
+    Demanda semanal estimada y mínimo/máximo sugeridos por insumo.
+    Los calcula `python manage.py pronosticar_consumo` a partir de las salidas del kardex;
+    no modifica stock_minimo/stock_maximo del insumo.
+    """
+    METODOS = [
+        ("promedio", "Promedio móvil"),
+        ("exponencial", "Suavizado exponencial"),
+    ]
+
+    insumo = models.OneToOneField(
+        Insumo,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="pronostico"
+    )
+    metodo = models.CharField("Método", max_length=15, choices=METODOS, default="promedio")
+    semanas = models.PositiveIntegerField("Semanas de historia")
+    demanda_semanal = models.DecimalField("Demanda semanal", max_digits=14, decimal_places=2)
+    desviacion_semanal = models.DecimalField("Desviación semanal", max_digits=14, decimal_places=2)
+    stock_seguridad = models.PositiveIntegerField("Stock de seguridad")
+    stock_minimo_sugerido = models.PositiveIntegerField("Stock mínimo sugerido")
+    stock_maximo_sugerido = models.PositiveIntegerField("Stock máximo sugerido")
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Pronóstico de Insumo"
+        verbose_name_plural = "Pronósticos de Insumos"
+
+    def __str__(self):
+        return f"{self.insumo_id}: {self.stock_minimo_sugerido}-{self.stock_maximo_sugerido}"
+
 
 # ---------------------------
 # HERRAMIENTAS
@@ -74,15 +627,57 @@ class MovimientoKardex(models.Model):
 class Herramienta(models.Model):
     nombre = models.CharField("Nombre", max_length=100)
     descripcion = models.TextField("Descripción", blank=True)
-    cantidad = models.PositiveIntegerField("Cantidad", default=0)
+    cantidad = models.PositiveIntegerField("Cantidad", default=0, help_text="Unidades adquiridas (las bajas se descuentan en el kardex de herramientas)")
     responsable = models.CharField("Responsable", max_length=100, blank=True)
     creado = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.nombre
 
+    @classmethod
+    def con_existencias(cls, herramientas=None):
+        """
+        Herramientas con disponibilidad y tenencias derivadas de MovimientoHerramienta.
+        Una sola agregación agrupada (herramienta, empleado) para todo el pañol; a
+        cada herramienta le agrega `bajas`, `en_uso`, `disponible` y `tenencias`
+        [(empleado, cantidad)].
+        """
+        herramientas = list(herramientas if herramientas is not None else cls.objects.order_by("nombre"))
+        for herramienta in herramientas:
+            herramienta.bajas = herramienta.en_uso = 0
+            herramienta.tenencias = []
+        por_id = {h.pk: h for h in herramientas}
+
+        grupos = (
+            MovimientoHerramienta.objects.filter(herramienta_id__in=por_id)
+            .values("herramienta_id", "empleado_id")
+            .annotate(**MovimientoHerramienta.saldos())
+        )
+        empleados = {}
+        for grupo in grupos:
+            herramienta = por_id[grupo["herramienta_id"]]
+            herramienta.bajas += grupo["bajas"] or 0
+            if grupo["empleado_id"] and grupo["tenencia"]:
+                herramienta.en_uso += grupo["tenencia"]
+                herramienta.tenencias.append((grupo["empleado_id"], grupo["tenencia"]))
+                empleados[grupo["empleado_id"]] = None
+
+        if empleados:
+            from nexusone.talento_humano.models import Empleado
+            empleados = Empleado.objects.in_bulk(list(empleados))
+        for herramienta in herramientas:
+            herramienta.disponible = herramienta.cantidad - herramienta.bajas - herramienta.en_uso
+            herramienta.tenencias = [(empleados[e], c) for e, c in herramienta.tenencias]
+        return herramientas
+
 
 class MovimientoHerramienta(models.Model):
+    """
+    Kardex de herramientas: las asignaciones y devoluciones mueven unidades entre
+    el pañol y un empleado; las bajas las retiran (de quien las tenía, si se indica).
+    `pendiente` guarda, en cada asignación, lo que aún no se ha devuelto (FIFO),
+    para que el reporte de devoluciones vencidas no recorra todo el historial.
+    """
     TIPO_CHOICES = [
         ("asignacion", "Asignación"),
         ("devolucion", "Devolución"),
@@ -94,9 +689,125 @@ class MovimientoHerramienta(models.Model):
     descripcion = models.TextField("Descripción", blank=True)
     fecha = models.DateField("Fecha", default=timezone.now)
 
+    # 🆕 Quién recibe / devuelve la herramienta
+    empleado = models.ForeignKey(
+        "talento_humano.Empleado",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="movimientos_herramienta",
+        verbose_name="Empleado"
+    )
+    fecha_devolucion = models.DateField("Devolución esperada", null=True, blank=True)
+    pendiente = models.PositiveIntegerField("Pendiente por devolver", default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["herramienta", "empleado"], name="herr_mov_herr_emp_idx"),
+            models.Index(
+                fields=["fecha_devolucion"],
+                name="herr_mov_vencimiento_idx",
+                condition=models.Q(pendiente__gt=0),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.tipo.upper()} - {self.herramienta.nombre} ({self.cantidad})"
 
+    @staticmethod
+    def saldos():
+        """Agregados para .values(...).annotate(**saldos()): tenencia y bajas"""
+        return {
+            "tenencia": models.Sum(
+                models.Case(
+                    models.When(tipo="asignacion", then=F("cantidad")),
+                    default=-F("cantidad"),
+                ),
+                filter=models.Q(empleado__isnull=False),
+            ),
+            "bajas": models.Sum("cantidad", filter=models.Q(tipo="baja")),
+        }
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+
+        if self.tipo in ("asignacion", "devolucion") and not self.empleado_id:
+            raise ValidationError({"empleado": "Indique el empleado que recibe o devuelve la herramienta"})
+        if self.tipo != "asignacion":
+            self.fecha_devolucion = None
+        if self.herramienta_id and self.cantidad:
+            # save() vuelve a validar con la herramienta bloqueada
+            try:
+                self._validar_saldo()
+            except ValueError as e:
+                raise ValidationError(str(e))
+
+    def save(self, *args, **kwargs):
+        """Valida contra el saldo actual (con la herramienta bloqueada) y recalcula pendientes"""
+        with transaction.atomic():
+            Herramienta.objects.select_for_update().filter(pk=self.herramienta_id).first()
+            anterior = None
+            if self.pk:
+                anterior = MovimientoHerramienta.objects.filter(pk=self.pk).values(
+                    "herramienta_id", "empleado_id"
+                ).first()
+            self._validar_saldo()
+            super().save(*args, **kwargs)
+
+            self._recalcular_pendientes(self.herramienta_id, self.empleado_id)
+            if anterior and (anterior["herramienta_id"], anterior["empleado_id"]) != (self.herramienta_id, self.empleado_id):
+                self._recalcular_pendientes(anterior["herramienta_id"], anterior["empleado_id"])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            self._recalcular_pendientes(self.herramienta_id, self.empleado_id)
+            return resultado
+
+    def _validar_saldo(self):
+        """Asignar o dar de baja del pañol no puede superar lo disponible; devolver, lo que tiene el empleado"""
+        otros = MovimientoHerramienta.objects.filter(herramienta_id=self.herramienta_id).exclude(pk=self.pk)
+        if self.tipo == "asignacion" or (self.tipo == "baja" and not self.empleado_id):
+            totales = otros.aggregate(**self.saldos())
+            cantidad = Herramienta.objects.filter(pk=self.herramienta_id).values_list("cantidad", flat=True).first() or 0
+            disponible = cantidad - (totales["bajas"] or 0) - (totales["tenencia"] or 0)
+            if self.cantidad > disponible:
+                raise ValueError(f"Solo hay {disponible} unidad(es) disponibles de la herramienta")
+        else:
+            tenencia = otros.filter(empleado_id=self.empleado_id).aggregate(**self.saldos())["tenencia"] or 0
+            if self.cantidad > tenencia:
+                raise ValueError(f"El empleado solo tiene {tenencia} unidad(es) de la herramienta")
+
+    @classmethod
+    def _recalcular_pendientes(cls, herramienta_id, empleado_id):
+        """Reparte devoluciones y bajas del empleado sobre sus asignaciones más antiguas (FIFO)"""
+        if not empleado_id:
+            return
+        movimientos = cls.objects.filter(
+            herramienta_id=herramienta_id, empleado_id=empleado_id
+        ).order_by("fecha", "id").values_list("id", "tipo", "cantidad", "pendiente")
+
+        abiertas = []  # [id, pendiente] en orden de asignación
+        actuales = {}
+        for pk, tipo, cantidad, pendiente in movimientos:
+            actuales[pk] = pendiente
+            if tipo == "asignacion":
+                abiertas.append([pk, cantidad])
+                continue
+            resto = cantidad
+            for abierta in abiertas:
+                if not resto:
+                    break
+                tomar = min(resto, abierta[1])
+                abierta[1] -= tomar
+                resto -= tomar
+
+        nuevos = {pk: 0 for pk in actuales}
+        nuevos.update({pk: pendiente for pk, pendiente in abiertas})
+        cambios = [cls(pk=pk, pendiente=p) for pk, p in nuevos.items() if actuales[pk] != p]
+        if cambios:
+            cls.objects.bulk_update(cambios, ["pendiente"])
+
 
 # ---------------------------
 # MAQUINARIA
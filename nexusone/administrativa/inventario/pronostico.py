@@ -0,0 +1,122 @@
+# nexusone/administrativa/inventario/pronostico.py
+"""
+Pronóstico de consumo de insumos a partir del kardex.
+Lo usa el comando `pronosticar_consumo`.
+
+- Lee todas las salidas del periodo en una sola consulta
+- Las agrupa por insumo y semana en una matriz NumPy (insumos x semanas)
+- Calcula la demanda (promedio móvil o suavizado exponencial), la desviación
+  y el stock de seguridad para todo el catálogo a la vez
+- Guarda el mínimo/máximo sugerido en PronosticoInsumo
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Insumo, MovimientoKardex, PronosticoInsumo
+
+SEMANAS_HISTORIA = 26
+VENTANA_PROMEDIO = 8
+ALFA = 0.3
+SEMANAS_REPOSICION = 2   # tiempo de entrega del proveedor
+SEMANAS_COBERTURA = 4    # lo que cubre un pedido hasta stock máximo
+NIVEL_SERVICIO_Z = 1.65  # ~95 %
+
+
+def matriz_semanal(semanas=SEMANAS_HISTORIA, hasta=None):
+    """
+    Salidas por insumo y semana.
+    Retorna (insumo_ids, matriz) con matriz[i, s] = salidas del insumo i en la
+    semana s (la última columna es la semana que termina en `hasta`).
+    """
+    hasta = hasta or timezone.now()
+    desde = hasta - timedelta(weeks=semanas)
+
+    filas = list(
+        MovimientoKardex.objects.filter(tipo="salida", fecha__gte=desde, fecha__lt=hasta)
+        .values_list("insumo_id", "fecha", "cantidad")
+    )
+    if not filas:
+        return np.array([], dtype=np.int64), np.zeros((0, semanas))
+
+    ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+    segundos = np.fromiter(((f[1] - desde).total_seconds() for f in filas), dtype=np.float64, count=len(filas))
+    cantidades = np.fromiter((f[2] for f in filas), dtype=np.float64, count=len(filas))
+
+    semana = np.minimum((segundos // (7 * 24 * 3600)).astype(np.int64), semanas - 1)
+    insumo_ids, fila = np.unique(ids, return_inverse=True)
+
+    matriz = np.bincount(
+        fila * semanas + semana, weights=cantidades, minlength=len(insumo_ids) * semanas
+    ).reshape(len(insumo_ids), semanas)
+    return insumo_ids, matriz
+
+
+def demanda_promedio(matriz, ventana=VENTANA_PROMEDIO):
+    """Promedio móvil de las últimas `ventana` semanas"""
+    return matriz[:, -ventana:].mean(axis=1)
+
+
+def demanda_exponencial(matriz, alfa=ALFA):
+    """Suavizado exponencial simple; recorre semanas, no insumos"""
+    nivel = matriz[:, 0].copy()
+    for s in range(1, matriz.shape[1]):
+        nivel = alfa * matriz[:, s] + (1 - alfa) * nivel
+    return nivel
+
+
+def calcular_pronosticos(metodo="promedio", semanas=SEMANAS_HISTORIA, reposicion=SEMANAS_REPOSICION,
+                         cobertura=SEMANAS_COBERTURA, z=NIVEL_SERVICIO_Z, hasta=None):
+    """
+    Calcula (sin guardar) los PronosticoInsumo de todo el catálogo; los insumos
+    sin salidas en el periodo quedan con demanda y sugerencias en cero.
+
+    mínimo = demanda * reposición + stock de seguridad
+    máximo = mínimo + demanda * cobertura
+    stock de seguridad = z * desviación semanal * sqrt(reposición)
+    """
+    if reposicion < 0 or cobertura < 0:
+        raise ValueError("reposición y cobertura no pueden ser negativas")
+
+    con_salidas, salidas = matriz_semanal(semanas, hasta)
+    insumo_ids = np.fromiter(Insumo.objects.order_by("pk").values_list("pk", flat=True), dtype=np.int64)
+    if not len(insumo_ids):
+        return []
+    # Filas en cero para los insumos sin consumo (ambos arreglos van ordenados por id)
+    matriz = np.zeros((len(insumo_ids), semanas))
+    posicion = np.searchsorted(insumo_ids, con_salidas)
+    existe = (posicion < len(insumo_ids)) & (insumo_ids[np.minimum(posicion, len(insumo_ids) - 1)] == con_salidas)
+    matriz[posicion[existe]] = salidas[existe]
+
+    demanda = demanda_exponencial(matriz) if metodo == "exponencial" else demanda_promedio(matriz)
+    desviacion = matriz.std(axis=1, ddof=1) if semanas > 1 else np.zeros(len(insumo_ids))
+    seguridad = np.ceil(z * desviacion * np.sqrt(reposicion))
+    minimo = np.ceil(demanda * reposicion + seguridad)
+    maximo = np.ceil(minimo + demanda * cobertura)
+
+    return [
+        PronosticoInsumo(
+            insumo_id=int(insumo_id),
+            metodo=metodo,
+            semanas=semanas,
+            demanda_semanal=Decimal(str(round(float(d), 2))),
+            desviacion_semanal=Decimal(str(round(float(sd), 2))),
+            stock_seguridad=int(ss),
+            stock_minimo_sugerido=int(mn),
+            stock_maximo_sugerido=int(mx),
+        )
+        for insumo_id, d, sd, ss, mn, mx in zip(
+            insumo_ids.tolist(), demanda, desviacion, seguridad, minimo, maximo
+        )
+    ]
+
+
+def guardar_pronosticos(pronosticos):
+    """Reemplaza todos los pronósticos guardados por los nuevos"""
+    with transaction.atomic():
+        PronosticoInsumo.objects.all().delete()
+        PronosticoInsumo.objects.bulk_create(pronosticos, batch_size=1000)
+    return len(pronosticos)
@@ -0,0 +1,49 @@
+# nexusone/administrativa/inventario/tests.py
+import threading
+from decimal import Decimal
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from .models import Insumo, MovimientoKardex, StockInsumo, StockInsuficiente
+
+
+class SalidasConcurrentesTest(TransactionTestCase):
+    """MovimientoKardex.registrar_salidas desde varios hilos (cada uno con su conexión)"""
+
+    HILOS = 8
+    SALIDAS_POR_HILO = 25
+    CANTIDAD = Decimal("0.5")
+    STOCK_INICIAL = Decimal("60")  # alcanza para 120 de las 200 salidas
+
+    def test_saldo_nunca_negativo_y_coincide_con_el_kardex(self):
+        insumo = Insumo.objects.create(codigo="CONC-1", nombre="Insumo concurrencia", unidad="UND")
+        MovimientoKardex.objects.create(insumo=insumo, tipo="entrada", cantidad=self.STOCK_INICIAL)
+        exitos, rechazos, errores = [], [], []
+
+        def trabajar():
+            try:
+                for _ in range(self.SALIDAS_POR_HILO):
+                    try:
+                        MovimientoKardex.registrar_salidas([(insumo.pk, self.CANTIDAD)], observacion="test")
+                        exitos.append(1)
+                    except StockInsuficiente:
+                        rechazos.append(1)
+                    except OperationalError as error:  # SQLite: base bloqueada
+                        errores.append(str(error))
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        saldo = StockInsumo.objects.get(insumo=insumo).cantidad
+        salidas = MovimientoKardex.objects.filter(insumo=insumo, tipo="salida")
+        self.assertGreaterEqual(saldo, 0)
+        self.assertEqual(salidas.count(), len(exitos))
+        self.assertEqual(saldo, self.STOCK_INICIAL - len(exitos) * self.CANTIDAD)
+        self.assertLessEqual(len(exitos) * self.CANTIDAD, self.STOCK_INICIAL)
+        self.assertEqual(len(exitos) + len(rechazos) + len(errores), self.HILOS * self.SALIDAS_POR_HILO)
@@ -11,6 +11,7 @@ urlpatterns = [
     path("insumos/nuevo/", views.nuevo_insumo, name="nuevo_insumo"),
     path("insumos/editar/<int:pk>/", views.editar_insumo, name="editar_insumo"),
     path("insumos/eliminar/<int:pk>/", views.eliminar_insumo, name="eliminar_insumo"),
+    path("insumos/buscar/", views.buscar_insumos, name="buscar_insumos"),
     path('importar-excel/', views.importar_excel, name='importar_excel'),
     path('exportar-excel/', views.exportar_excel, name='exportar_excel'),
 
@@ -25,10 +26,17 @@ urlpatterns = [
     path("herramientas/nueva/", views.nueva_herramienta, name="nueva_herramienta"),
     path("herramientas/<int:pk>/editar/", views.editar_herramienta, name="editar_herramienta"),
     path("herramientas/<int:pk>/eliminar/", views.eliminar_herramienta, name="eliminar_herramienta"),
+    path("herramientas/movimiento/", views.movimiento_herramienta, name="movimiento_herramienta"),
+    path("herramientas/vencidas/", views.herramientas_vencidas, name="herramientas_vencidas"),
 
     # ---- Kardex ----
     path("kardex/", views.listar_kardex, name="listar_kardex"),
     path("kardex/nuevo/", views.registrar_movimiento_kardex, name="nuevo_movimiento"),
+    path("kardex/documento/nuevo/", views.nuevo_documento_kardex, name="nuevo_documento_kardex"),
+    path("kardex/documento/<int:pk>/", views.detalle_documento_kardex, name="detalle_documento_kardex"),
     path("kardex/editar/<int:pk>/", views.editar_movimiento, name="editar_movimiento"),
     path("kardex/eliminar/<int:pk>/", views.eliminar_movimiento, name="eliminar_movimiento"),
+
+    # ---- Reportes ----
+    path("valorizacion/", views.valorizacion_inventario, name="valorizacion_inventario"),
 ]
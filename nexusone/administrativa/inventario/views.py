@@ -8,17 +8,29 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.contrib import messages
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.core.cache import cache
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
 from decimal import Decimal
+import hashlib
+from urllib.parse import urlencode
 
 # Para Excel
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Modelos y formularios
-from .models import Insumo, Maquinaria, Herramienta, MovimientoKardex
-from .forms import InsumoForm, MaquinariaForm, HerramientaForm, MovimientoKardexForm
+from .models import (
+    Insumo, Maquinaria, Herramienta, MovimientoHerramienta, MovimientoKardex, StockInsumo, CierreInventario,
+    DocumentoKardex, StockInsuficiente, normalizar_busqueda,
+)
+from .forms import (
+    InsumoForm, MaquinariaForm, HerramientaForm, MovimientoHerramientaForm, MovimientoKardexForm,
+    DocumentoKardexForm, LineaDocumentoFormSet, FiltroKardexForm,
+)
+from .importacion import importar_insumos, HOJA_POR_DEFECTO
 
 
 # ============================================
@@ -33,7 +45,7 @@ def index_inventario(request):
 # INSUMOS
 # ============================================
 def lista_insumo(request):
-    insumos = Insumo.objects.all()
+    insumos = Insumo.objects.con_stock().select_related("pronostico")
     total_inventario = sum(insumo.precio_total for insumo in insumos)
     return render(
         request,
@@ -41,6 +53,36 @@ def lista_insumo(request):
         {"insumos": insumos, "total_inventario": total_inventario}
     )
 
+BUSQUEDA_LIMITE = 20
+BUSQUEDA_CACHE_SEGUNDOS = 30
+
+
+def buscar_insumos(request):
+    """Autocompletado de insumos (JSON) por código o nombre, sin tildes ni mayúsculas."""
+    termino = normalizar_busqueda(request.GET.get("q", ""))
+    if len(termino) < 2:
+        return JsonResponse({"results": []})
+
+    clave = "inventario:buscar_insumos:" + hashlib.md5(termino.encode()).hexdigest()
+    resultados = cache.get(clave)
+    if resultados is None:
+        insumos = Insumo.objects.buscar(termino).values(
+            "pk", "codigo", "nombre", "unidad", stock=Coalesce(F("saldo__cantidad"), Value(Decimal("0")))
+        )[:BUSQUEDA_LIMITE]
+        resultados = [
+            {
+                "id": insumo["pk"],
+                "text": f'{insumo["codigo"]} - {insumo["nombre"]} (Stock: {insumo["stock"].normalize():f})',
+                "codigo": insumo["codigo"],
+                "nombre": insumo["nombre"],
+                "unidad": insumo["unidad"],
+                "stock": float(insumo["stock"]),
+            }
+            for insumo in insumos
+        ]
+        cache.set(clave, resultados, BUSQUEDA_CACHE_SEGUNDOS)
+    return JsonResponse({"results": resultados})
+
 def nuevo_insumo(request):
     if request.method == "POST":
         form = InsumoForm(request.POST)
@@ -116,9 +158,44 @@ def eliminar_maquinaria(request, pk):
 # HERRAMIENTAS
 # ============================================
 def lista_herramientas(request):
-    herramientas = Herramienta.objects.all()
+    herramientas = Herramienta.con_existencias()
     return render(request, "administrativa/inventario/herramientas/listar_herramientas.html", {"herramientas": herramientas})
 
+def movimiento_herramienta(request):
+    """Asignar, recibir o dar de baja herramientas (kardex de herramientas)."""
+    if request.method == "POST":
+        form = MovimientoHerramientaForm(request.POST)
+        if form.is_valid():
+            try:
+                form.save()
+            except ValueError as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, "✅ Movimiento de herramienta registrado")
+                return redirect("administrativa:inventario:lista_herramientas")
+    else:
+        form = MovimientoHerramientaForm(initial={
+            "herramienta": request.GET.get("herramienta"),
+            "tipo": request.GET.get("tipo", "asignacion"),
+            "fecha": timezone.localdate(),
+        })
+    return render(request, "administrativa/inventario/herramientas/movimiento_herramienta.html", {"form": form})
+
+def herramientas_vencidas(request):
+    """Asignaciones con unidades sin devolver y fecha de devolución vencida."""
+    hoy = timezone.localdate()
+    vencidas = (
+        MovimientoHerramienta.objects.filter(pendiente__gt=0, fecha_devolucion__lt=hoy)
+        .select_related("herramienta", "empleado")
+        .order_by("fecha_devolucion", "id")
+    )
+    for asignacion in vencidas:
+        asignacion.dias_vencida = (hoy - asignacion.fecha_devolucion).days
+    return render(request, "administrativa/inventario/herramientas/vencidas.html", {
+        "vencidas": vencidas,
+        "hoy": hoy,
+    })
+
 def nueva_herramienta(request):
     if request.method == "POST":
         form = HerramientaForm(request.POST)
@@ -151,10 +228,156 @@ def eliminar_herramienta(request, pk):
 # ============================================
 # KARDEX
 # ============================================
+KARDEX_POR_PAGINA = 50
+
+
+def _inicio_del_dia(valor):
+    """Convierte 'YYYY-MM-DD' en datetime aware al inicio del día (o None)"""
+    try:
+        fecha = datetime.strptime(valor, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    return timezone.make_aware(fecha)
+
+
+def _leer_cursor(valor):
+    """Decodifica el cursor 'fechaISO_id' de la paginación por llave"""
+    try:
+        marca, pk = valor.rsplit("_", 1)
+        return datetime.fromisoformat(marca), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _saldos_despues(movimientos):
+    """
+    Saldo del insumo justo después de cada movimiento de la página.
+
+    Parte del saldo materializado (StockInsumo) y descuenta el efecto de los
+    movimientos posteriores en dos consultas, sin traer filas ajenas a la página:
+    - una suma agrupada por insumo de lo posterior al movimiento más reciente
+      de ese insumo en la página (una fila por insumo, índice insumo + fecha)
+    - los movimientos de cada insumo entre su primera y su última fila de la
+      página (sin filtros son justo las filas de la página), acumulados en Python
+    Lo transferido depende del tamaño de la página, no de la tabla; la suma
+    la resuelve la base de datos por índice.
+    """
+    if not movimientos:
+        return {}
+
+    efecto = Case(
+        When(tipo="entrada", then=F("cantidad")),
+        default=-F("cantidad"),
+    )
+    # (fecha, id) más reciente y más antiguo de cada insumo en la página
+    extremos = {}
+    for m in movimientos:
+        llave = (m.fecha, m.id)
+        reciente, antiguo = extremos.get(m.insumo_id, (llave, llave))
+        extremos[m.insumo_id] = (max(reciente, llave), min(antiguo, llave))
+
+    despues_de_pagina = Q()
+    dentro_de_pagina = Q()
+    for insumo_id, ((fecha_max, id_max), (fecha_min, id_min)) in extremos.items():
+        despues_de_pagina |= Q(insumo_id=insumo_id) & (
+            Q(fecha__gt=fecha_max) | Q(fecha=fecha_max, id__gt=id_max)
+        )
+        dentro_de_pagina |= (
+            Q(insumo_id=insumo_id)
+            & (Q(fecha__lt=fecha_max) | Q(fecha=fecha_max, id__lte=id_max))
+            & (Q(fecha__gt=fecha_min) | Q(fecha=fecha_min, id__gte=id_min))
+        )
+
+    posteriores = dict(
+        MovimientoKardex.objects.filter(despues_de_pagina)
+        .values("insumo_id")
+        .annotate(total=Sum(efecto))
+        .order_by()
+        .values_list("insumo_id", "total")
+    )
+    saldos = dict(
+        StockInsumo.objects.filter(insumo_id__in=extremos).values_list("insumo_id", "cantidad")
+    )
+    corriendo = {
+        insumo_id: saldos.get(insumo_id, 0) - (posteriores.get(insumo_id) or 0)
+        for insumo_id in extremos
+    }
+
+    resultado = {}
+    tramo = (
+        MovimientoKardex.objects.filter(dentro_de_pagina)
+        .annotate(efecto=efecto)
+        .order_by("-fecha", "-id")
+        .values_list("id", "insumo_id", "efecto")
+    )
+    for pk, insumo_id, efecto_mov in tramo:
+        resultado[pk] = corriendo[insumo_id]
+        corriendo[insumo_id] -= efecto_mov
+    return {m.id: resultado[m.id] for m in movimientos}
+
+
 def listar_kardex(request):
-    """Listar todos los movimientos del Kardex."""
-    movimientos = MovimientoKardex.objects.all().order_by('-fecha')
-    return render(request, "administrativa/inventario/kardex/listar_kardex.html", {"movimientos": movimientos})
+    """Kardex paginado por llave (fecha, id) con filtros y saldo por movimiento."""
+    insumo_id = request.GET.get("insumo", "")
+    tipo = request.GET.get("tipo", "")
+    fecha_inicio = request.GET.get("fecha_inicio", "")
+    fecha_fin = request.GET.get("fecha_fin", "")
+
+    movimientos = MovimientoKardex.objects.select_related("insumo")
+
+    if insumo_id.isdigit():
+        movimientos = movimientos.filter(insumo_id=insumo_id)
+    if tipo in dict(MovimientoKardex.TIPO_CHOICES):
+        movimientos = movimientos.filter(tipo=tipo)
+    desde = _inicio_del_dia(fecha_inicio)
+    if desde:
+        movimientos = movimientos.filter(fecha__gte=desde)
+    hasta = _inicio_del_dia(fecha_fin)
+    if hasta:
+        movimientos = movimientos.filter(fecha__lt=hasta + timedelta(days=1))
+
+    cursor = _leer_cursor(request.GET.get("cursor"))
+    if cursor:
+        fecha_cursor, id_cursor = cursor
+        movimientos = movimientos.filter(
+            Q(fecha__lt=fecha_cursor) | Q(fecha=fecha_cursor, id__lt=id_cursor)
+        )
+
+    pagina = list(movimientos.order_by("-fecha", "-id")[:KARDEX_POR_PAGINA + 1])
+    hay_siguiente = len(pagina) > KARDEX_POR_PAGINA
+    pagina = pagina[:KARDEX_POR_PAGINA]
+
+    saldos = _saldos_despues(pagina)
+    for movimiento in pagina:
+        movimiento.saldo_despues = saldos[movimiento.id]
+
+    filtros = {
+        clave: valor
+        for clave, valor in (
+            ("insumo", insumo_id),
+            ("tipo", tipo),
+            ("fecha_inicio", fecha_inicio),
+            ("fecha_fin", fecha_fin),
+        )
+        if valor
+    }
+    siguiente_cursor = None
+    if hay_siguiente:
+        ultimo = pagina[-1]
+        siguiente_cursor = f"{ultimo.fecha.isoformat()}_{ultimo.id}"
+
+    return render(request, "administrativa/inventario/kardex/listar_kardex.html", {
+        "movimientos": pagina,
+        "filtro": FiltroKardexForm({"insumo": insumo_id if insumo_id.isdigit() else ""}),
+        "tipos": MovimientoKardex.TIPO_CHOICES,
+        "insumo_id": insumo_id,
+        "tipo": tipo,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "filtros": urlencode(filtros),
+        "siguiente_cursor": siguiente_cursor,
+        "es_primera_pagina": cursor is None,
+    })
 
 def registrar_movimiento_kardex(request):
     """Registrar un nuevo movimiento en el Kardex."""
@@ -170,6 +393,40 @@ def registrar_movimiento_kardex(request):
         form = MovimientoKardexForm(initial={"fecha": timezone.now()})
     return render(request, "administrativa/inventario/kardex/nuevo_movimiento.html", {"form": form})
 
+def nuevo_documento_kardex(request):
+    """Registrar un documento de varias líneas (entrada o salida) en una sola transacción."""
+    if request.method == "POST":
+        form = DocumentoKardexForm(request.POST)
+        formset = LineaDocumentoFormSet(request.POST, prefix="lineas")
+        if form.is_valid() and formset.is_valid():
+            documento = form.save(commit=False)
+            documento.creado_por = request.user if request.user.is_authenticated else None
+            lineas = formset.lineas()
+            try:
+                documento.registrar(lineas)
+            except StockInsuficiente as e:
+                insumo = Insumo.objects.filter(pk=e.insumo_id).values_list("codigo", "nombre").first()
+                form.add_error(None, f"Stock insuficiente para {' - '.join(insumo or [str(e.insumo_id)])}: "
+                                     f"se requieren {e.cantidad.normalize():f}")
+            else:
+                messages.success(request, f"✅ Documento registrado con {len(lineas)} línea(s)")
+                return redirect("administrativa:inventario:detalle_documento_kardex", pk=documento.pk)
+    else:
+        form = DocumentoKardexForm(initial={"fecha": timezone.localtime(), "tipo": "entrada"})
+        formset = LineaDocumentoFormSet(prefix="lineas")
+    return render(request, "administrativa/inventario/kardex/form_documento.html", {
+        "form": form,
+        "formset": formset,
+    })
+
+def detalle_documento_kardex(request, pk):
+    documento = get_object_or_404(DocumentoKardex.objects.select_related("creado_por"), pk=pk)
+    movimientos = documento.movimientos.select_related("insumo").order_by("id")
+    return render(request, "administrativa/inventario/kardex/detalle_documento.html", {
+        "documento": documento,
+        "movimientos": movimientos,
+    })
+
 def editar_movimiento(request, pk):
     """Editar un movimiento existente del Kardex."""
     movimiento = get_object_or_404(MovimientoKardex, pk=pk)
@@ -180,6 +437,11 @@ def editar_movimiento(request, pk):
             if not movimiento.fecha:
                 movimiento.fecha = timezone.now()
             movimiento.save()
+
+            # Si el movimiento afectó meses ya cerrados, recalcular esos cierres
+            recalculados = CierreInventario.reconstruir()
+            if recalculados:
+                messages.info(request, f"🔄 Se recalcularon {len(recalculados)} cierre(s) mensual(es) de inventario")
             return redirect("administrativa:inventario:listar_kardex")
     else:
         form = MovimientoKardexForm(instance=movimiento)
@@ -188,9 +450,36 @@ def editar_movimiento(request, pk):
 def eliminar_movimiento(request, pk):
     movimiento = get_object_or_404(MovimientoKardex, pk=pk)
     movimiento.delete()
+    CierreInventario.reconstruir()
     return redirect("administrativa:inventario:listar_kardex")
 
 
+# ============================================
+# VALORIZACIÓN A UNA FECHA
+# ============================================
+def valorizacion_inventario(request):
+    """
+    Stock y valor por insumo al cierre de una fecha.
+    Parte del cierre mensual vigente más cercano (cantidad y valor guardados)
+    y solo repite y valoriza los movimientos del kardex posteriores a ese cierre.
+    """
+    fecha_str = request.GET.get("fecha", "")
+    fecha = _inicio_del_dia(fecha_str) or timezone.make_aware(
+        datetime.combine(timezone.localdate(), datetime.min.time())
+    )
+    corte = fecha + timedelta(days=1)
+
+    base, filas, total = CierreInventario.valorizar_al(corte)
+
+    return render(request, "administrativa/inventario/reportes/valorizacion.html", {
+        "filas": filas,
+        "total": total,
+        "fecha": fecha.date(),
+        "base": base,
+        "cierres": CierreInventario.objects.all()[:24],
+    })
+
+
 # ============================================
 # IMPORTAR DESDE EXCEL
 # ============================================
@@ -200,6 +489,7 @@ def importar_excel(request):
     if request.method == 'POST':
         archivo = request.FILES.get('archivo_excel')
         limpiar = request.POST.get('limpiar') == 'on'
+        simular = request.POST.get('simular') == 'on'
         
         if not archivo:
             messages.error(request, '❌ Debes seleccionar un archivo')
@@ -210,91 +500,33 @@ def importar_excel(request):
             return redirect('administrativa:inventario:importar_excel')
         
         try:
-            import openpyxl
-            
-            wb = openpyxl.load_workbook(archivo)
-            
-            if 'Inventario_Procesado' in wb.sheetnames:
-                ws = wb['Inventario_Procesado']
-            else:
-                ws = wb.active
-                messages.warning(request, f'⚠️ Usando hoja: {ws.title}')
-            
-            if limpiar:
-                count = Insumo.objects.count()
-                Insumo.objects.all().delete()
-                messages.warning(request, f'🗑️ Se eliminaron {count} insumos existentes')
-            
-            creados = 0
-            actualizados = 0
-            errores = []
-            
-            for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                if not row or len(row) < 3:
-                    continue
-                    
-                codigo = str(row[0]).strip() if row[0] else None
-                nombre = str(row[1]).strip() if row[1] else None
-                
-                try:
-                    stock_inicial = int(row[2]) if row[2] else 0
-                except (ValueError, TypeError):
-                    stock_inicial = 0
-                
-                if not codigo or not nombre:
-                    errores.append(f'Fila {idx}: código o nombre vacío')
-                    continue
-                
-                try:
-                    insumo, created = Insumo.objects.update_or_create(
-                        codigo=codigo,
-                        defaults={
-                            'nombre': nombre,
-                            'descripcion': 'Importado desde Excel',
-                            'unidad': 'UND',
-                            'precio_unitario': Decimal('0.00'),
-                            'stock_minimo': 0,
-                            'stock_maximo': 1000,
-                            'iva': Decimal('19.00'),
-                            'descuento_proveedor': Decimal('0.00'),
-                        }
-                    )
-                    
-                    if created and stock_inicial > 0:
-                        MovimientoKardex.objects.create(
-                            insumo=insumo,
-                            tipo='entrada',
-                            cantidad=stock_inicial,
-                            observacion='Stock inicial importado desde Excel',
-                            fecha=timezone.now()
-                        )
-                        creados += 1
-                    else:
-                        actualizados += 1
-                
-                except Exception as e:
-                    errores.append(f'Fila {idx} ({codigo}): {str(e)}')
-            
-            if creados > 0:
-                messages.success(request, f'✅ {creados} insumos creados con stock inicial')
-            
-            if actualizados > 0:
-                messages.info(request, f'🔄 {actualizados} insumos ya existían (no se modificó su stock)')
-            
-            if errores:
-                for error in errores[:5]:
-                    messages.warning(request, f'⚠️ {error}')
-                if len(errores) > 5:
-                    messages.warning(request, f'⚠️ ... y {len(errores) - 5} errores más')
-            
-            if creados > 0 or actualizados > 0:
-                messages.success(request, '🎉 ¡Importación completada!')
-                return redirect('administrativa:inventario:lista_insumo')
-        
-        except ImportError:
-            messages.error(request, '❌ Instala openpyxl: pip install openpyxl')
+            resultado = importar_insumos(archivo, limpiar=limpiar, dry_run=simular)
         except Exception as e:
             messages.error(request, f'❌ Error al procesar: {str(e)}')
+            return redirect('administrativa:inventario:importar_excel')
+
+        if resultado.hoja != HOJA_POR_DEFECTO:
+            messages.warning(request, f'⚠️ Usando hoja: {resultado.hoja}')
+
+        prefijo = '🧪 Simulación: ' if simular else ''
+        if resultado.eliminados:
+            messages.warning(request, f'{prefijo}🗑️ Se eliminaron {resultado.eliminados} insumos existentes')
+        if resultado.creados > 0:
+            messages.success(request, f'{prefijo}✅ {resultado.creados} insumos creados con stock inicial')
+        if resultado.actualizados > 0:
+            messages.info(request, f'{prefijo}🔄 {resultado.actualizados} insumos ya existían (no se modificó su stock)')
+
+        errores = resultado.errores
+        if errores:
+            for fila, codigo, error in errores[:5]:
+                detalle = f' ({codigo})' if codigo else ''
+                messages.warning(request, f'⚠️ Fila {fila}{detalle}: {error}')
+            if len(errores) > 5:
+                messages.warning(request, f'⚠️ ... y {len(errores) - 5} errores más')
+
+        if resultado.procesados > 0 and not simular:
+            messages.success(request, '🎉 ¡Importación completada!')
+            return redirect('administrativa:inventario:lista_insumo')
         
         return redirect('administrativa:inventario:importar_excel')
     
@@ -307,7 +539,7 @@ def importar_excel(request):
 def exportar_excel(request):
     """Exporta el inventario actual a Excel en tiempo real"""
     
-    insumos = Insumo.objects.all().order_by('codigo')
+    insumos = Insumo.objects.con_stock().order_by('codigo')
     
     wb = Workbook()
     ws = wb.active
@@ -0,0 +1,39 @@
+# nexusone/administrativa/inventario/widgets.py
+from django import forms
+from django.urls import reverse_lazy
+
+
+class InsumoAutocomplete(forms.Select):
+    """
+    <select> de insumos que solo renderiza la opción elegida.
+    Las demás opciones se buscan en `buscar_insumos` mientras el usuario escribe
+    (ver static/js/insumo_autocomplete.js), así el formulario no recorre el catálogo.
+    """
+
+    def __init__(self, attrs=None):
+        attrs = {"class": "form-control", **(attrs or {})}
+        attrs.setdefault("data-autocomplete-url", reverse_lazy("administrativa:inventario:buscar_insumos"))
+        super().__init__(attrs)
+
+    class Media:
+        js = ["js/insumo_autocomplete.js"]
+
+    def optgroups(self, name, value, attrs=None):
+        from .models import Insumo
+
+        seleccionados = [v for v in value if v not in (None, "")]
+        opciones = [("", "---------")]
+        if seleccionados:
+            opciones += [
+                (pk, f"{codigo} - {nombre}")
+                for pk, codigo, nombre in Insumo.objects.filter(pk__in=seleccionados)
+                .values_list("pk", "codigo", "nombre")
+            ]
+
+        grupos = []
+        for index, (valor, etiqueta) in enumerate(opciones):
+            seleccionado = str(valor) in seleccionados
+            grupos.append((None, [self.create_option(
+                name, valor, etiqueta, seleccionado, index, attrs=attrs
+            )], index))
+        return grupos
@@ -0,0 +1,96 @@
+"""
+Comando para generar miniaturas y tamaño medio de las imágenes ya subidas
+Uso: python manage.py generar_derivados_imagenes [--procesos N] [--forzar] [--dry-run]
+
+Recorre los ImageField de CAMPOS_CON_DERIVADOS (una consulta por campo) y
+reparte el trabajo de Pillow en un pool de procesos. Es idempotente: solo
+genera los derivados que faltan (o todos con --forzar).
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from nexusone.administrativa.imagenes import CAMPOS_CON_DERIVADOS, ERRORES_IMAGEN, destinos_de, generar_derivados
+
+
+def _procesar(origen, destinos, forzar):
+    """Trabajo de un proceso del pool: solo Pillow y rutas absolutas"""
+    try:
+        return origen, generar_derivados(origen, destinos, forzar=forzar), None
+    except ERRORES_IMAGEN as e:
+        return origen, [], str(e)
+
+
+class Command(BaseCommand):
+    help = 'Genera los derivados (miniatura y media) de las imágenes existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 2,
+            help='Procesos del pool (default: núcleos disponibles)'
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Regenera los derivados aunque ya existan'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo cuenta las imágenes que se procesarían'
+        )
+
+    def handle(self, *args, **options):
+        forzar = options['forzar']
+        tareas = []
+        sin_archivo = 0
+
+        for app_label, nombre_modelo, campo in CAMPOS_CON_DERIVADOS:
+            modelo = apps.get_model(app_label, nombre_modelo)
+            nombres = (
+                modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                .values_list(campo, flat=True).distinct()
+            )
+            cantidad = 0
+            for nombre in nombres:
+                origen = os.path.join(settings.MEDIA_ROOT, nombre)
+                if not os.path.isfile(origen):
+                    sin_archivo += 1
+                    continue
+                destinos = destinos_de(nombre)
+                if forzar or not all(os.path.exists(d) for d in destinos.values()):
+                    tareas.append((origen, destinos))
+                    cantidad += 1
+            self.stdout.write(f'🖼️ {nombre_modelo}.{campo}: {cantidad} imagen(es) pendientes')
+
+        if sin_archivo:
+            self.stdout.write(self.style.WARNING(f'⚠️ {sin_archivo} registro(s) apuntan a archivos inexistentes'))
+        if options['dry_run'] or not tareas:
+            self.stdout.write(self.style.SUCCESS(
+                f'📊 {len(tareas)} imagen(es) por procesar' + (' (dry-run, sin cambios)' if options['dry_run'] else '')
+            ))
+            return
+
+        inicio = time.perf_counter()
+        generadas = errores = 0
+        with ProcessPoolExecutor(max_workers=max(1, options['procesos'])) as pool:
+            futuros = [pool.submit(_procesar, origen, destinos, forzar) for origen, destinos in tareas]
+            for futuro in as_completed(futuros):
+                origen, rendiciones, error = futuro.result()
+                if error:
+                    errores += 1
+                    self.stdout.write(self.style.WARNING(f'⚠️ {os.path.relpath(origen, settings.MEDIA_ROOT)}: {error}'))
+                else:
+                    generadas += len(rendiciones)
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'📊 {len(tareas) - errores} imagen(es), {generadas} derivado(s) en {duracion:.1f} s '
+            f'({options["procesos"]} procesos), {errores} con error'
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrativa', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoSincronizado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, verbose_name='Clave de idempotencia')),
+                ('lote', models.UUIDField(db_index=True, verbose_name='Lote')),
+                ('tipo', models.CharField(max_length=30, verbose_name='Tipo')),
+                ('resultado', models.JSONField(blank=True, default=dict, verbose_name='Resultado')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_sincronizados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Evento sincronizado',
+                'verbose_name_plural': 'Eventos sincronizados',
+                'ordering': ['-creado'],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'clave'), name='evento_sinc_usuario_clave')],
+            },
+        ),
+    ]
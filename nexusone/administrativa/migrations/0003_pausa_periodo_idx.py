@@ -0,0 +1,35 @@
+# produccion no tiene migraciones (sus tablas las crea `migrate --run-syncdb`,
+# que solo crea índices al crear la tabla): el índice de periodo de
+# PausaProduccion.Meta.indexes se agrega aquí en las bases ya existentes.
+
+from django.db import migrations
+
+TABLA = 'produccion_pausaproduccion'
+INDICE = 'pausa_periodo_idx'
+
+
+def crear_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if TABLA not in connection.introspection.table_names(cursor):
+            return  # la creará --run-syncdb, ya con el índice
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {quote(INDICE)} ON {quote(TABLA)} '
+        f'({quote("fecha_inicio")}, {quote("fecha_fin")})'
+    )
+
+
+def borrar_indice(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(INDICE)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrativa', '0002_evento_sincronizado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
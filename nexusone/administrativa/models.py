@@ -0,0 +1,146 @@
+# nexusone/administrativa/models.py
+from django.contrib.auth.models import User
+from django.db import IntegrityError, models, transaction
+from django.db.models import BigIntegerField, F, Max
+from django.db.models.functions import Cast
+
+
+# ==================================================
+# SECUENCIAS (consecutivos de documentos)
+# ==================================================
+class Secuencia(models.Model):
+    """
+    Contador con nombre para numerar documentos (OT, OC, cotizaciones, contratos...).
+
+    Asignar números es un UPDATE ... SET valor = valor + n sobre una sola fila:
+    la base de datos bloquea la fila hasta el commit, así que dos solicitudes
+    simultáneas nunca reciben el mismo número y no hace falta buscar "el último".
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    valor = models.PositiveBigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Secuencia"
+        verbose_name_plural = "Secuencias"
+        ordering = ["nombre"]
+
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+
+    @classmethod
+    def reservar(cls, nombre, cantidad=1, semilla=None):
+        """
+        Reserva `cantidad` números consecutivos del contador `nombre`.
+
+        Args:
+            nombre: contador (p. ej. "OT", "OC", "COT-2025")
+            cantidad: tamaño del bloque (para bulk_create)
+            semilla: callable que retorna el último número ya usado; solo se
+                llama la primera vez, al crear el contador
+
+        Returns:
+            range con los números reservados
+        """
+        if cantidad < 1:
+            return range(0)
+
+        with transaction.atomic():
+            if not cls.objects.filter(nombre=nombre).update(valor=F("valor") + cantidad):
+                inicial = semilla() if semilla else 0
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(nombre=nombre, valor=inicial + cantidad)
+                    return range(inicial + 1, inicial + cantidad + 1)
+                except IntegrityError:
+                    # Otro proceso creó el contador al mismo tiempo
+                    cls.objects.filter(nombre=nombre).update(valor=F("valor") + cantidad)
+            valor = cls.objects.filter(nombre=nombre).values_list("valor", flat=True).get()
+
+        return range(valor - cantidad + 1, valor + 1)
+
+    @classmethod
+    def siguiente(cls, nombre, semilla=None):
+        """Siguiente número del contador `nombre`"""
+        return cls.reservar(nombre, 1, semilla)[0]
+
+    # ---------- semillas (último número ya usado en datos existentes) ----------
+
+    @staticmethod
+    def ultimo_entero(queryset, campo):
+        """Mayor valor de `campo` entre los que son solo dígitos (p. ej. '00042')"""
+        maximo = (
+            queryset.filter(**{f"{campo}__regex": r"^[0-9]+$"})
+            .aggregate(maximo=Max(Cast(campo, BigIntegerField())))["maximo"]
+        )
+        return maximo or 0
+
+    @staticmethod
+    def ultimo_sufijo(queryset, campo, prefijo):
+        """Mayor sufijo numérico de los valores '<prefijo><número>' de `campo`"""
+        ultimo = 0
+        for valor in queryset.filter(**{f"{campo}__startswith": prefijo}).values_list(campo, flat=True):
+            sufijo = valor[len(prefijo):]
+            if sufijo.isdigit():
+                ultimo = max(ultimo, int(sufijo))
+        return ultimo
+
+    @staticmethod
+    def ultimo_id(queryset):
+        """Mayor id del modelo (para numeraciones que antes usaban el último id)"""
+        return queryset.aggregate(maximo=Max("id"))["maximo"] or 0
+
+
+# ==================================================
+# EVENTOS SINCRONIZADOS (idempotencia de clientes sin conexión)
+# ==================================================
+class EventoSincronizado(models.Model):
+    """
+    Evento enviado por un cliente que trabaja sin conexión (tabletas de planta),
+    identificado por una clave que genera el propio cliente (UUID).
+
+    La fila se inserta antes de aplicar el evento: si el cliente reintenta el
+    mismo lote, o lo envía dos veces a la vez, la restricción única hace que
+    solo una solicitud lo aplique y las demás reciban el resultado guardado.
+    """
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="eventos_sincronizados"
+    )
+    clave = models.CharField("Clave de idempotencia", max_length=64)
+    lote = models.UUIDField("Lote", db_index=True)
+    tipo = models.CharField("Tipo", max_length=30)
+    resultado = models.JSONField("Resultado", default=dict, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Evento sincronizado"
+        verbose_name_plural = "Eventos sincronizados"
+        ordering = ["-creado"]
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "clave"], name="evento_sinc_usuario_clave"),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.clave}"
+
+    @classmethod
+    def reclamar(cls, usuario, eventos, lote):
+        """
+        Inserta (una sola consulta) las claves de `eventos` [(clave, tipo)] que el
+        usuario no haya enviado antes.
+
+        Returns:
+            (claves reclamadas por este lote, {clave: resultado} de las ya aplicadas)
+        """
+        cls.objects.bulk_create(
+            [cls(usuario=usuario, clave=clave, lote=lote, tipo=tipo) for clave, tipo in eventos],
+            ignore_conflicts=True,
+        )
+        reclamadas = set(cls.objects.filter(lote=lote).values_list("clave", flat=True))
+        anteriores = dict(
+            cls.objects.filter(usuario=usuario, clave__in=[c for c, _ in eventos if c not in reclamadas])
+            .values_list("clave", "resultado")
+        )
+        return reclamadas, anteriores
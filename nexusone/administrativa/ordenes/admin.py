@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import OrdenTrabajo
+from .models import ArchivoContenido, DocumentoOrden, OrdenTrabajo, ResumenDiarioOT
+
+
+class DocumentoOrdenInline(admin.TabularInline):
+    model = DocumentoOrden
+    extra = 0
+    fields = ("nombre", "archivo", "tamano", "tipo_contenido", "fecha_subida")
+    readonly_fields = ("tamano", "tipo_contenido", "fecha_subida")
 
 
 @admin.register(OrdenTrabajo)
@@ -9,3 +16,33 @@ class OrdenTrabajoAdmin(admin.ModelAdmin):
     search_fields = ("numero", "constructora", "proyecto")
     ordering = ("-fecha_apertura",)
     date_hierarchy = "fecha_apertura"
+    inlines = [DocumentoOrdenInline]
+
+
+@admin.register(DocumentoOrden)
+class DocumentoOrdenAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "orden", "tamano", "tipo_contenido", "fecha_subida")
+    list_filter = ("tipo_contenido",)
+    search_fields = ("nombre", "orden__numero", "hash_sha256")
+    list_select_related = ("orden",)
+    readonly_fields = ("tamano", "tipo_contenido", "hash_sha256", "contenido", "fecha_subida")
+
+
+@admin.register(ArchivoContenido)
+class ArchivoContenidoAdmin(admin.ModelAdmin):
+    list_display = ("hash_sha256", "tamano", "referencias", "creado")
+    search_fields = ("hash_sha256",)
+    ordering = ("-tamano",)
+    readonly_fields = ("hash_sha256", "archivo", "tamano", "referencias", "creado")
+
+
+@admin.register(ResumenDiarioOT)
+class ResumenDiarioOTAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "proceso", "constructora", "proyecto", "abiertas", "cerradas",
+                    "cerradas_a_tiempo", "cerradas_tarde", "tiempo_entrega_promedio")
+    list_filter = ("proceso", "fecha")
+    list_select_related = ("proyecto",)
+    date_hierarchy = "fecha"
+    # Lo mantienen OrdenTrabajo.save() y el comando reconstruir_resumen_ots
+    readonly_fields = ("fecha", "proceso", "constructora", "proyecto", "abiertas", "cerradas",
+                       "cerradas_a_tiempo", "cerradas_tarde", "segundos_entrega")
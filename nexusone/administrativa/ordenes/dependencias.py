@@ -0,0 +1,192 @@
+# nexusone/administrativa/ordenes/dependencias.py
+"""
+Grafo de dependencias entre órdenes de trabajo (OrdenTrabajo.orden_dependiente).
+Lo usan OrdenTrabajo.save()/clean() para rechazar ciclos, OrdenTrabajo.grafo_dependencias
+y el comando `ruta_critica_ordenes`.
+
+- El grafo de un proyecto o entrega se carga con una sola consulta (values)
+- Orden topológico con el algoritmo de Kahn; si quedan nodos sin ordenar hay un ciclo
+- Ruta crítica (CPM): inicio temprano, inicio tardío y holgura en días, usando
+  OrdenTrabajo.duracion_dias como duración (las OT cerradas ya no suman días)
+- Sin consultas por OT: todo se calcula en memoria sobre los diccionarios cargados
+"""
+from collections import deque
+from datetime import timedelta
+
+from django.utils import timezone
+
+CAMPOS_NODO = ("id", "numero", "orden_dependiente_id", "estado", "duracion_dias", "fecha_envio")
+
+
+class DependenciaCircular(ValueError):
+    """Asignar la dependencia cerraría un ciclo entre órdenes"""
+
+    def __init__(self, ciclo):
+        self.ciclo = ciclo
+        super().__init__("Dependencia circular: " + " → ".join(ciclo))
+
+
+class GrafoDependencias:
+    """
+    Grafo dirigido dependencia → dependiente.
+
+    Cada OT depende a lo sumo de otra, pero una OT puede habilitar varias
+    (mecanizado → ensamble → despacho, mecanizado → pintura...).
+    """
+
+    def __init__(self, nodos):
+        # nodos: {id: {"id", "numero", "orden_dependiente_id", "estado", "duracion_dias", "fecha_envio"}}
+        self.nodos = nodos
+        self._indexar()
+
+    def _indexar(self):
+        self.sucesores = {id_nodo: [] for id_nodo in self.nodos}
+        for id_nodo, nodo in self.nodos.items():
+            padre = nodo["orden_dependiente_id"]
+            if padre in self.sucesores:
+                self.sucesores[padre].append(id_nodo)
+
+    @classmethod
+    def cargar(cls, queryset):
+        """Construye el grafo con una sola consulta sobre `queryset` de OrdenTrabajo"""
+        nodos = {fila["id"]: fila for fila in queryset.order_by().values(*CAMPOS_NODO)}
+        return cls(nodos)
+
+    def completar_ancestros(self, queryset, id_nodo):
+        """
+        Agrega al grafo los ancestros de `id_nodo` que quedaron fuera (dependencias
+        entre proyectos distintos). Una consulta por OT faltante; lo normal es ninguna.
+        """
+        agregados = False
+        visitados = set()
+        actual = id_nodo
+        while actual is not None and actual not in visitados:
+            visitados.add(actual)
+            if actual not in self.nodos:
+                fila = queryset.filter(pk=actual).values(*CAMPOS_NODO).first()
+                if fila is None:
+                    break
+                self.nodos[actual] = fila
+                agregados = True
+            actual = self.nodos[actual]["orden_dependiente_id"]
+        if agregados:
+            self._indexar()
+
+    def __len__(self):
+        return len(self.nodos)
+
+    def _predecesor(self, id_nodo):
+        """Dependencia de la OT si está dentro del grafo"""
+        padre = self.nodos[id_nodo]["orden_dependiente_id"]
+        return padre if padre in self.nodos else None
+
+    # ---------- ciclos ----------
+
+    def ciclo_desde(self, id_nodo, nuevo_padre=None):
+        """
+        Números de OT del ciclo que contiene a `id_nodo` (None si no hay).
+        Con `nuevo_padre` se evalúa la dependencia antes de guardarla.
+        """
+        camino = [id_nodo]
+        visitados = {id_nodo}
+        actual = nuevo_padre if nuevo_padre is not None else self.nodos[id_nodo]["orden_dependiente_id"]
+        while actual is not None and actual in self.nodos:
+            if actual == id_nodo:
+                return [self.nodos[i]["numero"] for i in camino] + [self.nodos[id_nodo]["numero"]]
+            if actual in visitados:
+                return None  # ciclo aguas arriba que no pasa por id_nodo
+            visitados.add(actual)
+            camino.append(actual)
+            actual = self.nodos[actual]["orden_dependiente_id"]
+        return None
+
+    def orden_topologico(self):
+        """
+        Ids de las OT en un orden donde cada una aparece después de su dependencia.
+        Lanza DependenciaCircular si el grafo tiene ciclos.
+        """
+        pendientes = {id_nodo: 0 if self._predecesor(id_nodo) is None else 1 for id_nodo in self.nodos}
+        cola = deque(sorted(i for i, grado in pendientes.items() if grado == 0))
+        orden = []
+        while cola:
+            id_nodo = cola.popleft()
+            orden.append(id_nodo)
+            for sucesor in self.sucesores[id_nodo]:
+                pendientes[sucesor] -= 1
+                if pendientes[sucesor] == 0:
+                    cola.append(sucesor)
+
+        if len(orden) < len(self.nodos):
+            sin_orden = next(i for i in self.nodos if pendientes[i] > 0)
+            raise DependenciaCircular(self.ciclo_desde(sin_orden) or [self.nodos[sin_orden]["numero"]])
+        return orden
+
+    # ---------- bloqueos ----------
+
+    def bloqueadores(self, id_nodo):
+        """Números de las OT abiertas de las que depende (directa o indirectamente)"""
+        bloqueadores = []
+        actual = self._predecesor(id_nodo)
+        while actual is not None and len(bloqueadores) < len(self.nodos):
+            if self.nodos[actual]["estado"] != "cerrada":
+                bloqueadores.append(self.nodos[actual]["numero"])
+            actual = self._predecesor(actual)
+        return bloqueadores
+
+    # ---------- ruta crítica ----------
+
+    def _duracion(self, id_nodo):
+        nodo = self.nodos[id_nodo]
+        if nodo["estado"] == "cerrada":
+            return 0
+        return nodo["duracion_dias"] or 0
+
+    def ruta_critica(self, hoy=None):
+        """
+        Método de la ruta crítica sobre las OT del grafo.
+
+        Returns:
+            (filas, duracion_total): filas en orden topológico con
+            inicio_temprano / fin_temprano / inicio_tardio / fin_tardio (días desde hoy),
+            holgura, critica, fecha_fin_estimada y atraso contra fecha_envio
+        """
+        hoy = hoy or timezone.localdate()
+        orden = self.orden_topologico()
+
+        # Pasada hacia adelante
+        inicio_temprano, fin_temprano = {}, {}
+        for id_nodo in orden:
+            padre = self._predecesor(id_nodo)
+            inicio_temprano[id_nodo] = fin_temprano[padre] if padre is not None else 0
+            fin_temprano[id_nodo] = inicio_temprano[id_nodo] + self._duracion(id_nodo)
+        duracion_total = max(fin_temprano.values(), default=0)
+
+        # Pasada hacia atrás
+        inicio_tardio, fin_tardio = {}, {}
+        for id_nodo in reversed(orden):
+            sucesores = self.sucesores[id_nodo]
+            fin_tardio[id_nodo] = min((inicio_tardio[s] for s in sucesores), default=duracion_total)
+            inicio_tardio[id_nodo] = fin_tardio[id_nodo] - self._duracion(id_nodo)
+
+        filas = []
+        for id_nodo in orden:
+            nodo = self.nodos[id_nodo]
+            holgura = inicio_tardio[id_nodo] - inicio_temprano[id_nodo]
+            fecha_fin = hoy + timedelta(days=fin_temprano[id_nodo])
+            filas.append({
+                "id": id_nodo,
+                "numero": nodo["numero"],
+                "estado": nodo["estado"],
+                "depende_de": self.nodos[nodo["orden_dependiente_id"]]["numero"]
+                if self._predecesor(id_nodo) is not None else None,
+                "duracion": self._duracion(id_nodo),
+                "inicio_temprano": inicio_temprano[id_nodo],
+                "fin_temprano": fin_temprano[id_nodo],
+                "inicio_tardio": inicio_tardio[id_nodo],
+                "fin_tardio": fin_tardio[id_nodo],
+                "holgura": holgura,
+                "critica": holgura == 0 and nodo["estado"] != "cerrada",
+                "fecha_fin_estimada": fecha_fin,
+                "dias_atraso": max(0, (fecha_fin - nodo["fecha_envio"]).days) if nodo["fecha_envio"] else 0,
+            })
+        return filas, duracion_total
@@ -0,0 +1,178 @@
+"""
+Comando para pasar los documentos de OT al almacenamiento deduplicado y
+reportar cuánto disco se ahorra
+Uso: python manage.py deduplicar_documentos_ordenes [--dry-run] [--solo-reporte] [--purgar-huerfanos]
+
+- Mueve cada archivo antiguo (Ordenes/<numero>/...) a Ordenes/_blobs/<aa>/<sha256>;
+  si el contenido ya existe, el duplicado se borra y el documento apunta al blob
+- Reporte: bytes lógicos (lo que ven las OT) vs bytes físicos en disco
+- --purgar-huerfanos borra blobs en disco sin fila y temporales de más de un día
+"""
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from nexusone.administrativa.ordenes.models import CARPETA_BLOBS, ArchivoContenido, DocumentoOrden
+
+
+def _mb(valor):
+    return f"{(valor or 0) / (1024 * 1024):,.1f} MB"
+
+
+class Command(BaseCommand):
+    help = 'Deduplica los documentos de las OT por contenido y reporta el ahorro de disco'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcula el ahorro posible sin mover archivos'
+        )
+        parser.add_argument(
+            '--solo-reporte',
+            action='store_true',
+            help='Solo muestra el reporte de almacenamiento'
+        )
+        parser.add_argument(
+            '--purgar-huerfanos',
+            action='store_true',
+            help='Borra blobs sin referencia en la base de datos'
+        )
+
+    def handle(self, *args, **options):
+        if not options['solo_reporte']:
+            if options['dry_run']:
+                self._simular()
+            else:
+                self._migrar()
+        if options['purgar_huerfanos'] and not options['dry_run']:
+            self._purgar_huerfanos()
+        self._reporte()
+
+    # ---------- migración de documentos antiguos ----------
+
+    def _antiguos(self):
+        return (
+            DocumentoOrden.objects.filter(contenido__isnull=True)
+            .exclude(archivo="").exclude(archivo__isnull=True)
+            .select_related("orden")
+            .order_by("id")
+        )
+
+    def _hash(self, ruta):
+        hasher = hashlib.sha256()
+        with open(ruta, "rb") as origen:
+            for chunk in iter(lambda: origen.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _simular(self):
+        por_hash = {}
+        faltantes = 0
+        for documento in self._antiguos().iterator(chunk_size=500):
+            ruta = os.path.join(settings.MEDIA_ROOT, documento.archivo.name)
+            if not os.path.isfile(ruta):
+                faltantes += 1
+                continue
+            hash_sha256 = documento.hash_sha256 or self._hash(ruta)
+            por_hash.setdefault(hash_sha256, []).append(os.path.getsize(ruta))
+
+        existentes = set(
+            ArchivoContenido.objects.filter(pk__in=list(por_hash)).values_list("pk", flat=True)
+        )
+        ahorro = sum(
+            sum(tamanos) if h in existentes else sum(tamanos[1:])
+            for h, tamanos in por_hash.items()
+        )
+        self.stdout.write(
+            f'🔍 {sum(len(t) for t in por_hash.values())} documento(s) antiguos, '
+            f'{len(por_hash)} contenido(s) distintos; se liberarían {_mb(ahorro)} (dry-run)'
+        )
+        if faltantes:
+            self.stdout.write(self.style.WARNING(f'⚠️ {faltantes} documento(s) sin archivo en disco'))
+
+    def _migrar(self):
+        movidos = faltantes = 0
+        for documento in self._antiguos().iterator(chunk_size=500):
+            ruta = os.path.join(settings.MEDIA_ROOT, documento.archivo.name)
+            if not os.path.isfile(ruta):
+                faltantes += 1
+                continue
+            hash_sha256 = self._hash(ruta)
+            tamano = os.path.getsize(ruta)
+            with transaction.atomic():
+                # adquirir() mueve (rename) el archivo a su ruta de blob
+                relativa = ArchivoContenido.adquirir(ruta, hash_sha256, tamano)
+                DocumentoOrden.objects.filter(pk=documento.pk).update(
+                    archivo=relativa,
+                    contenido_id=hash_sha256,
+                    hash_sha256=hash_sha256,
+                    tamano=tamano,
+                    tipo_contenido=documento.tipo_contenido or DocumentoOrden.tipo_de(documento.nombre),
+                )
+            movidos += 1
+
+        self.stdout.write(f'📦 {movidos} documento(s) movidos al almacenamiento deduplicado')
+        if faltantes:
+            self.stdout.write(self.style.WARNING(f'⚠️ {faltantes} documento(s) sin archivo en disco'))
+
+    def _purgar_huerfanos(self):
+        base = os.path.join(settings.MEDIA_ROOT, CARPETA_BLOBS)
+        if not os.path.isdir(base):
+            return
+        conocidos = set(ArchivoContenido.objects.values_list("pk", flat=True))
+        limite_tmp = time.time() - 24 * 3600
+        borrados = liberados = 0
+        for raiz, _, archivos in os.walk(base):
+            es_tmp = os.path.basename(raiz) == "tmp"
+            for archivo in archivos:
+                ruta = os.path.join(raiz, archivo)
+                if es_tmp:
+                    huerfano = os.path.getmtime(ruta) < limite_tmp
+                else:
+                    huerfano = archivo not in conocidos
+                if huerfano:
+                    liberados += os.path.getsize(ruta)
+                    os.remove(ruta)
+                    borrados += 1
+        self.stdout.write(f'🧹 {borrados} archivo(s) huérfanos borrados ({_mb(liberados)})')
+
+    # ---------- reporte ----------
+
+    def _reporte(self):
+        documentos = DocumentoOrden.objects.aggregate(
+            total=Count("id"),
+            logico=Sum("tamano"),
+        )
+        antiguos = DocumentoOrden.objects.filter(contenido__isnull=True).aggregate(
+            total=Count("id"),
+            bytes=Sum("tamano"),
+        )
+        blobs = ArchivoContenido.objects.aggregate(total=Count("pk"), bytes=Sum("tamano"))
+
+        logico = documentos["logico"] or 0
+        fisico = (blobs["bytes"] or 0) + (antiguos["bytes"] or 0)
+        ahorro = logico - fisico
+
+        self.stdout.write('')
+        self.stdout.write('📊 ALMACENAMIENTO DE DOCUMENTOS DE OT')
+        self.stdout.write(f'   Documentos:             {documentos["total"]:,} ({_mb(logico)} lógicos)')
+        self.stdout.write(f'   Contenidos únicos:      {blobs["total"]:,} ({_mb(blobs["bytes"])})')
+        self.stdout.write(f'   Sin deduplicar:         {antiguos["total"]:,} ({_mb(antiguos["bytes"])})')
+        self.stdout.write(f'   En disco:               {_mb(fisico)}')
+        porcentaje = f' ({ahorro * 100 / logico:.1f} %)' if logico else ''
+        self.stdout.write(self.style.SUCCESS(f'   Ahorro por deduplicación: {_mb(ahorro)}{porcentaje}'))
+
+        repetidos = (
+            ArchivoContenido.objects.filter(referencias__gt=1)
+            .annotate(ahorro=F("tamano") * (F("referencias") - 1))
+            .order_by("-ahorro")[:10]
+        )
+        for blob in repetidos:
+            nombre = blob.documentos.values_list("nombre", flat=True).first() or blob.pk[:12]
+            self.stdout.write(f'   🔁 {nombre}: {blob.referencias} copias, ahorra {_mb(blob.ahorro)}')
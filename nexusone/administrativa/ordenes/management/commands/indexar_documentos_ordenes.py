@@ -0,0 +1,56 @@
+"""
+Comando para indexar en DocumentoOrden los archivos que ya están en disco
+Uso: python manage.py indexar_documentos_ordenes [--dry-run] [--orden NUMERO]
+
+Recorre MEDIA_ROOT/Ordenes/<numero>/ de cada OT y registra los archivos que
+aún no tienen fila (tamaño, tipo y SHA-256). Es idempotente: se puede volver a
+ejecutar y solo agrega lo que falte.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from nexusone.administrativa.ordenes.models import DocumentoOrden, OrdenTrabajo
+
+
+class Command(BaseCommand):
+    help = 'Indexa en la base de datos los documentos existentes en las carpetas de las OT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra los archivos que se indexarían, sin guardarlos'
+        )
+        parser.add_argument(
+            '--orden',
+            help='Indexar solo la OT con este número'
+        )
+
+    def handle(self, *args, **options):
+        ordenes = OrdenTrabajo.objects.only('id', 'numero').order_by('id')
+        if options['orden']:
+            ordenes = ordenes.filter(numero=options['orden'])
+
+        # Nombres ya indexados por OT, en una sola consulta
+        existentes = {}
+        for orden_id, nombre in DocumentoOrden.objects.values_list('orden_id', 'nombre'):
+            existentes.setdefault(orden_id, set()).add(nombre)
+
+        total = 0
+        total_bytes = 0
+        for orden in ordenes.iterator(chunk_size=500):
+            nuevos = DocumentoOrden.indexar_carpeta(orden, existentes.get(orden.id, ()))
+            if not nuevos:
+                continue
+            if not options['dry_run']:
+                with transaction.atomic():
+                    DocumentoOrden.objects.bulk_create(nuevos, batch_size=500)
+            total += len(nuevos)
+            total_bytes += sum(doc.tamano for doc in nuevos)
+            self.stdout.write(f'📁 OT {orden.numero}: {len(nuevos)} archivo(s)')
+
+        resumen = f'📊 {total} archivo(s) indexado(s), {total_bytes / (1024 * 1024):,.1f} MB'
+        if options['dry_run']:
+            resumen += ' (dry-run, sin cambios)'
+        self.stdout.write(self.style.SUCCESS(resumen))
@@ -0,0 +1,43 @@
+"""
+Comando para generar las notificaciones de OT próximas a envío y vencidas
+Uso: python manage.py notificar_vencimientos [--dias 2] [--dry-run]
+
+Pensado para ejecutarse desde cron (p. ej. cada hora): es idempotente, una OT
+no recibe dos veces el mismo tipo de aviso.
+"""
+
+from django.core.management.base import BaseCommand
+
+from nexusone.administrativa.ordenes.models import Notificacion
+
+
+class Command(BaseCommand):
+    help = 'Crea notificaciones "próxima a envío" y "vencida" para las órdenes de trabajo abiertas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=2,
+            help='Días de anticipación para el aviso de próxima a envío (default: 2)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra las notificaciones que se crearían, sin guardarlas'
+        )
+
+    def handle(self, *args, **options):
+        nuevas = Notificacion.generar_vencimientos(
+            dias_aviso=options['dias'],
+            dry_run=options['dry_run'],
+        )
+
+        for notificacion in nuevas:
+            self.stdout.write(notificacion.mensaje)
+
+        vencidas = sum(1 for n in nuevas if n.tipo == 'vencida')
+        resumen = f'📊 {len(nuevas) - vencidas} próxima(s) a envío, {vencidas} vencida(s)'
+        if options['dry_run']:
+            resumen += ' (dry-run, sin cambios)'
+        self.stdout.write(self.style.SUCCESS(resumen))
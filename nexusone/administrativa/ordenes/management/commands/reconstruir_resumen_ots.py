@@ -0,0 +1,42 @@
+"""
+Comando para recalcular la tabla de resumen diario de OT (ResumenDiarioOT)
+Uso: python manage.py reconstruir_resumen_ots [--desde AAAA-MM-DD]
+
+El resumen se mantiene solo al guardar/cerrar/eliminar OT; este comando lo
+reconstruye desde cero (p. ej. después de cargas masivas o cambios por SQL).
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nexusone.administrativa.ordenes.models import ResumenDiarioOT
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de aperturas y cierres de órdenes de trabajo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Recalcular solo desde esta fecha (AAAA-MM-DD); por defecto todo'
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['desde']} (use AAAA-MM-DD)")
+
+        filas = ResumenDiarioOT.reconstruir(desde=desde)
+        totales = ResumenDiarioOT.totales(desde=desde)
+
+        promedio = totales['tiempo_entrega_promedio']
+        promedio = f'{promedio.total_seconds() / 86400:.1f} días' if promedio is not None else '—'
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 {filas} fila(s) de resumen: {totales['abiertas']} abiertas, {totales['cerradas']} cerradas "
+            f"({totales['cerradas_a_tiempo']} a tiempo, {totales['cerradas_tarde']} tarde), "
+            f"tiempo de entrega promedio {promedio}"
+        ))
@@ -0,0 +1,65 @@
+"""
+Comando para ver el orden de ejecución y la ruta crítica de las OT de un proyecto o entrega
+Uso: python manage.py ruta_critica_ordenes --proyecto CODIGO
+     python manage.py ruta_critica_ordenes --entrega ID
+
+El grafo se carga con una sola consulta (GrafoDependencias). Las duraciones salen de
+OrdenTrabajo.duracion_dias; las OT cerradas cuentan 0 días.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nexusone.administrativa.ordenes.dependencias import DependenciaCircular
+from nexusone.administrativa.ordenes.models import OrdenTrabajo
+from nexusone.administrativa.proyectos.models import EntregaProgramada, Proyecto
+
+
+class Command(BaseCommand):
+    help = 'Orden topológico, holgura y ruta crítica de las OT de un proyecto o entrega'
+
+    def add_arguments(self, parser):
+        grupo = parser.add_mutually_exclusive_group(required=True)
+        grupo.add_argument('--proyecto', help='Código del proyecto')
+        grupo.add_argument('--entrega', type=int, help='Id de la entrega programada')
+
+    def handle(self, *args, **options):
+        if options['proyecto']:
+            proyecto = Proyecto.objects.filter(codigo=options['proyecto']).first()
+            if proyecto is None:
+                raise CommandError(f"No existe el proyecto {options['proyecto']}")
+            grafo = OrdenTrabajo.grafo_dependencias(proyecto=proyecto)
+            titulo = f'Proyecto {proyecto.codigo}'
+        else:
+            entrega = EntregaProgramada.objects.filter(pk=options['entrega']).first()
+            if entrega is None:
+                raise CommandError(f"No existe la entrega {options['entrega']}")
+            grafo = OrdenTrabajo.grafo_dependencias(entrega=entrega)
+            titulo = f'Entrega {entrega.pk}'
+
+        if not len(grafo):
+            self.stdout.write(self.style.WARNING(f'⚠️ {titulo}: sin órdenes de trabajo'))
+            return
+
+        try:
+            filas, duracion_total = grafo.ruta_critica()
+        except DependenciaCircular as error:
+            raise CommandError(f'❌ {error}')
+
+        self.stdout.write(f'🧭 {titulo}')
+        self.stdout.write(
+            f"{'OT':<7}{'Depende':<9}{'Estado':<12}{'Días':>5}{'IT':>5}{'FT':>5}{'Holg.':>7}  Fin estimado"
+        )
+        for fila in filas:
+            marca = '🔴' if fila['critica'] else '  '
+            atraso = f" (⚠️ {fila['dias_atraso']} día(s) tarde)" if fila['dias_atraso'] else ''
+            self.stdout.write(
+                f"{fila['numero']:<7}{fila['depende_de'] or '—':<9}{fila['estado']:<12}"
+                f"{fila['duracion']:>5}{fila['inicio_temprano']:>5}{fila['fin_temprano']:>5}"
+                f"{fila['holgura']:>7}  {fila['fecha_fin_estimada']:%d/%m/%Y} {marca}{atraso}"
+            )
+
+        criticas = [f['numero'] for f in filas if f['critica']]
+        self.stdout.write(self.style.SUCCESS(
+            f'📊 {len(filas)} OT, duración restante {duracion_total} día(s), '
+            f'ruta crítica: {" → ".join(criticas) or "—"}'
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:04
+
+import nexusone.administrativa.ordenes.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='documentoorden',
+            options={'ordering': ['nombre'], 'verbose_name': 'Documento de Orden', 'verbose_name_plural': 'Documentos de Órdenes'},
+        ),
+        migrations.AddField(
+            model_name='documentoorden',
+            name='hash_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='documentoorden',
+            name='tamano',
+            field=models.BigIntegerField(default=0, verbose_name='Tamaño (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='documentoorden',
+            name='tipo_contenido',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Tipo de contenido'),
+        ),
+        migrations.AlterField(
+            model_name='documentoorden',
+            name='archivo',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to=nexusone.administrativa.ordenes.models.ruta_documento_ot),
+        ),
+        migrations.AddIndex(
+            model_name='documentoorden',
+            index=models.Index(fields=['orden', 'nombre'], name='doc_orden_nombre_idx'),
+        ),
+    ]
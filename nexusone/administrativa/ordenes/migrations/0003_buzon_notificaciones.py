@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('ordenes', '0002_documentoorden_indice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BuzonNotificaciones',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='buzon_notificaciones', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('no_leidas', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Buzón de notificaciones',
+                'verbose_name_plural': 'Buzones de notificaciones',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificacionPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Notificación pendiente',
+                'verbose_name_plural': 'Notificaciones pendientes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['leida', 'fecha_creacion'], name='notif_leida_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificacionpendiente',
+            name='buzon',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pendientes', to='ordenes.buzonnotificaciones'),
+        ),
+        migrations.AddField(
+            model_name='notificacionpendiente',
+            name='notificacion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pendientes', to='ordenes.notificacion'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificacionpendiente',
+            constraint=models.UniqueConstraint(fields=('buzon', 'notificacion'), name='notif_pendiente_unica'),
+        ),
+    ]
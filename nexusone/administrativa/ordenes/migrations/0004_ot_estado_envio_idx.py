@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0003_buzon_notificaciones'),
+        ('proyectos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['estado', 'fecha_envio'], name='ot_estado_envio_idx'),
+        ),
+    ]
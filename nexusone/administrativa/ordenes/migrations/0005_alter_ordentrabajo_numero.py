@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0004_ot_estado_envio_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ordentrabajo',
+            name='numero',
+            field=models.CharField(blank=True, max_length=5, unique=True, verbose_name='Número OT'),
+        ),
+    ]
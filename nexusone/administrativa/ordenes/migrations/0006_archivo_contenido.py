@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0005_alter_ordentrabajo_numero'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoContenido',
+            fields=[
+                ('hash_sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('archivo', models.FileField(max_length=255, upload_to='')),
+                ('tamano', models.BigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Contenido de archivo',
+                'verbose_name_plural': 'Contenidos de archivos',
+            },
+        ),
+        migrations.AddField(
+            model_name='documentoorden',
+            name='contenido',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documentos', to='ordenes.archivocontenido'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0006_archivo_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordentrabajo',
+            name='duracion_dias',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Días de trabajo que toma la OT (para la ruta crítica)', verbose_name='Duración estimada (días)'),
+        ),
+    ]
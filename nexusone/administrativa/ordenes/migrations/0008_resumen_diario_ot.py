@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def poblar_resumen(apps, schema_editor):
+    """Carga el resumen diario con las OT existentes"""
+    OrdenTrabajo = apps.get_model('ordenes', 'OrdenTrabajo')
+    ResumenDiarioOT = apps.get_model('ordenes', 'ResumenDiarioOT')
+
+    filas = {}
+    campos = ('fecha_apertura', 'fecha_cierre', 'estado', 'proceso', 'constructora', 'proyecto_fk_id', 'cierre_a_tiempo')
+    for ot in OrdenTrabajo.objects.values(*campos).iterator():
+        dimension = (ot['proceso'] or '', ot['constructora'] or '', ot['proyecto_fk_id'])
+        if ot['fecha_apertura']:
+            clave = (timezone.localdate(ot['fecha_apertura']),) + dimension
+            filas.setdefault(clave, ResumenDiarioOT(
+                fecha=clave[0], proceso=clave[1], constructora=clave[2], proyecto_id=clave[3]
+            )).abiertas += 1
+        if ot['estado'] == 'cerrada' and ot['fecha_cierre']:
+            clave = (timezone.localdate(ot['fecha_cierre']),) + dimension
+            fila = filas.setdefault(clave, ResumenDiarioOT(
+                fecha=clave[0], proceso=clave[1], constructora=clave[2], proyecto_id=clave[3]
+            ))
+            fila.cerradas += 1
+            fila.cerradas_a_tiempo += ot['cierre_a_tiempo'] is True
+            fila.cerradas_tarde += ot['cierre_a_tiempo'] is False
+            if ot['fecha_apertura']:
+                fila.segundos_entrega += max(0, int((ot['fecha_cierre'] - ot['fecha_apertura']).total_seconds()))
+    ResumenDiarioOT.objects.bulk_create(filas.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0007_ordentrabajo_duracion_dias'),
+        ('proyectos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioOT',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('proceso', models.CharField(blank=True, max_length=20, verbose_name='Proceso')),
+                ('constructora', models.CharField(blank=True, max_length=40, verbose_name='Constructora')),
+                ('abiertas', models.IntegerField(default=0, verbose_name='Abiertas')),
+                ('cerradas', models.IntegerField(default=0, verbose_name='Cerradas')),
+                ('cerradas_a_tiempo', models.IntegerField(default=0, verbose_name='Cerradas a tiempo')),
+                ('cerradas_tarde', models.IntegerField(default=0, verbose_name='Cerradas tarde')),
+                ('segundos_entrega', models.BigIntegerField(default=0, help_text='Suma de (fecha_cierre - fecha_apertura) de las OT cerradas ese día', verbose_name='Tiempo de entrega acumulado (s)')),
+                ('proyecto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_ot', to='proyectos.proyecto')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de OT',
+                'verbose_name_plural': 'Resúmenes diarios de OT',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha', 'proceso'], name='resumen_ot_fecha_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('proyecto__isnull', False)), fields=('fecha', 'proceso', 'constructora', 'proyecto'), name='resumen_ot_unico_proyecto'), models.UniqueConstraint(condition=models.Q(('proyecto__isnull', True)), fields=('fecha', 'proceso', 'constructora'), name='resumen_ot_unico_sin_proyecto')],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
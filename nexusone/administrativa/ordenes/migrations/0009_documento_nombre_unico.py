@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:00
+
+import os
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def renombrar_duplicados(apps, schema_editor):
+    """
+    Deja un solo documento por (OT, nombre): el más antiguo conserva el nombre
+    y los demás pasan a 'nombre (2).ext', 'nombre (3).ext'... (como nombre_libre).
+    El archivo en disco no cambia.
+    """
+    DocumentoOrden = apps.get_model('ordenes', 'DocumentoOrden')
+    duplicados = (
+        DocumentoOrden.objects.values('orden_id', 'nombre')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    usados_por_orden = {}
+    for grupo in duplicados:
+        orden_id, nombre = grupo['orden_id'], grupo['nombre']
+        if orden_id not in usados_por_orden:
+            usados_por_orden[orden_id] = set(
+                DocumentoOrden.objects.filter(orden_id=orden_id).values_list('nombre', flat=True)
+            )
+        usados = usados_por_orden[orden_id]
+        base, extension = os.path.splitext(nombre)
+        sobrantes = DocumentoOrden.objects.filter(orden_id=orden_id, nombre=nombre).order_by('id')[1:]
+        n = 2
+        for documento in sobrantes:
+            while True:
+                sufijo = f' ({n}){extension}'
+                candidato = f'{base[:255 - len(sufijo)]}{sufijo}'
+                n += 1
+                if candidato not in usados:
+                    break
+            usados.add(candidato)
+            documento.nombre = candidato
+            documento.save(update_fields=['nombre'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordenes', '0008_resumen_diario_ot'),
+    ]
+
+    operations = [
+        migrations.RunPython(renombrar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='documentoorden',
+            constraint=models.UniqueConstraint(fields=('orden', 'nombre'), name='doc_orden_nombre_unico'),
+        ),
+        migrations.RemoveIndex(
+            model_name='documentoorden',
+            name='doc_orden_nombre_idx',
+        ),
+    ]
@@ -1,21 +1,33 @@
 # nexusone/administrativa/ordenes/models.py
-from django.db import models
+import hashlib
+import mimetypes
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
 from django.contrib.auth.models import User
 import os
 
+from nexusone.administrativa.models import Secuencia
+
+from .dependencias import DependenciaCircular, GrafoDependencias
+
 
 def generar_numero_ot():
-    """Genera el siguiente número de OT disponible"""
-    ultimo = OrdenTrabajo.objects.order_by("-id").first()
-    if not ultimo:
-        return "00001"
-    try:
-        ultimo_num = int(ultimo.numero)
-    except Exception:
-        ultimo_num = 0
-    nuevo_num = str(ultimo_num + 1).zfill(5)
-    return nuevo_num
+    """Genera el siguiente número de OT (secuencia atómica, ver Secuencia)"""
+    numero = Secuencia.siguiente(
+        "OT",
+        semilla=lambda: Secuencia.ultimo_entero(OrdenTrabajo.objects.all(), "numero"),
+    )
+    return str(numero).zfill(5)
 
 
 # ==================================================
@@ -64,6 +76,7 @@ class OrdenTrabajo(models.Model):
         ('pausada', 'Pausada'),            # Temporalmente detenida
         ('cerrada', 'Cerrada'),            # Completada
     ]
+    ESTADOS_ABIERTOS = ("pendiente", "abierta", "en_proceso", "pausada")
     
     ORIGEN_CHOICES = [
         ('manual', 'Manual'),
@@ -84,7 +97,7 @@ class OrdenTrabajo(models.Model):
         "Número OT",
         max_length=5,
         unique=True,
-        default=generar_numero_ot
+        blank=True  # se asigna en save() con generar_numero_ot()
     )
     descripcion = models.TextField("Descripción", blank=True)
     
@@ -188,6 +201,11 @@ class OrdenTrabajo(models.Model):
         related_name='ordenes_dependientes_de_esta',
         verbose_name='Depende de OT'
     )
+    duracion_dias = models.PositiveSmallIntegerField(
+        "Duración estimada (días)",
+        default=1,
+        help_text="Días de trabajo que toma la OT (para la ruta crítica)"
+    )
     
     # Asignación
     responsable = models.ForeignKey(
@@ -216,6 +234,9 @@ class OrdenTrabajo(models.Model):
         verbose_name = "Orden de Trabajo"
         verbose_name_plural = "Órdenes de Trabajo"
         ordering = ['-fecha_apertura']
+        indexes = [
+            models.Index(fields=["estado", "fecha_envio"], name="ot_estado_envio_idx"),
+        ]
     
     def __str__(self):
         if self.proyecto_fk:
@@ -224,6 +245,107 @@ class OrdenTrabajo(models.Model):
             return f"OT {self.numero} — {self.get_proyecto_display()}"
         else:
             return f"OT {self.numero} — {self.descripcion[:50]}"
+
+    def clean(self):
+        super().clean()
+        try:
+            self.verificar_dependencia()
+        except DependenciaCircular as error:
+            raise ValidationError({"orden_dependiente": str(error)})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Claves del resumen diario tal como están en la BD (para aplicar solo la diferencia)
+        if all(campo in field_names for campo in CAMPOS_RESUMEN):
+            instancia._claves_resumen = ResumenDiarioOT.claves(dict(zip(field_names, values)))
+        # Dependencia guardada: el ciclo solo se verifica si cambia
+        if "orden_dependiente_id" in field_names:
+            instancia._dependencia_guardada = values[field_names.index("orden_dependiente_id")]
+        return instancia
+
+    def _claves_resumen_guardadas(self):
+        if self._state.adding:
+            return (None, None)
+        if not hasattr(self, "_claves_resumen"):
+            # Cargada con only()/defer(): leer los campos del resumen
+            valores = OrdenTrabajo.objects.filter(pk=self.pk).values(*CAMPOS_RESUMEN).first()
+            return ResumenDiarioOT.claves(valores) if valores else (None, None)
+        return self._claves_resumen
+
+    def save(self, *args, **kwargs):
+        # El número se toma de la secuencia al guardar (no al instanciar el formulario)
+        if not self.numero:
+            self.numero = generar_numero_ot()
+        if getattr(self, "_dependencia_guardada", None) != self.orden_dependiente_id or self._state.adding:
+            self.verificar_dependencia()
+        with transaction.atomic():
+            anteriores = self._claves_resumen_guardadas()
+            super().save(*args, **kwargs)
+            self._dependencia_guardada = self.orden_dependiente_id
+            self._claves_resumen = ResumenDiarioOT.claves(
+                {campo: getattr(self, campo) for campo in CAMPOS_RESUMEN}
+            )
+            ResumenDiarioOT.actualizar(anteriores, self._claves_resumen)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            anteriores = self._claves_resumen_guardadas()
+            resultado = super().delete(*args, **kwargs)
+            ResumenDiarioOT.actualizar(anteriores, (None, None))
+        return resultado
+
+    def verificar_dependencia(self):
+        """
+        Lanza DependenciaCircular si `orden_dependiente` cierra un ciclo.
+        Carga en una consulta el grafo del proyecto/entrega de la OT y lo recorre en memoria.
+        """
+        if not self.orden_dependiente_id:
+            return
+        if self.orden_dependiente_id == self.pk:
+            raise DependenciaCircular([self.numero, self.numero])
+        if not self.pk:
+            return  # una OT nueva no puede ser dependencia de nadie todavía
+
+        alcance = Q(pk__in=[self.pk, self.orden_dependiente_id])
+        if self.proyecto_fk_id:
+            alcance |= Q(proyecto_fk_id=self.proyecto_fk_id)
+        if self.entrega_programada_id:
+            alcance |= Q(entrega_programada_id=self.entrega_programada_id)
+        grafo = GrafoDependencias.cargar(OrdenTrabajo.objects.filter(alcance))
+        grafo.completar_ancestros(OrdenTrabajo.objects.all(), self.orden_dependiente_id)
+        ciclo = grafo.ciclo_desde(self.pk, nuevo_padre=self.orden_dependiente_id)
+        if ciclo:
+            raise DependenciaCircular(ciclo)
+
+    @classmethod
+    def grafo_dependencias(cls, proyecto=None, entrega=None):
+        """GrafoDependencias de las OT de un proyecto o de una entrega (una consulta)"""
+        ordenes = cls.objects.all()
+        if proyecto is not None:
+            ordenes = ordenes.filter(proyecto_fk=proyecto)
+        if entrega is not None:
+            ordenes = ordenes.filter(entrega_programada=entrega)
+        return GrafoDependencias.cargar(ordenes)
+
+    @classmethod
+    def con_bloqueo(cls, queryset=None):
+        """
+        Anota `bloqueada` (la dependencia no está cerrada) y `bloqueada_por` (su número)
+        como subconsultas, para listados sin una consulta por fila.
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        bloqueo = cls.objects.filter(pk=OuterRef("orden_dependiente_id")).exclude(estado="cerrada")
+        return queryset.annotate(
+            bloqueada=Exists(bloqueo),
+            bloqueada_por=Subquery(bloqueo.values("numero")[:1]),
+        )
+
+    @classmethod
+    def siguientes_numeros(cls, cantidad):
+        """Bloque de números de OT para `cantidad` órdenes nuevas (para bulk_create)"""
+        semilla = lambda: Secuencia.ultimo_entero(cls.objects.all(), "numero")
+        return [str(n).zfill(5) for n in Secuencia.reservar("OT", cantidad, semilla)]
     
     # ═══════════════════════════════════════════════
     # PROPERTIES
@@ -239,9 +361,15 @@ class OrdenTrabajo(models.Model):
     @property
     def dependencia_cumplida(self):
         """Verifica si la dependencia está cumplida"""
-        if not self.orden_dependiente:
+        if hasattr(self, "bloqueada"):
+            return not self.bloqueada  # anotado por con_bloqueo()
+        if not self.orden_dependiente_id:
             return True
-        return self.orden_dependiente.estado == 'cerrada'
+        if OrdenTrabajo.orden_dependiente.is_cached(self):
+            return self.orden_dependiente.estado == 'cerrada'
+        return not OrdenTrabajo.objects.filter(
+            pk=self.orden_dependiente_id
+        ).exclude(estado='cerrada').exists()
     
     @property
     def puede_iniciar(self):
@@ -285,7 +413,243 @@ class OrdenTrabajo(models.Model):
 
 
 # ==================================================
-# DOCUMENTO ORDEN (sin cambios)
+# RESUMEN DIARIO (KPI de aperturas y cierres)
+# ==================================================
+# Campos de OrdenTrabajo que determinan en qué fila del resumen cuenta cada OT
+CAMPOS_RESUMEN = (
+    "fecha_apertura", "fecha_cierre", "estado", "proceso",
+    "constructora", "proyecto_fk_id", "cierre_a_tiempo",
+)
+
+
+class ResumenDiarioOT(models.Model):
+    """
+    Conteos por día × proceso × constructora × proyecto: OT abiertas, cerradas,
+    cerradas a tiempo / tarde y suma del tiempo de entrega (apertura → cierre).
+
+    OrdenTrabajo.save()/delete() aplican solo la diferencia (UPDATE ... SET n = n + 1),
+    así que los tableros leen totales y tendencias de esta tabla sin recorrer las OT.
+    `reconstruir_resumen_ots` la recalcula desde cero.
+    """
+    fecha = models.DateField("Fecha")
+    proceso = models.CharField("Proceso", max_length=20, blank=True)
+    constructora = models.CharField("Constructora", max_length=40, blank=True)
+    proyecto = models.ForeignKey(
+        'proyectos.Proyecto',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resumenes_ot'
+    )
+
+    abiertas = models.IntegerField("Abiertas", default=0)
+    cerradas = models.IntegerField("Cerradas", default=0)
+    cerradas_a_tiempo = models.IntegerField("Cerradas a tiempo", default=0)
+    cerradas_tarde = models.IntegerField("Cerradas tarde", default=0)
+    segundos_entrega = models.BigIntegerField(
+        "Tiempo de entrega acumulado (s)",
+        default=0,
+        help_text="Suma de (fecha_cierre - fecha_apertura) de las OT cerradas ese día"
+    )
+
+    class Meta:
+        verbose_name = "Resumen diario de OT"
+        verbose_name_plural = "Resúmenes diarios de OT"
+        ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=["fecha", "proceso"], name="resumen_ot_fecha_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fecha", "proceso", "constructora", "proyecto"],
+                condition=Q(proyecto__isnull=False),
+                name="resumen_ot_unico_proyecto",
+            ),
+            models.UniqueConstraint(
+                fields=["fecha", "proceso", "constructora"],
+                condition=Q(proyecto__isnull=True),
+                name="resumen_ot_unico_sin_proyecto",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.proceso}: {self.abiertas} abiertas, {self.cerradas} cerradas"
+
+    @property
+    def tiempo_entrega_promedio(self):
+        if not self.cerradas:
+            return None
+        return timedelta(seconds=self.segundos_entrega / self.cerradas)
+
+    # ---------- actualización incremental ----------
+
+    @staticmethod
+    def claves(valores):
+        """
+        (clave de apertura, clave de cierre) de una OT a partir de CAMPOS_RESUMEN.
+        La clave de cierre es None mientras la OT no esté cerrada.
+        """
+        dimension = (valores["proceso"] or "", valores["constructora"] or "", valores["proyecto_fk_id"])
+        apertura = None
+        if valores["fecha_apertura"]:
+            apertura = (timezone.localdate(valores["fecha_apertura"]),) + dimension
+        cierre = None
+        if valores["estado"] == "cerrada" and valores["fecha_cierre"]:
+            segundos = 0
+            if valores["fecha_apertura"]:
+                segundos = max(0, int((valores["fecha_cierre"] - valores["fecha_apertura"]).total_seconds()))
+            cierre = (timezone.localdate(valores["fecha_cierre"]),) + dimension + (valores["cierre_a_tiempo"], segundos)
+        return apertura, cierre
+
+    @classmethod
+    def _sumar(cls, fecha, proceso, constructora, proyecto_id, **incrementos):
+        filtro = dict(fecha=fecha, proceso=proceso, constructora=constructora, proyecto_id=proyecto_id)
+        cambios = {campo: F(campo) + valor for campo, valor in incrementos.items()}
+        if cls.objects.filter(**filtro).update(**cambios):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**filtro, **incrementos)
+        except IntegrityError:
+            # Otra solicitud creó la fila al mismo tiempo
+            cls.objects.filter(**filtro).update(**cambios)
+
+    @classmethod
+    def _aplicar_cierre(cls, clave, signo):
+        *dimension, a_tiempo, segundos = clave
+        cls._sumar(
+            *dimension,
+            cerradas=signo,
+            cerradas_a_tiempo=signo if a_tiempo is True else 0,
+            cerradas_tarde=signo if a_tiempo is False else 0,
+            segundos_entrega=signo * segundos,
+        )
+
+    @classmethod
+    def actualizar(cls, anteriores, nuevas):
+        """Mueve los conteos de una OT de sus claves anteriores a las nuevas"""
+        apertura_antes, cierre_antes = anteriores
+        apertura_ahora, cierre_ahora = nuevas
+        if apertura_antes != apertura_ahora:
+            if apertura_antes:
+                cls._sumar(*apertura_antes, abiertas=-1)
+            if apertura_ahora:
+                cls._sumar(*apertura_ahora, abiertas=1)
+        if cierre_antes != cierre_ahora:
+            if cierre_antes:
+                cls._aplicar_cierre(cierre_antes, -1)
+            if cierre_ahora:
+                cls._aplicar_cierre(cierre_ahora, 1)
+
+    # ---------- reconstrucción ----------
+
+    @classmethod
+    def reconstruir(cls, desde=None):
+        """
+        Recalcula el resumen desde las OT (todo, o desde la fecha `desde`).
+        Dos consultas agregadas (aperturas y cierres) y un bulk_create.
+
+        Returns:
+            cantidad de filas del resumen escritas
+        """
+        dimension = ("dia", "proceso", "constructora", "proyecto_fk")
+        aperturas = OrdenTrabajo.objects.filter(fecha_apertura__isnull=False)
+        cierres = OrdenTrabajo.objects.filter(estado="cerrada", fecha_cierre__isnull=False)
+        if desde:
+            aperturas = aperturas.filter(fecha_apertura__date__gte=desde)
+            cierres = cierres.filter(fecha_cierre__date__gte=desde)
+
+        filas = {}
+
+        def fila(valores):
+            clave = tuple(valores[c] for c in dimension)
+            if clave not in filas:
+                filas[clave] = cls(
+                    fecha=clave[0], proceso=clave[1] or "", constructora=clave[2] or "", proyecto_id=clave[3],
+                )
+            return filas[clave]
+
+        for valores in (
+            aperturas.annotate(dia=TruncDate("fecha_apertura"))
+            .values(*dimension).annotate(total=Count("id")).order_by()
+        ):
+            fila(valores).abiertas = valores["total"]
+
+        for valores in (
+            cierres.annotate(dia=TruncDate("fecha_cierre"))
+            .values(*dimension)
+            .annotate(
+                total=Count("id"),
+                a_tiempo=Count("id", filter=Q(cierre_a_tiempo=True)),
+                tarde=Count("id", filter=Q(cierre_a_tiempo=False)),
+                entrega=Sum(
+                    F("fecha_cierre") - F("fecha_apertura"),
+                    filter=Q(fecha_apertura__lte=F("fecha_cierre")),
+                    output_field=models.DurationField(),
+                ),
+            )
+            .order_by()
+        ):
+            resumen = fila(valores)
+            resumen.cerradas = valores["total"]
+            resumen.cerradas_a_tiempo = valores["a_tiempo"]
+            resumen.cerradas_tarde = valores["tarde"]
+            resumen.segundos_entrega = int(valores["entrega"].total_seconds()) if valores["entrega"] else 0
+
+        with transaction.atomic():
+            existentes = cls.objects.all()
+            if desde:
+                existentes = existentes.filter(fecha__gte=desde)
+            existentes.delete()
+            cls.objects.bulk_create(filas.values(), batch_size=1000)
+        return len(filas)
+
+    # ---------- lectura ----------
+
+    @classmethod
+    def totales(cls, desde=None, hasta=None, **filtros):
+        """Totales del periodo (una consulta)"""
+        resumen = cls.objects.filter(**filtros)
+        if desde:
+            resumen = resumen.filter(fecha__gte=desde)
+        if hasta:
+            resumen = resumen.filter(fecha__lte=hasta)
+        totales = resumen.aggregate(
+            abiertas=Coalesce(Sum("abiertas"), 0),
+            cerradas=Coalesce(Sum("cerradas"), 0),
+            cerradas_a_tiempo=Coalesce(Sum("cerradas_a_tiempo"), 0),
+            cerradas_tarde=Coalesce(Sum("cerradas_tarde"), 0),
+            segundos_entrega=Coalesce(Sum("segundos_entrega"), 0),
+        )
+        totales["tiempo_entrega_promedio"] = (
+            timedelta(seconds=totales["segundos_entrega"] / totales["cerradas"]) if totales["cerradas"] else None
+        )
+        return totales
+
+    @classmethod
+    def tendencia(cls, desde, hasta=None, **filtros):
+        """
+        Serie diaria del periodo para gráficas (una consulta sobre el índice de fecha).
+        Filtros opcionales: proceso=..., constructora=..., proyecto=...
+        """
+        resumen = cls.objects.filter(fecha__gte=desde, **filtros)
+        if hasta:
+            resumen = resumen.filter(fecha__lte=hasta)
+        return list(
+            resumen.values("fecha")
+            .annotate(
+                abiertas=Sum("abiertas"),
+                cerradas=Sum("cerradas"),
+                cerradas_a_tiempo=Sum("cerradas_a_tiempo"),
+                cerradas_tarde=Sum("cerradas_tarde"),
+                segundos_entrega=Sum("segundos_entrega"),
+            )
+            .order_by("fecha")
+        )
+
+
+# ==================================================
+# DOCUMENTO ORDEN
 # ==================================================
 def ruta_documento_ot(instance, filename):
     """Define la ruta de almacenamiento de documentos"""
@@ -300,27 +664,316 @@ def ruta_documento_ot(instance, filename):
     return os.path.join("Ordenes", instance.orden.numero, subcarpeta, filename)
 
 
+def carpeta_orden(numero):
+    """Ruta relativa (dentro de MEDIA_ROOT) de la carpeta de una OT"""
+    return f"Ordenes/{numero}"
+
+
+MAX_TAMANO_DOCUMENTO = 50 * 1024 * 1024  # 50 MB por archivo
+CARPETA_BLOBS = "Ordenes/_blobs"
+
+
+class ArchivoDemasiadoGrande(ValueError):
+    """El archivo subido supera MAX_TAMANO_DOCUMENTO"""
+
+    def __init__(self, nombre, limite=MAX_TAMANO_DOCUMENTO):
+        self.nombre = nombre
+        self.limite = limite
+        super().__init__(f"El archivo {nombre} supera el límite de {limite // (1024 * 1024)} MB")
+
+
+class ArchivoContenido(models.Model):
+    """
+    Contenido único de un archivo (almacenamiento direccionado por contenido).
+
+    Cada blob se guarda una sola vez en Ordenes/_blobs/<aa>/<sha256>; los
+    DocumentoOrden de cualquier OT lo referencian y `referencias` cuenta cuántos.
+    Cuando llega a cero se borra la fila y el archivo.
+    """
+    hash_sha256 = models.CharField("SHA-256", max_length=64, primary_key=True)
+    archivo = models.FileField(max_length=255)
+    tamano = models.BigIntegerField("Tamaño (bytes)")
+    referencias = models.PositiveIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Contenido de archivo"
+        verbose_name_plural = "Contenidos de archivos"
+
+    def __str__(self):
+        return f"{self.hash_sha256[:12]} ({self.referencias} ref.)"
+
+    @staticmethod
+    def ruta_blob(hash_sha256):
+        return f"{CARPETA_BLOBS}/{hash_sha256[:2]}/{hash_sha256}"
+
+    @staticmethod
+    def recibir(archivo, limite=MAX_TAMANO_DOCUMENTO):
+        """
+        Escribe el archivo subido en un temporal de la carpeta de blobs,
+        calculando hash y tamaño en la misma pasada.
+        Retorna (ruta_temporal, hash, tamano); lanza ArchivoDemasiadoGrande.
+        """
+        carpeta_tmp = os.path.join(settings.MEDIA_ROOT, CARPETA_BLOBS, "tmp")
+        os.makedirs(carpeta_tmp, exist_ok=True)
+        temporal = os.path.join(carpeta_tmp, uuid.uuid4().hex)
+
+        hasher = hashlib.sha256()
+        tamano = 0
+        try:
+            with open(temporal, "wb") as destino:
+                for chunk in archivo.chunks():
+                    tamano += len(chunk)
+                    if limite and tamano > limite:
+                        raise ArchivoDemasiadoGrande(os.path.basename(archivo.name), limite)
+                    destino.write(chunk)
+                    hasher.update(chunk)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        return temporal, hasher.hexdigest(), tamano
+
+    @classmethod
+    def adquirir(cls, temporal, hash_sha256, tamano):
+        """
+        Suma una referencia al blob `hash_sha256` (creándolo si no existe) y
+        deja el contenido en su ruta definitiva. Usar dentro de una transacción.
+
+        El archivo se mueve con os.replace (un rename, sin copiar datos) aunque
+        el blob ya exista: el contenido es idéntico y así nunca queda una fila
+        apuntando a un archivo borrado por un `liberar` concurrente.
+        """
+        relativa = cls.ruta_blob(hash_sha256)
+        with transaction.atomic():
+            if not cls.objects.filter(pk=hash_sha256).update(referencias=F("referencias") + 1):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            hash_sha256=hash_sha256, archivo=relativa, tamano=tamano, referencias=1
+                        )
+                except IntegrityError:
+                    cls.objects.filter(pk=hash_sha256).update(referencias=F("referencias") + 1)
+
+        destino = os.path.join(settings.MEDIA_ROOT, relativa)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(temporal, destino)
+        return relativa
+
+    @classmethod
+    def liberar(cls, conteos):
+        """
+        Resta referencias ({hash: cantidad}) y borra los blobs que quedan en cero.
+        Los archivos se eliminan después del commit.
+        """
+        conteos = {h: n for h, n in conteos.items() if h and n}
+        if not conteos:
+            return 0
+        with transaction.atomic():
+            for hash_sha256, cantidad in conteos.items():
+                cls.objects.filter(pk=hash_sha256).update(referencias=F("referencias") - cantidad)
+            huerfanos = list(
+                cls.objects.filter(pk__in=list(conteos), referencias__lte=0)
+                .values_list("hash_sha256", "archivo")
+            )
+            cls.objects.filter(pk__in=[h for h, _ in huerfanos], referencias__lte=0).delete()
+            transaction.on_commit(lambda: cls._borrar_archivos(huerfanos))
+        return len(huerfanos)
+
+    @classmethod
+    def _borrar_archivos(cls, huerfanos):
+        """
+        Borra los archivos de blobs sin referencias, cada uno bajo el bloqueo de su fila.
+
+        Se inserta una fila provisional con el mismo hash: si un `adquirir` concurrente
+        ya creó la fila (aunque aún no haya hecho commit) el INSERT espera y falla,
+        y el archivo se conserva; si no, los `adquirir` que lleguen esperan a que
+        termine el borrado antes de dejar el contenido en su ruta.
+        """
+        for hash_sha256, archivo in huerfanos:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(hash_sha256=hash_sha256, archivo=archivo, tamano=0, referencias=0)
+                    default_storage.delete(archivo)
+                    cls.objects.filter(pk=hash_sha256).delete()
+            except IntegrityError:
+                continue  # otra subida volvió a crear el blob
+
+
 class DocumentoOrden(models.Model):
+    INTENTOS_NOMBRE = 5
+
     orden = models.ForeignKey(
         OrdenTrabajo,
         related_name="documentos",
         on_delete=models.CASCADE
     )
     nombre = models.CharField(max_length=255, default="Documento sin nombre")
-    archivo = models.FileField(upload_to=ruta_documento_ot, blank=True, null=True)
+    archivo = models.FileField(upload_to=ruta_documento_ot, max_length=255, blank=True, null=True)
     fecha_subida = models.DateTimeField(auto_now_add=True)
+
+    # 📇 Índice del archivo en disco (evita os.listdir al listar)
+    tamano = models.BigIntegerField("Tamaño (bytes)", default=0)
+    tipo_contenido = models.CharField("Tipo de contenido", max_length=100, blank=True)
+    hash_sha256 = models.CharField("SHA-256", max_length=64, blank=True, db_index=True)
+    # Blob compartido; vacío en documentos antiguos aún no deduplicados
+    contenido = models.ForeignKey(
+        ArchivoContenido,
+        on_delete=models.PROTECT,
+        related_name="documentos",
+        null=True,
+        blank=True
+    )
     
     class Meta:
         verbose_name = "Documento de Orden"
         verbose_name_plural = "Documentos de Órdenes"
+        ordering = ["nombre"]
+        constraints = [
+            # Las descargas buscan por (OT, nombre); también sirve de índice
+            models.UniqueConstraint(fields=["orden", "nombre"], name="doc_orden_nombre_unico"),
+        ]
     
     def __str__(self):
         return self.nombre or (self.archivo.name if self.archivo else "Documento")
 
+    @staticmethod
+    def tipo_de(nombre):
+        """Tipo MIME a partir del nombre del archivo"""
+        return mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+
+    @classmethod
+    def nombre_libre(cls, orden, nombre):
+        """`nombre` o, si ya existe en la OT, 'nombre (2).ext', 'nombre (3).ext'..."""
+        usados = set(
+            cls.objects.filter(orden=orden, nombre__startswith=os.path.splitext(nombre)[0])
+            .values_list("nombre", flat=True)
+        )
+        if nombre not in usados:
+            return nombre
+        base, extension = os.path.splitext(nombre)
+        n = 2
+        while f"{base} ({n}){extension}" in usados:
+            n += 1
+        return f"{base} ({n}){extension}"
+
+    @classmethod
+    def registrar(cls, orden, archivo):
+        """
+        Guarda un archivo subido para la OT en el almacenamiento deduplicado.
+
+        El contenido se escribe una sola vez (ArchivoContenido, por SHA-256) y el
+        documento lo referencia. Si la OT ya tiene ese mismo contenido con ese
+        nombre se retorna el documento existente; si el nombre está tomado por
+        otro contenido se agrega un sufijo en vez de sobrescribir.
+        Lanza ArchivoDemasiadoGrande si supera MAX_TAMANO_DOCUMENTO.
+        """
+        nombre = os.path.basename(archivo.name)
+        temporal, hash_sha256, tamano = ArchivoContenido.recibir(archivo)
+
+        with transaction.atomic():
+            existente = cls.objects.filter(orden=orden, nombre=nombre, hash_sha256=hash_sha256).first()
+            if existente:
+                os.remove(temporal)
+                return existente
+
+            relativa = ArchivoContenido.adquirir(temporal, hash_sha256, tamano)
+            for intento in range(cls.INTENTOS_NOMBRE):
+                try:
+                    # Otra subida concurrente pudo tomar el mismo nombre libre
+                    with transaction.atomic():
+                        return cls.objects.create(
+                            orden=orden,
+                            nombre=cls.nombre_libre(orden, nombre),
+                            archivo=relativa,
+                            contenido_id=hash_sha256,
+                            tamano=tamano,
+                            tipo_contenido=getattr(archivo, "content_type", None) or cls.tipo_de(nombre),
+                            hash_sha256=hash_sha256,
+                        )
+                except IntegrityError:
+                    if intento == cls.INTENTOS_NOMBRE - 1:
+                        raise
+
+    @classmethod
+    def indexar_carpeta(cls, orden, existentes=()):
+        """
+        Documentos (sin guardar) de los archivos en disco de una OT que aún no
+        están indexados. `existentes` son los nombres ya registrados.
+        """
+        base = os.path.join(settings.MEDIA_ROOT, carpeta_orden(orden.numero))
+        if not os.path.isdir(base):
+            return []
+
+        nuevos = []
+        for raiz, _, archivos in os.walk(base):
+            for archivo in sorted(archivos):
+                ruta = os.path.join(raiz, archivo)
+                nombre = os.path.relpath(ruta, base).replace(os.sep, "/")
+                if nombre in existentes:
+                    continue
+                hasher = hashlib.sha256()
+                with open(ruta, "rb") as origen:
+                    for chunk in iter(lambda: origen.read(1024 * 1024), b""):
+                        hasher.update(chunk)
+                nuevos.append(cls(
+                    orden=orden,
+                    nombre=nombre,
+                    archivo=f"{carpeta_orden(orden.numero)}/{nombre}",
+                    tamano=os.path.getsize(ruta),
+                    tipo_contenido=cls.tipo_de(nombre),
+                    hash_sha256=hasher.hexdigest(),
+                ))
+        return nuevos
+
+    @staticmethod
+    def entradas_zip(documentos, carpeta=None):
+        """
+        (ruta absoluta, nombre en el ZIP) de los documentos con archivo, para respuesta_zip.
+        `carpeta`: callable(numero de la OT) -> prefijo del nombre, p. ej. "OT_00012/".
+        """
+        documentos = documentos.exclude(archivo="").exclude(archivo__isnull=True)
+        if carpeta is None:
+            return [
+                (os.path.join(settings.MEDIA_ROOT, archivo), nombre)
+                for archivo, nombre in documentos.values_list("archivo", "nombre")
+            ]
+        return [
+            (os.path.join(settings.MEDIA_ROOT, archivo), f"{carpeta(numero)}{nombre}")
+            for archivo, numero, nombre in documentos.values_list("archivo", "orden__numero", "nombre")
+        ]
+
+    def eliminar_archivo(self):
+        """Borra el registro y libera su blob (o el archivo, si es un documento antiguo)"""
+        with transaction.atomic():
+            self.delete()
+            if self.contenido_id:
+                ArchivoContenido.liberar({self.contenido_id: 1})
+            elif self.archivo:
+                self.archivo.storage.delete(self.archivo.name)
+
+    @classmethod
+    def eliminar_de_orden(cls, orden):
+        """Borra los documentos de una OT liberando sus blobs en bloque"""
+        with transaction.atomic():
+            documentos = cls.objects.filter(orden=orden)
+            conteos = dict(
+                documentos.exclude(contenido=None)
+                .values_list("contenido_id")
+                .annotate(n=Count("id"))
+                .order_by()
+            )
+            documentos.delete()
+            ArchivoContenido.liberar(conteos)
+
 
 # ==================================================
-# NOTIFICACIÓN (sin cambios)
+# NOTIFICACIÓN
 # ==================================================
+CACHE_ULTIMA_NOTIFICACION = "ordenes:notificaciones:ultima_id"
+CACHE_ULTIMA_NOTIFICACION_TTL = 10  # segundos; con varios workers es el retraso máximo
+
+
 class Notificacion(models.Model):
     TIPO_CHOICES = [
         ('nueva_orden', 'Nueva Orden'),
@@ -337,6 +990,8 @@ class Notificacion(models.Model):
     )
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
     mensaje = models.TextField()
+    # Atendida por algún usuario (estado global); la lectura por usuario
+    # vive en BuzonNotificaciones / NotificacionPendiente
     leida = models.BooleanField(default=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     
@@ -344,6 +999,225 @@ class Notificacion(models.Model):
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=["leida", "fecha_creacion"], name="notif_leida_fecha_idx"),
+        ]
     
     def __str__(self):
-        return f"{self.tipo} - {self.orden.numero}"
\ No newline at end of file
+        return f"{self.tipo} - {self.orden.numero}"
+
+    def save(self, *args, **kwargs):
+        nueva = self._state.adding
+        super().save(*args, **kwargs)
+        if nueva:
+            Notificacion.repartir([self])
+
+    @classmethod
+    def repartir(cls, notificaciones):
+        """
+        Entrega notificaciones ya guardadas a todos los buzones existentes:
+        una fila pendiente por buzón y el contador se incrementa con F().
+        bulk_create no pasa por save(): quien lo use debe llamar a este método.
+        """
+        if not notificaciones:
+            return
+        buzones = list(BuzonNotificaciones.objects.values_list("usuario_id", flat=True))
+        with transaction.atomic():
+            for intento in range(3):
+                # Un buzón recién creado (BuzonNotificaciones.de) ya pudo recibirlas
+                existentes = set(
+                    NotificacionPendiente.objects.filter(notificacion__in=notificaciones)
+                    .values_list("buzon_id", "notificacion_id")
+                )
+                nuevas = [
+                    NotificacionPendiente(buzon_id=usuario_id, notificacion=notificacion)
+                    for usuario_id in buzones
+                    for notificacion in notificaciones
+                    if (usuario_id, notificacion.pk) not in existentes
+                ]
+                try:
+                    with transaction.atomic():
+                        NotificacionPendiente.objects.bulk_create(nuevas, batch_size=1000)
+                    break
+                except IntegrityError:
+                    if intento == 2:
+                        raise
+
+            # Sumar a cada buzón solo las filas que recibió (un UPDATE por cantidad distinta)
+            por_cantidad = {}
+            for usuario_id, cantidad in Counter(p.buzon_id for p in nuevas).items():
+                por_cantidad.setdefault(cantidad, []).append(usuario_id)
+            for cantidad, usuarios in por_cantidad.items():
+                BuzonNotificaciones.objects.filter(usuario_id__in=usuarios).update(
+                    no_leidas=F("no_leidas") + cantidad
+                )
+        cache.set(
+            CACHE_ULTIMA_NOTIFICACION,
+            max(n.pk for n in notificaciones),
+            CACHE_ULTIMA_NOTIFICACION_TTL,
+        )
+
+    @classmethod
+    def generar_vencimientos(cls, dias_aviso=2, hoy=None, dry_run=False):
+        """
+        Crea las notificaciones "proxima_envio" (envío dentro de `dias_aviso` días)
+        y "vencida" (fecha de envío ya pasó) de las OT abiertas.
+
+        Una sola consulta (índice estado + fecha_envio) encuentra las OT y descarta
+        con NOT EXISTS las que ya tienen esa notificación; luego bulk_create.
+        El número de consultas no depende de cuántas OT estén abiertas.
+        """
+        hoy = hoy or timezone.localdate()
+        ya_notificada = cls.objects.filter(orden=OuterRef("pk"), tipo=OuterRef("tipo_aviso"))
+        ordenes = (
+            OrdenTrabajo.objects.filter(
+                estado__in=OrdenTrabajo.ESTADOS_ABIERTOS,
+                fecha_envio__lte=hoy + timedelta(days=dias_aviso),
+            )
+            .annotate(tipo_aviso=Case(
+                When(fecha_envio__lt=hoy, then=Value("vencida")),
+                default=Value("proxima_envio"),
+            ))
+            .exclude(Exists(ya_notificada))
+            .order_by("fecha_envio", "id")
+            .values_list("id", "numero", "fecha_envio", "tipo_aviso")
+        )
+
+        nuevas = []
+        for orden_id, numero, fecha_envio, tipo in ordenes:
+            if tipo == "vencida":
+                dias = (hoy - fecha_envio).days
+                mensaje = f"🚨 Orden {numero} VENCIDA hace {dias} día{'s' if dias != 1 else ''} (envío {fecha_envio:%d/%m/%Y})"
+            else:
+                mensaje = f"⏰ Orden {numero} próxima a envío: {fecha_envio:%d/%m/%Y}"
+            nuevas.append(cls(orden_id=orden_id, tipo=tipo, mensaje=mensaje))
+
+        if nuevas and not dry_run:
+            with transaction.atomic():
+                # bulk_create no pasa por save(): se reparten aquí
+                cls.objects.bulk_create(nuevas, batch_size=1000)
+                cls.repartir(nuevas)
+        return nuevas
+
+    @classmethod
+    def ultima_id(cls):
+        """Id de la notificación más reciente (cacheado unos segundos)"""
+        ultima = cache.get(CACHE_ULTIMA_NOTIFICACION)
+        if ultima is None:
+            ultima = cls.objects.aggregate(ultima=Max("id"))["ultima"] or 0
+            cache.set(CACHE_ULTIMA_NOTIFICACION, ultima, CACHE_ULTIMA_NOTIFICACION_TTL)
+        return ultima
+
+
+class BuzonNotificaciones(models.Model):
+    """Estado de notificaciones de un usuario, con el contador de no leídas materializado"""
+    PENDIENTES_INICIALES = 50
+
+    usuario = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="buzon_notificaciones"
+    )
+    no_leidas = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Buzón de notificaciones"
+        verbose_name_plural = "Buzones de notificaciones"
+
+    def __str__(self):
+        return f"{self.usuario} ({self.no_leidas} sin leer)"
+
+    @classmethod
+    def de(cls, usuario):
+        """
+        Buzón del usuario; la primera vez se crea con las notificaciones
+        que nadie ha atendido todavía (índice leida + fecha_creacion).
+        """
+        buzon = cls.objects.filter(usuario=usuario).first()
+        if buzon:
+            return buzon
+
+        with transaction.atomic():
+            buzon, creado = cls.objects.get_or_create(usuario=usuario)
+            if creado:
+                ids = list(
+                    Notificacion.objects.filter(leida=False)
+                    .order_by("-fecha_creacion")
+                    .values_list("id", flat=True)[:cls.PENDIENTES_INICIALES]
+                )
+                NotificacionPendiente.objects.bulk_create(
+                    [NotificacionPendiente(buzon=buzon, notificacion_id=pk) for pk in ids],
+                    ignore_conflicts=True,
+                )
+                buzon.no_leidas = len(ids)
+                buzon.save(update_fields=["no_leidas"])
+        return buzon
+
+    def pendientes_recientes(self, despues_de=None, limite=20):
+        """Notificaciones sin leer, de la más reciente a la más antigua"""
+        notificaciones = Notificacion.objects.filter(pendientes__buzon=self).select_related("orden")
+        if despues_de:
+            notificaciones = notificaciones.filter(id__gt=despues_de)
+        return notificaciones.order_by("-id")[:limite]
+
+    def marcar_leida(self, notificacion_id):
+        """Marca una notificación como leída; retorna False si no estaba pendiente"""
+        with transaction.atomic():
+            borradas, _ = NotificacionPendiente.objects.filter(
+                buzon=self, notificacion_id=notificacion_id
+            ).delete()
+            if borradas:
+                BuzonNotificaciones.objects.filter(pk=self.pk, no_leidas__gt=0).update(
+                    no_leidas=F("no_leidas") - 1
+                )
+        self.refresh_from_db(fields=["no_leidas"])
+        return bool(borradas)
+
+    def marcar_todas(self):
+        """Vacía el buzón; retorna los ids de las notificaciones marcadas"""
+        with transaction.atomic():
+            pendientes = NotificacionPendiente.objects.filter(buzon=self)
+            ids = list(pendientes.values_list("notificacion_id", flat=True))
+            pendientes.delete()
+            BuzonNotificaciones.objects.filter(pk=self.pk).update(no_leidas=0)
+        self.no_leidas = 0
+        return ids
+
+    @classmethod
+    def recalcular(cls, **filtros):
+        """
+        Recalcula los contadores desde las filas pendientes (todos, o los que
+        cumplan `filtros`). Solo para reparar después de borrados en cascada
+        (p. ej. al eliminar una OT); lo normal es sumar/restar con F().
+        """
+        conteo = (
+            NotificacionPendiente.objects.filter(buzon=OuterRef("pk"))
+            .order_by()
+            .values("buzon")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        return cls.objects.filter(**filtros).update(no_leidas=Coalesce(Subquery(conteo), 0))
+
+
+class NotificacionPendiente(models.Model):
+    """Notificación aún no leída por el usuario dueño del buzón"""
+    buzon = models.ForeignKey(
+        BuzonNotificaciones,
+        on_delete=models.CASCADE,
+        related_name="pendientes"
+    )
+    notificacion = models.ForeignKey(
+        Notificacion,
+        on_delete=models.CASCADE,
+        related_name="pendientes"
+    )
+
+    class Meta:
+        verbose_name = "Notificación pendiente"
+        verbose_name_plural = "Notificaciones pendientes"
+        constraints = [
+            models.UniqueConstraint(fields=["buzon", "notificacion"], name="notif_pendiente_unica"),
+        ]
@@ -13,10 +13,12 @@ urlpatterns = [
     path("documento/eliminar/<int:pk>/", views.eliminar_documento, name="eliminar_documento"),
     
     # Descargar archivos
-    path("descargar/<str:numero_ot>/<str:nombre_archivo>/", views.descargar_archivo, name="descargar_archivo"),
+    path("descargar/<str:numero_ot>/<path:nombre_archivo>/", views.descargar_archivo, name="descargar_archivo"),
+    path("descargar-todo/<int:pk>/", views.descargar_todo_orden, name="descargar_todo_orden"),
     
     # ✅ NUEVAS RUTAS DE NOTIFICACIONES
     path("notificaciones/", views.obtener_notificaciones, name="obtener_notificaciones"),
+    path("notificaciones/stream/", views.stream_notificaciones, name="stream_notificaciones"),
     path("notificaciones/<int:notificacion_id>/leer/", views.marcar_leida, name="marcar_leida"),
     path("notificaciones/leer-todas/", views.marcar_todas_leidas, name="marcar_todas_leidas"),
 ]
\ No newline at end of file
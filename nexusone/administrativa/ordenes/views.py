@@ -1,46 +1,89 @@
+import json
 import os
 import shutil
 from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import FileResponse, Http404, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import transaction
+from django.db.models import Count, Prefetch, Sum, prefetch_related_objects
 from django.utils import timezone
 
-from .models import OrdenTrabajo, DocumentoOrden, Notificacion
+from nexusone.administrativa.archivos import respuesta_archivo, respuesta_zip
+
+from .models import (
+    ArchivoDemasiadoGrande, BuzonNotificaciones, DocumentoOrden, Notificacion, OrdenTrabajo, ResumenDiarioOT,
+)
 from .forms import OrdenTrabajoForm
 
 
 # =====================================================
 # 📋 LISTAR ORDENES
 # =====================================================
-@login_required(login_url='/login/')
-def listar_ordenes(request):
-    ordenes = OrdenTrabajo.objects.all().prefetch_related("documentos").order_by("-id")
+ORDENES_POR_PAGINA = 50
 
-    # Para cada orden, obtener archivos del disco
-    for orden in ordenes:
-        carpeta_ot = os.path.join(settings.MEDIA_ROOT, f"Ordenes/{orden.numero}/")
-        if os.path.exists(carpeta_ot):
-            orden.archivos_disponibles = os.listdir(carpeta_ot)
-        else:
-            orden.archivos_disponibles = []
 
-    # Calcular cierres a tiempo y tardíos
-    ordenes_cerradas = [ot for ot in ordenes if ot.estado == "cerrada" and ot.fecha_cierre]
-    cierres_a_tiempo = sum([1 for ot in ordenes_cerradas if ot.cierre_a_tiempo == True])
-    cierres_tardios = sum([1 for ot in ordenes_cerradas if ot.cierre_a_tiempo == False])
+@login_required(login_url='/login/')
+def listar_ordenes(request):
+    """
+    Órdenes paginadas por llave (id descendente).
+    Los documentos salen del índice DocumentoOrden: no se toca el disco.
+    El bloqueo por dependencia es una subconsulta EXISTS (OrdenTrabajo.con_bloqueo).
+    """
+    ordenes = OrdenTrabajo.con_bloqueo().annotate(
+        num_documentos=Count("documentos"),
+        tamano_documentos=Sum("documentos__tamano"),
+    )
+
+    cursor = request.GET.get("cursor", "")
+    if cursor.isdigit():
+        ordenes = ordenes.filter(id__lt=int(cursor))
+
+    pagina = list(ordenes.order_by("-id")[:ORDENES_POR_PAGINA + 1])
+    hay_siguiente = len(pagina) > ORDENES_POR_PAGINA
+    pagina = pagina[:ORDENES_POR_PAGINA]
+    prefetch_related_objects(
+        pagina,
+        Prefetch(
+            "documentos",
+            queryset=DocumentoOrden.objects.only("id", "orden_id", "nombre", "tamano", "tipo_contenido"),
+        ),
+    )
+
+    # Cierres a tiempo y tardíos desde el resumen diario (no recorre las OT)
+    cierres = ResumenDiarioOT.totales()
 
     return render(request, "administrativa/ordenes/listar_orden.html", {
-        "ordenes": ordenes,
-        "cierres_a_tiempo": cierres_a_tiempo,
-        "cierres_tardios": cierres_tardios,
+        "ordenes": pagina,
+        "cierres_a_tiempo": cierres["cerradas_a_tiempo"],
+        "cierres_tardios": cierres["cerradas_tarde"],
+        "siguiente_cursor": pagina[-1].id if hay_siguiente else None,
+        "es_primera_pagina": not cursor.isdigit(),
+        "token_notificaciones": token_notificaciones(request.user),
     })
 
 
 # =====================================================
 # ➕ CREAR ORDEN
 # =====================================================
+def _guardar_archivos(request, orden, archivos):
+    """
+    Registra los archivos subidos; los que superan el límite se reportan y se omiten.
+    Retorna cuántos se guardaron.
+    """
+    guardados = 0
+    for archivo in archivos:
+        try:
+            DocumentoOrden.registrar(orden, archivo)
+            guardados += 1
+        except ArchivoDemasiadoGrande as e:
+            messages.error(request, f"⚠️ {e}")
+    return guardados
+
+
 @login_required(login_url='/login/')
 def crear_orden(request):
     if request.method == "POST":
@@ -58,17 +101,13 @@ def crear_orden(request):
             archivos = request.FILES.getlist("archivos")
 
             if archivos:
-                # Guardar archivos en el disco
-                carpeta_ot = os.path.join(settings.MEDIA_ROOT, f"Ordenes/{orden.numero}/")
-                os.makedirs(carpeta_ot, exist_ok=True)
+                # Guardar archivos (deduplicados por contenido) y registrarlos en el índice
+                guardados = _guardar_archivos(request, orden, archivos)
                 
-                for archivo in archivos:
-                    ruta_archivo = os.path.join(carpeta_ot, archivo.name)
-                    with open(ruta_archivo, "wb+") as destino:
-                        for chunk in archivo.chunks():
-                            destino.write(chunk)
-                
-                messages.success(request, "✅ Orden creada y archivos guardados correctamente.")
+                if guardados == len(archivos):
+                    messages.success(request, "✅ Orden creada y archivos guardados correctamente.")
+                else:
+                    messages.warning(request, f"⚠️ Orden creada; se guardaron {guardados} de {len(archivos)} archivos.")
             else:
                 messages.success(request, "✅ Orden creada correctamente (sin archivos).")
 
@@ -91,13 +130,6 @@ def crear_orden(request):
 def editar_orden(request, pk):
     orden = get_object_or_404(OrdenTrabajo, pk=pk)
 
-    # Obtener archivos del disco
-    carpeta_ot = os.path.join(settings.MEDIA_ROOT, f"Ordenes/{orden.numero}/")
-    if os.path.exists(carpeta_ot):
-        archivos_disponibles = os.listdir(carpeta_ot)
-    else:
-        archivos_disponibles = []
-
     if request.method == "POST":
         form = OrdenTrabajoForm(request.POST, request.FILES, instance=orden)
         if form.is_valid():
@@ -106,15 +138,12 @@ def editar_orden(request, pk):
             # Subir nuevos archivos
             nuevos_archivos = request.FILES.getlist("archivos")
             if nuevos_archivos:
-                os.makedirs(carpeta_ot, exist_ok=True)
-                
-                for archivo in nuevos_archivos:
-                    ruta_archivo = os.path.join(carpeta_ot, archivo.name)
-                    with open(ruta_archivo, "wb+") as destino:
-                        for chunk in archivo.chunks():
-                            destino.write(chunk)
+                guardados = _guardar_archivos(request, orden, nuevos_archivos)
                 
-                messages.success(request, "✅ Nuevos archivos subidos correctamente.")
+                if guardados == len(nuevos_archivos):
+                    messages.success(request, "✅ Nuevos archivos subidos correctamente.")
+                elif guardados:
+                    messages.warning(request, f"⚠️ Se subieron {guardados} de {len(nuevos_archivos)} archivos.")
 
             messages.success(request, "✅ Orden actualizada correctamente.")
             return redirect("administrativa:ordenes:listar_ordenes")
@@ -126,7 +155,7 @@ def editar_orden(request, pk):
     return render(request, "administrativa/ordenes/form.html", {
         "form": form,
         "orden": orden,
-        "archivos_disponibles": archivos_disponibles,
+        "documentos": orden.documentos.all(),
         "title": "Editar Orden de Trabajo",
     })
 
@@ -140,9 +169,9 @@ def eliminar_documento(request, pk):
     archivo = request.GET.get("archivo")
 
     if archivo:
-        ruta = os.path.join(settings.MEDIA_ROOT, f"Ordenes/{orden.numero}/{archivo}")
-        if os.path.exists(ruta):
-            os.remove(ruta)
+        documento = orden.documentos.filter(nombre=archivo).first()
+        if documento:
+            documento.eliminar_archivo()
             messages.success(request, "🗑️ Archivo eliminado correctamente.")
         else:
             messages.error(request, "⚠️ Archivo no encontrado.")
@@ -173,9 +202,18 @@ def eliminar_orden(request, pk):
         except Exception as e:
             messages.warning(request, f"⚠️ Error al eliminar carpeta: {e}")
 
-    # Borrar registros en DB
-    orden.documentos.all().delete()
-    orden.delete()
+    # Borrar registros en DB (y liberar los blobs compartidos)
+    DocumentoOrden.eliminar_de_orden(orden)
+    with transaction.atomic():
+        # El borrado en cascada se lleva notificaciones pendientes: ajustar
+        # solo los contadores de los buzones que tenían alguna de esta OT
+        afectados = list(
+            BuzonNotificaciones.objects.filter(pendientes__notificacion__orden=orden)
+            .values_list("pk", flat=True).distinct()
+        )
+        orden.delete()
+        if afectados:
+            BuzonNotificaciones.recalcular(pk__in=afectados)
     messages.success(request, "🗑️ Orden eliminada correctamente.")
     return redirect("administrativa:ordenes:listar_ordenes")
 
@@ -229,59 +267,144 @@ def cerrar_orden(request, pk):
 # =====================================================
 @login_required(login_url='/login/')
 def descargar_archivo(request, numero_ot, nombre_archivo):
-    """Descargar archivo del disco de Render"""
-    ruta_archivo = os.path.join(settings.MEDIA_ROOT, f"Ordenes/{numero_ot}/{nombre_archivo}")
-    
-    if os.path.exists(ruta_archivo):
-        return FileResponse(
-            open(ruta_archivo, 'rb'), 
-            as_attachment=True, 
-            filename=nombre_archivo
-        )
-    else:
+    """Descargar un documento de la OT (el archivo puede ser un blob compartido)"""
+    documento = get_object_or_404(
+        DocumentoOrden.objects.only("archivo", "nombre", "contenido"),
+        orden__numero=numero_ot,
+        nombre=nombre_archivo,
+    )
+    if not documento.archivo:
         raise Http404("Archivo no encontrado")
+    return respuesta_archivo(
+        request,
+        documento.archivo.path,
+        nombre=os.path.basename(documento.nombre),
+        adjunto=True,
+        inmutable=documento.contenido_id is not None,
+    )
+
+
+@login_required(login_url='/login/')
+def descargar_todo_orden(request, pk):
+    """Descargar todos los documentos de la OT en un ZIP generado al vuelo"""
+    orden = get_object_or_404(OrdenTrabajo.objects.only("numero"), pk=pk)
+    entradas = DocumentoOrden.entradas_zip(orden.documentos.all())
+    if not entradas:
+        raise Http404("La orden no tiene documentos")
+    return respuesta_zip(f"OT_{orden.numero}.zip", entradas)
 
 
 # =====================================================
 # 🔔 SISTEMA DE NOTIFICACIONES
 # =====================================================
+TOKEN_NOTIFICACIONES_SALT = "ordenes.notificaciones"
+TOKEN_NOTIFICACIONES_MAX_AGE = 12 * 3600
+SSE_REINTENTO_MS = 30000  # mismo intervalo que el polling anterior
+
+
+def token_notificaciones(usuario):
+    """Token firmado para el stream (evita sesión + usuario en cada reconexión)"""
+    return signing.dumps(usuario.pk, salt=TOKEN_NOTIFICACIONES_SALT)
+
+
+def _serializar_notificacion(n):
+    return {
+        'id': n.id,
+        'orden_id': n.orden_id,
+        'tipo': n.tipo,
+        'mensaje': n.mensaje,
+        'fecha': timezone.localtime(n.fecha_creacion).strftime('%d/%m/%Y %H:%M')
+    }
+
+
+def _evento_sse(evento, datos, id_evento=None):
+    lineas = []
+    if id_evento is not None:
+        lineas.append(f"id: {id_evento}")
+    lineas.append(f"event: {evento}")
+    lineas.append(f"data: {json.dumps(datos, ensure_ascii=False)}")
+    return "\n".join(lineas) + "\n\n"
+
+
+def stream_notificaciones(request):
+    """
+    Server-Sent Events de notificaciones, reanudable desde el último id visto.
+
+    El navegador (EventSource) reenvía el header Last-Event-ID al reconectar.
+    La respuesta se cierra de inmediato y `retry` fija la próxima reconexión:
+    así no se ocupa un worker sync de gunicorn por pestaña abierta.
+    Si no hay notificaciones nuevas no se consulta la base de datos
+    (token firmado en vez de sesión y último id cacheado).
+
+    Con el token vencido se usa la sesión y se envía un evento `token` con uno
+    nuevo para que la página reabra el stream; sin sesión responde 403.
+    """
+    token_nuevo = None
+    try:
+        usuario_id = signing.loads(
+            request.GET.get("token", ""),
+            salt=TOKEN_NOTIFICACIONES_SALT,
+            max_age=TOKEN_NOTIFICACIONES_MAX_AGE,
+        )
+    except signing.BadSignature:
+        if not request.user.is_authenticated:
+            return HttpResponseForbidden("Token de notificaciones inválido o vencido")
+        usuario_id = request.user.pk
+        token_nuevo = token_notificaciones(request.user)
+
+    ultimo_visto = request.headers.get("Last-Event-ID") or request.GET.get("desde", "")
+    ultimo_visto = int(ultimo_visto) if str(ultimo_visto).isdigit() else None
+
+    partes = [f"retry: {SSE_REINTENTO_MS}\n\n"]
+    if token_nuevo:
+        partes.append(_evento_sse("token", {'token': token_nuevo}))
+    ultima = Notificacion.ultima_id()
+
+    if ultimo_visto is None or ultima > ultimo_visto:
+        buzon = BuzonNotificaciones.objects.filter(usuario_id=usuario_id).first()
+        if buzon is None:
+            buzon = BuzonNotificaciones.de(get_object_or_404(User, pk=usuario_id))
+        nuevas = list(buzon.pendientes_recientes(despues_de=ultimo_visto))
+        partes.append(_evento_sse("estado", {
+            'count': buzon.no_leidas,
+            'inicial': ultimo_visto is None,
+            'notificaciones': [_serializar_notificacion(n) for n in nuevas],
+        }, id_evento=ultima))
+    else:
+        partes.append(": sin cambios\n\n")
+
+    response = HttpResponse("".join(partes), content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 
 @login_required(login_url='/login/')
 def obtener_notificaciones(request):
-    """Obtiene todas las notificaciones no leídas"""
-    notificaciones = Notificacion.objects.filter(leida=False).select_related('orden')[:20]
-    
-    data = {
-        'count': notificaciones.count(),
-        'notificaciones': [
-            {
-                'id': n.id,
-                'orden_id': n.orden.id,
-                'tipo': n.tipo,
-                'mensaje': n.mensaje,
-                'fecha': timezone.localtime(n.fecha_creacion).strftime('%d/%m/%Y %H:%M')
-            }
-            for n in notificaciones
-        ]
-    }
-    
-    return JsonResponse(data)
+    """Notificaciones no leídas del usuario (JSON, sin polling en la vista de órdenes)"""
+    buzon = BuzonNotificaciones.de(request.user)
+    notificaciones = buzon.pendientes_recientes()
+
+    return JsonResponse({
+        'count': buzon.no_leidas,
+        'notificaciones': [_serializar_notificacion(n) for n in notificaciones],
+    })
 
 
 @login_required(login_url='/login/')
 def marcar_leida(request, notificacion_id):
-    """Marca una notificación como leída"""
-    try:
-        notificacion = Notificacion.objects.get(id=notificacion_id)
-        notificacion.leida = True
-        notificacion.save()
-        return JsonResponse({'success': True})
-    except Notificacion.DoesNotExist:
-        return JsonResponse({'success': False}, status=404)
+    """Marca una notificación como leída para el usuario"""
+    buzon = BuzonNotificaciones.de(request.user)
+    if not buzon.marcar_leida(notificacion_id):
+        return JsonResponse({'success': False, 'count': buzon.no_leidas}, status=404)
+    Notificacion.objects.filter(id=notificacion_id, leida=False).update(leida=True)
+    return JsonResponse({'success': True, 'count': buzon.no_leidas})
 
 
 @login_required(login_url='/login/')
 def marcar_todas_leidas(request):
-    """Marca todas las notificaciones como leídas"""
-    Notificacion.objects.filter(leida=False).update(leida=True)
-    return JsonResponse({'success': True})
\ No newline at end of file
+    """Marca todas las notificaciones del usuario como leídas"""
+    buzon = BuzonNotificaciones.de(request.user)
+    ids = buzon.marcar_todas()
+    Notificacion.objects.filter(id__in=ids, leida=False).update(leida=True)
+    return JsonResponse({'success': True, 'count': 0})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Constructora, Proyecto, ItemContratado, APU
+from .models import Constructora, Proyecto, ItemContratado, APU, APUMaterial
 
 
 # ===================================
@@ -78,6 +78,7 @@ class ItemContratadoAdmin(admin.ModelAdmin):
     list_filter = ('proyecto',)
     search_fields = ('item', 'proyecto__nombre', 'proyecto__codigo')
     readonly_fields = ('valor_total_display',)
+    autocomplete_fields = ('insumo',)
 
     def valor_total_display(self, obj):
         return f"${obj.valor_total:,.2f}"
@@ -87,9 +88,17 @@ class ItemContratadoAdmin(admin.ModelAdmin):
 # ===================================
 # ⚙️ ADMIN APU
 # ===================================
+class APUMaterialInline(admin.TabularInline):
+    model = APUMaterial
+    extra = 1
+    fields = ['insumo', 'cantidad_requerida', 'precio_unitario', 'observaciones']
+    autocomplete_fields = ['insumo']
+
+
 @admin.register(APU)
 class APUAdmin(admin.ModelAdmin):
     list_display = ('codigo', 'nombre', 'categoria', 'activo', 'creado', 'actualizado')
     list_filter = ('categoria', 'activo')
     search_fields = ('codigo', 'nombre')
     readonly_fields = ('creado', 'actualizado')
+    inlines = [APUMaterialInline]
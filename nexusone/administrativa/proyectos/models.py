@@ -4,6 +4,8 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from decimal import Decimal
 
+from nexusone.administrativa.models import Secuencia
+
 
 # ==================================================
 # CONSTRUCTORA (MANTENER - ya existe)
@@ -395,17 +397,12 @@ class Cotizacion(models.Model):
         if not self.codigo:
             from datetime import datetime
             year = datetime.now().year
-            last = Cotizacion.objects.filter(
-                codigo__startswith=f'COT-{year}'
-            ).order_by('-id').first()
-            
-            if last:
-                last_num = int(last.codigo.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            self.codigo = f'COT-{year}-{new_num:03d}'
+            prefijo = f'COT-{year}-'
+            new_num = Secuencia.siguiente(
+                f'COT-{year}',
+                semilla=lambda: Secuencia.ultimo_sufijo(Cotizacion.objects.all(), 'codigo', prefijo),
+            )
+            self.codigo = f'{prefijo}{new_num:03d}'
         
         super().save(*args, **kwargs)
 
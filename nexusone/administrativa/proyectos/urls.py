@@ -21,4 +21,7 @@ urlpatterns = [
     # CONTRATOS
     path("proyecto/<int:pk>/contrato/descargar/", views.descargar_contrato, name="descargar_contrato"),
     path("proyecto/<int:pk>/contrato/eliminar/", views.eliminar_contrato, name="eliminar_contrato"),
+
+    # DOCUMENTOS DE LAS OTs
+    path("proyecto/<int:pk>/documentos/descargar/", views.descargar_documentos_proyecto, name="descargar_documentos_proyecto"),
 ]
\ No newline at end of file
@@ -1,8 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.db import transaction
+from nexusone.administrativa.archivos import respuesta_archivo, respuesta_zip
+from nexusone.administrativa.ordenes.models import DocumentoOrden
 from .models import Constructora, Proyecto
 from .forms import ConstructoraForm, ProyectoForm, ItemContratadoFormSet
 import os
@@ -271,13 +273,30 @@ def descargar_contrato(request, pk):
     if not os.path.exists(proyecto.contrato.path):
         raise Http404("El archivo de contrato no existe")
     
-    return FileResponse(
-        open(proyecto.contrato.path, 'rb'),
-        as_attachment=True,
-        filename=f"Contrato_{proyecto.codigo}.pdf"
+    return respuesta_archivo(
+        request,
+        proyecto.contrato.path,
+        nombre=f"Contrato_{proyecto.codigo}.pdf",
+        adjunto=True,
     )
 
 
+# ===================================
+# 📦 DESCARGAR DOCUMENTOS DE LAS OTs
+# ===================================
+@login_required(login_url='/login/')
+def descargar_documentos_proyecto(request, pk):
+    """Todos los documentos de las OTs del proyecto en un ZIP (una carpeta por OT)"""
+    proyecto = get_object_or_404(Proyecto.objects.only("codigo"), pk=pk)
+    entradas = DocumentoOrden.entradas_zip(
+        DocumentoOrden.objects.filter(orden__proyecto_fk=proyecto).order_by("orden__numero", "nombre"),
+        carpeta=lambda numero: f"OT_{numero}/",
+    )
+    if not entradas:
+        raise Http404("Las órdenes de este proyecto no tienen documentos")
+    return respuesta_zip(f"Documentos_{proyecto.codigo}.zip", entradas)
+
+
 # ===================================
 # 🗑️ ELIMINAR CONTRATO
 # ===================================
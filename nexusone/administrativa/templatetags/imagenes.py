@@ -0,0 +1,11 @@
+from django import template
+
+from nexusone.administrativa.imagenes import url_rendicion
+
+register = template.Library()
+
+
+@register.filter
+def rendicion(archivo, nombre="miniatura"):
+    """URL de la miniatura / tamaño medio de un ImageField (o del original si aún no existe)"""
+    return url_rendicion(archivo, nombre)
@@ -67,6 +67,7 @@ class MaterialOrdenAdmin(admin.ModelAdmin):
     list_filter = ('estado', 'fecha_asignacion')
     search_fields = ('orden__numero', 'insumo__nombre', 'insumo__codigo')
     readonly_fields = ('fecha_asignacion',)
+    autocomplete_fields = ('insumo',)
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
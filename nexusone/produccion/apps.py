@@ -5,4 +5,8 @@ from django.apps import AppConfig
 class ProduccionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nexusone.produccion'
-    verbose_name = 'Producción'
\ No newline at end of file
+    verbose_name = 'Producción'
+
+    def ready(self):
+        from . import indicadores
+        indicadores.conectar_senales()
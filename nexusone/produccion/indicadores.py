@@ -0,0 +1,154 @@
+# nexusone/produccion/indicadores.py
+"""
+Indicadores del dashboard de producción.
+Los usan `dashboard_produccion` (HTML), `dashboard_datos` (JSON) y `dashboard_stream` (SSE).
+
+- Todos los conteos salen de una sola consulta con agregación condicional
+  (Count(..., filter=Q(...))) sobre OrdenTrabajo
+- El resultado se cachea unos segundos; guardar una OT, registrar un avance o
+  sincronizar eventos sube un sello en la BD (Secuencia) y cada worker lo compara
+  antes de usar su caché, que es por proceso (ver invalidar / conectar_senales)
+- `version` es un hash del contenido: el JSON responde 304 y el SSE no envía
+  nada mientras los números no cambien
+"""
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from nexusone.administrativa.models import Secuencia
+from nexusone.administrativa.ordenes.models import OrdenTrabajo, ResumenDiarioOT
+
+CACHE_CLAVE = "produccion:dashboard"
+CACHE_TTL = 10  # segundos; solo acota cambios que no pasan por invalidar()
+SECUENCIA_SELLO = "produccion.dashboard"
+DIAS_RIESGO = 3
+DIAS_TENDENCIA = 30
+ESTADOS_ACTIVOS = ("abierta", "en_proceso")
+ULTIMAS_OTS = 10
+
+
+def _conteos(hoy):
+    """Una consulta: activas, cerradas hoy, atrasadas, en riesgo y activas por proceso"""
+    activas = Q(estado__in=ESTADOS_ACTIVOS)
+    inicio_dia = timezone.make_aware(datetime.combine(hoy, time.min))
+    agregados = {
+        "activas": Count("id", filter=activas),
+        "completadas_hoy": Count(
+            "id",
+            filter=Q(estado="cerrada", fecha_cierre__gte=inicio_dia, fecha_cierre__lt=inicio_dia + timedelta(days=1)),
+        ),
+        "atrasadas": Count("id", filter=activas & Q(fecha_envio__lt=hoy)),
+        "en_riesgo": Count(
+            "id", filter=activas & Q(fecha_envio__gte=hoy, fecha_envio__lte=hoy + timedelta(days=DIAS_RIESGO))
+        ),
+    }
+    for clave, _ in OrdenTrabajo.PROCESO_CHOICES:
+        agregados[f"proceso_{clave}"] = Count("id", filter=activas & Q(proceso=clave))
+    conteos = OrdenTrabajo.objects.aggregate(**agregados)
+
+    por_proceso = [
+        {"proceso": clave, "nombre": nombre, "total": conteos.pop(f"proceso_{clave}")}
+        for clave, nombre in OrdenTrabajo.PROCESO_CHOICES
+    ]
+    return conteos, [p for p in por_proceso if p["total"]]
+
+
+def _ultimas_ots(hoy):
+    ordenes = OrdenTrabajo.con_bloqueo().filter(
+        estado__in=ESTADOS_ACTIVOS + ("pendiente",)
+    ).order_by("-prioridad", "fecha_envio").only(
+        "id", "numero", "proceso", "prioridad", "estado", "fecha_envio", "descripcion"
+    )[:ULTIMAS_OTS]
+    return [
+        {
+            "id": ot.id,
+            "numero": ot.numero,
+            "descripcion": ot.descripcion[:60],
+            "proceso": ot.get_proceso_display(),
+            "prioridad": ot.prioridad,
+            "estado": ot.estado,
+            "estado_display": ot.get_estado_display(),
+            "fecha_envio": ot.fecha_envio.strftime("%d/%m/%Y") if ot.fecha_envio else None,
+            "atrasada": bool(ot.fecha_envio and ot.fecha_envio < hoy),
+            "bloqueada_por": ot.bloqueada_por,
+        }
+        for ot in ordenes
+    ]
+
+
+def calcular(hoy=None):
+    """Indicadores sin caché (3 consultas: conteos, últimas OT y tendencia)"""
+    hoy = hoy or timezone.localdate()
+    conteos, por_proceso = _conteos(hoy)
+    tendencia = [
+        {
+            "fecha": dia["fecha"].isoformat(),
+            "abiertas": dia["abiertas"],
+            "cerradas": dia["cerradas"],
+            "cerradas_a_tiempo": dia["cerradas_a_tiempo"],
+            "cerradas_tarde": dia["cerradas_tarde"],
+        }
+        for dia in ResumenDiarioOT.tendencia(desde=hoy - timedelta(days=DIAS_TENDENCIA - 1), hasta=hoy)
+    ]
+    datos = {
+        "fecha": hoy.isoformat(),
+        **conteos,
+        "por_proceso": por_proceso,
+        "ultimas_ots": _ultimas_ots(hoy),
+        "tendencia": tendencia,
+        "cerradas_30_dias": sum(dia["cerradas"] for dia in tendencia),
+        "a_tiempo_30_dias": sum(dia["cerradas_a_tiempo"] for dia in tendencia),
+    }
+    contenido = json.dumps(datos, sort_keys=True).encode()
+    datos["version"] = hashlib.sha1(contenido).hexdigest()[:16]
+    return datos
+
+
+def _sello():
+    """Contador compartido por todos los workers; sube con cada cambio confirmado"""
+    return Secuencia.objects.filter(nombre=SECUENCIA_SELLO).values_list("valor", flat=True).first() or 0
+
+
+def obtener():
+    """
+    Indicadores cacheados hasta CACHE_TTL segundos.
+    La caché es por proceso: se usa solo si su sello coincide con el de la BD
+    (una consulta por índice), así un cambio hecho en otro worker se ve en la
+    siguiente petición y no al vencer el TTL.
+    """
+    sello = _sello()  # antes de calcular: un cambio concurrente deja el sello viejo en caché
+    cacheado = cache.get(CACHE_CLAVE)
+    if cacheado is not None:
+        sello_cacheado, datos = cacheado
+        if sello_cacheado == sello and datos["fecha"] == timezone.localdate().isoformat():
+            return datos
+    datos = calcular()
+    cache.set(CACHE_CLAVE, (sello, datos), CACHE_TTL)
+    return datos
+
+
+def invalidar(**kwargs):
+    """
+    Al confirmar la transacción en curso sube el sello en la BD (lo ven todos
+    los workers) y descarta la caché local. Antes del commit otra petición
+    podría volver a cachear los números viejos.
+    """
+    def al_confirmar():
+        cache.delete(CACHE_CLAVE)
+        Secuencia.reservar(SECUENCIA_SELLO)
+
+    # robust: el cambio ya se confirmó; si el sello no sube (p. ej. base bloqueada)
+    # se registra en el log y los demás workers lo ven al vencer CACHE_TTL
+    transaction.on_commit(al_confirmar, robust=True)
+
+
+def conectar_senales():
+    """Cualquier cambio de una OT invalida el dashboard"""
+    post_save.connect(invalidar, sender=OrdenTrabajo, dispatch_uid="produccion_dashboard_save")
+    post_delete.connect(invalidar, sender=OrdenTrabajo, dispatch_uid="produccion_dashboard_delete")
@@ -0,0 +1,115 @@
+"""
+Comando para medir los reportes de paradas (PausaProduccion.reporte / disponibilidad)
+Uso: python manage.py benchmark_pausas [--pausas 100000] [--ordenes 200] [--dias 90]
+
+Crea OT temporales con `pausas` pausas repartidas en los últimos `dias` días,
+mide cada agrupación del reporte y la disponibilidad por proceso, y verifica
+que el total calculado en SQL coincida con la suma de PausaProduccion.duracion.
+Muestra el plan del filtro por periodo (debe usar pausa_periodo_idx, creado por
+la migración administrativa 0003 en bases existentes).
+Las OT temporales y sus pausas se eliminan al terminar.
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nexusone.administrativa.ordenes.models import OrdenTrabajo
+from nexusone.produccion.models import PausaProduccion
+
+LOTE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Mide los reportes de paradas de producción sobre un volumen grande de pausas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pausas', type=int, default=100000, help='Pausas a generar (default: 100000)')
+        parser.add_argument('--ordenes', type=int, default=200, help='OT temporales (default: 200)')
+        parser.add_argument('--dias', type=int, default=90, help='Días hacia atrás del periodo (default: 90)')
+
+    def handle(self, *args, **options):
+        cantidad = max(1, options['pausas'])
+        dias = max(1, options['dias'])
+        ahora = timezone.now()
+        desde = ahora - timedelta(days=dias)
+        aleatorio = random.Random(42)
+        motivos = [clave for clave, _ in PausaProduccion.MOTIVO_CHOICES]
+        procesos = [clave for clave, _ in OrdenTrabajo.PROCESO_CHOICES]
+
+        ordenes = [
+            OrdenTrabajo.objects.create(
+                descripcion='OT temporal benchmark_pausas',
+                proceso=procesos[i % len(procesos)],
+                estado='en_proceso',
+            )
+            for i in range(max(1, options['ordenes']))
+        ]
+        ids = [orden.pk for orden in ordenes]
+
+        try:
+            OrdenTrabajo.objects.filter(pk__in=ids).update(fecha_inicio_real=desde)
+
+            inicio = time.perf_counter()
+            python_total = timedelta(0)
+            for base in range(0, cantidad, LOTE):
+                n = min(LOTE, cantidad - base)
+                pausas = PausaProduccion.objects.bulk_create([
+                    PausaProduccion(
+                        orden=aleatorio.choice(ordenes),
+                        motivo=aleatorio.choice(motivos),
+                        descripcion='benchmark',
+                        activa=False,
+                    )
+                    for _ in range(n)
+                ])
+                # fecha_inicio es auto_now_add: se fija después, como en la sincronización por lotes
+                for pausa in pausas:
+                    pausa.fecha_inicio = desde + timedelta(seconds=aleatorio.uniform(0, dias * 86400 - 7200))
+                    pausa.fecha_fin = pausa.fecha_inicio + timedelta(seconds=aleatorio.randint(60, 7200))
+                    python_total += pausa.duracion
+                PausaProduccion.objects.bulk_update(pausas, ['fecha_inicio', 'fecha_fin'])
+            self.stdout.write(f'🧪 {cantidad:,} pausas en {len(ids)} OT generadas en {time.perf_counter() - inicio:.1f}s')
+
+            # Referencia: sumar la propiedad duracion en Python (trae todas las filas)
+            inicio = time.perf_counter()
+            en_python = sum(
+                (p.duracion for p in PausaProduccion.objects.filter(orden_id__in=ids).only('fecha_inicio', 'fecha_fin')),
+                timedelta(0),
+            )
+            self.stdout.write(f'🐍 Suma en Python: {(time.perf_counter() - inicio) * 1000:,.0f} ms')
+
+            plan = PausaProduccion.en_periodo(desde, ahora).explain()
+            self.stdout.write(f'🔎 Plan del filtro por periodo: {plan}')
+            if 'pausa_periodo_idx' not in plan:
+                self.stdout.write(self.style.WARNING('⚠️ El filtro por periodo no usa pausa_periodo_idx'))
+
+            filtro = {'orden_id__in': ids}
+            for por in PausaProduccion.AGRUPACIONES:
+                inicio = time.perf_counter()
+                filas = PausaProduccion.reporte(por, desde=desde, hasta=ahora, **filtro)
+                milisegundos = (time.perf_counter() - inicio) * 1000
+                self.stdout.write(f'⏱️ reporte por {por}: {len(filas)} fila(s) en {milisegundos:,.0f} ms')
+
+                total = sum((fila['total'] for fila in filas), timedelta(0))
+                if sum(fila['pausas'] for fila in filas) != cantidad:
+                    raise CommandError(f'❌ El reporte por {por} no cuenta todas las pausas')
+                if abs(total - python_total) > timedelta(seconds=1) or abs(en_python - python_total) > timedelta(seconds=1):
+                    raise CommandError(f'❌ El total por {por} ({total}) no coincide con Python ({python_total})')
+
+            inicio = time.perf_counter()
+            disponibilidad = PausaProduccion.disponibilidad(desde, ahora)
+            milisegundos = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(f'⏱️ disponibilidad por proceso en {milisegundos:,.0f} ms')
+            for fila in disponibilidad:
+                if fila['disponibilidad'] is not None:
+                    self.stdout.write(f"   {fila['nombre']}: {fila['disponibilidad']:.1%}")
+
+            self.stdout.write(self.style.SUCCESS(
+                f'📊 Totales consistentes: {python_total.total_seconds() / 3600:,.1f} h en pausa'
+            ))
+        finally:
+            OrdenTrabajo.objects.filter(pk__in=ids).delete()
@@ -0,0 +1,112 @@
+"""
+Comando para medir y verificar la planificación de operarios (produccion.planificacion)
+Uso: python manage.py benchmark_planificacion [--ordenes 5000] [--operarios 100] [--repeticiones 5] [--limite 1.0]
+
+Genera en memoria (sin tocar la base de datos) OT con proceso, prioridad, cantidad,
+fecha de envío y cadenas de dependencias, y operarios de uno o dos procesos; mide
+Planificador.planificar() y verifica el plan: ninguna OT sin planificar, cada
+operario atiende su proceso, sin tareas superpuestas por operario y ninguna OT
+empieza antes de que termine su dependencia.
+"""
+
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nexusone.administrativa.ordenes.models import OrdenTrabajo
+from nexusone.produccion.planificacion import Planificador
+
+
+class Command(BaseCommand):
+    help = 'Mide la planificación de operarios con capacidad finita sobre datos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ordenes', type=int, default=5000, help='OT a planificar (default: 5000)')
+        parser.add_argument('--operarios', type=int, default=100, help='Operarios disponibles (default: 100)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Corridas a medir (default: 5)')
+        parser.add_argument('--limite', type=float, default=1.0, help='Segundos máximos por corrida (default: 1.0)')
+
+    def handle(self, *args, **options):
+        n_ordenes = max(1, options['ordenes'])
+        n_operarios = max(1, options['operarios'])
+        aleatorio = random.Random(42)
+        hoy = timezone.localdate()
+        procesos = [clave for clave, _ in OrdenTrabajo.PROCESO_CHOICES]
+        prioridades = [clave for clave, _ in OrdenTrabajo.PRIORIDAD_CHOICES]
+
+        ordenes = {}
+        for id_orden in range(1, n_ordenes + 1):
+            producir = Decimal(aleatorio.randint(0, 50))
+            ordenes[id_orden] = {
+                'id': id_orden,
+                'numero': f'{id_orden:05d}',
+                # ~30 % depende de una OT anterior (cadenas sin ciclos)
+                'orden_dependiente_id': aleatorio.randint(1, id_orden - 1) if id_orden > 1 and aleatorio.random() < 0.3 else None,
+                'estado': aleatorio.choice(['pendiente', 'abierta', 'en_proceso']),
+                'duracion_dias': aleatorio.randint(1, 5),
+                'fecha_envio': hoy + timedelta(days=aleatorio.randint(-5, 120)) if aleatorio.random() < 0.9 else None,
+                'proceso': aleatorio.choice(procesos),
+                'prioridad': aleatorio.choice(prioridades),
+                'cantidad_producir': producir,
+                'cantidad_producida': Decimal(aleatorio.randint(0, int(producir))),
+            }
+        operarios = {
+            id_operario: {
+                'id': id_operario,
+                'nombre': f'Operario {id_operario}',
+                'procesos': set(aleatorio.sample(procesos, aleatorio.choice([1, 1, 2]))),
+            }
+            for id_operario in range(1, n_operarios + 1)
+        }
+        # Un 5 % de las OT ya tiene operario asignado
+        asignadas = {
+            id_orden: aleatorio.randint(1, n_operarios)
+            for id_orden in aleatorio.sample(sorted(ordenes), n_ordenes // 20)
+        }
+
+        tiempos = []
+        for _ in range(max(1, options['repeticiones'])):
+            inicio = time.perf_counter()
+            plan = Planificador(ordenes, operarios, asignadas, hoy=hoy).planificar()
+            tiempos.append(time.perf_counter() - inicio)
+
+        self.stdout.write(
+            f'⏱️ {n_ordenes:,} OT × {n_operarios} operarios: '
+            f'mejor {min(tiempos) * 1000:,.0f} ms, promedio {sum(tiempos) / len(tiempos) * 1000:,.0f} ms'
+        )
+        self._verificar(plan, ordenes, operarios, asignadas)
+
+        ocupados = [horas for horas in plan['carga'].values() if horas]
+        atrasadas = sum(1 for t in plan['tareas'] if t['dias_atraso'])
+        self.stdout.write(
+            f'   {len(plan["tareas"]) - len(plan["sin_operario"]):,} tareas en {len(ocupados)} operarios '
+            f'({min(ocupados, default=0):,.0f}-{max(ocupados, default=0):,.0f} h cada uno), '
+            f'{atrasadas:,} terminan después de su fecha de envío, fin del plan {max(t["fecha_fin"] for t in plan["tareas"]):%d/%m/%Y}'
+        )
+        if max(tiempos) > options['limite']:
+            raise CommandError(f'❌ Una corrida tardó {max(tiempos):.2f}s (límite {options["limite"]}s)')
+        self.stdout.write(self.style.SUCCESS('📊 Plan válido: capacidad, procesos y dependencias respetados'))
+
+    def _verificar(self, plan, ordenes, operarios, asignadas):
+        tareas = {t['orden_id']: t for t in plan['tareas']}
+        if len(tareas) != len(ordenes):
+            raise CommandError(f'❌ Se planificaron {len(tareas)} de {len(ordenes)} OT')
+
+        for tarea in plan['tareas']:
+            padre = ordenes[tarea['orden_id']]['orden_dependiente_id']
+            if padre in tareas and tarea['inicio'] < tareas[padre]['fin'] - 1e-9:
+                raise CommandError(f"❌ La OT {tarea['numero']} empieza antes de terminar su dependencia")
+            operario = tarea['operario_id']
+            if operario is not None and not tarea['fija'] and tarea['proceso'] not in operarios[operario]['procesos']:
+                raise CommandError(f"❌ La OT {tarea['numero']} quedó con un operario de otro proceso")
+            if tarea['orden_id'] in asignadas and operario != asignadas[tarea['orden_id']]:
+                raise CommandError(f"❌ La OT {tarea['numero']} perdió su operario asignado")
+
+        for id_operario, secuencia in plan['por_operario'].items():
+            for anterior, siguiente in zip(secuencia, secuencia[1:]):
+                if siguiente['inicio'] < anterior['fin'] - 1e-9:
+                    raise CommandError(f'❌ El operario {id_operario} tiene tareas superpuestas')
@@ -1,11 +1,40 @@
 # nexusone/produccion/models.py
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import models, transaction
+from django.db.models import (
+    Avg, Case, Count, DateTimeField, DurationField, ExpressionWrapper, F, Q, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least, TruncWeek
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 # Importar OrdenTrabajo desde administrativa
 from nexusone.administrativa.ordenes.models import OrdenTrabajo
 
+from . import indicadores
+
+
+CENTESIMAS = Decimal('0.01')
+
+
+def a_cantidad(valor):
+    """Decimal con 2 decimales (como los DecimalField de cantidades) desde str/int/float/Decimal"""
+    try:
+        return Decimal(str(valor).strip().replace(',', '.')).quantize(CENTESIMAS)
+    except InvalidOperation:
+        raise ValueError(f"Cantidad inválida: {valor}")
+
+
+class ProduccionExcedida(ValueError):
+    """El avance haría superar la cantidad a producir de la OT"""
+
+    def __init__(self, orden_id, cantidad):
+        self.orden_id = orden_id
+        self.cantidad = cantidad
+        super().__init__(f"La cantidad excede lo requerido (OT {orden_id}, avance {cantidad})")
+
 
 # ==================================================
 # AVANCE DE PRODUCCIÓN
@@ -64,24 +93,71 @@ class AvanceProduccion(models.Model):
         return f"OT-{self.orden.numero}: +{self.cantidad_avance} ({self.fecha_registro.strftime('%d/%m/%Y %H:%M')})"
     
     def save(self, *args, **kwargs):
-        """Al guardar, actualizar la cantidad producida en la OT"""
-        # Si es un nuevo registro
-        if not self.pk:
-            # Calcular cantidad acumulada
-            ultimo_avance = AvanceProduccion.objects.filter(
-                orden=self.orden
-            ).order_by('-fecha_registro').first()
-            
-            if ultimo_avance:
-                self.cantidad_acumulada = ultimo_avance.cantidad_acumulada + self.cantidad_avance
-            else:
-                self.cantidad_acumulada = self.cantidad_avance
-        
-        super().save(*args, **kwargs)
-        
-        # Actualizar la OT
-        self.orden.cantidad_producida = self.cantidad_acumulada
-        self.orden.save(update_fields=['cantidad_producida'])
+        """
+        Un avance nuevo suma su cantidad a la OT con un UPDATE atómico
+        (cantidad_producida = cantidad_producida + n) que bloquea solo esa fila
+        hasta el commit: dos registros simultáneos no leen el mismo "último"
+        acumulado. `cantidad_acumulada` es el total de la OT tras este avance.
+        """
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        self.cantidad_avance = a_cantidad(self.cantidad_avance)
+        with transaction.atomic():
+            producida, estado, inicio_real = self.sumar_a_orden(self.orden_id, self.cantidad_avance)
+            self.cantidad_acumulada = producida
+            super().save(*args, **kwargs)
+
+        # Mantener al día la instancia de la OT que tiene quien llama
+        self.orden.cantidad_producida = producida
+        self.orden.estado = estado
+        self.orden.fecha_inicio_real = inicio_real
+
+    @staticmethod
+    def sumar_a_orden(orden_id, cantidad, fecha=None):
+        """
+        Suma `cantidad` a la OT en un solo UPDATE condicionado a no superar
+        cantidad_producir; una OT pendiente/abierta pasa a en_proceso
+        (fecha_inicio_real = `fecha` o ahora, si no tenía).
+
+        Returns:
+            (cantidad_producida, estado, fecha_inicio_real) después del UPDATE
+        """
+        if cantidad <= 0:
+            raise ValueError("La cantidad debe ser mayor a cero")
+
+        sin_limite = Q(cantidad_producir__isnull=True) | Q(cantidad_producir=0)
+        actualizados = OrdenTrabajo.objects.filter(
+            sin_limite | Q(cantidad_producida__lte=F('cantidad_producir') - cantidad),
+            pk=orden_id,
+        ).update(
+            cantidad_producida=F('cantidad_producida') + cantidad,
+            estado=Case(
+                When(estado__in=['pendiente', 'abierta'], then=Value('en_proceso')),
+                default=F('estado'),
+            ),
+            fecha_inicio_real=Coalesce(F('fecha_inicio_real'), Value(fecha or timezone.now())),
+        )
+        if not actualizados:
+            raise ProduccionExcedida(orden_id, cantidad)
+        indicadores.invalidar()  # update() no emite post_save
+
+        # La fila sigue bloqueada por el UPDATE: esta lectura ve nuestro total
+        return OrdenTrabajo.objects.filter(pk=orden_id).values_list(
+            'cantidad_producida', 'estado', 'fecha_inicio_real'
+        ).get()
+
+    @classmethod
+    def registrar(cls, orden, cantidad, usuario=None, observaciones='', evidencia=None):
+        """Registra un avance de producción (ver save)"""
+        return cls.objects.create(
+            orden=orden,
+            cantidad_avance=a_cantidad(cantidad),
+            registrado_por=usuario,
+            observaciones=observaciones,
+            evidencia=evidencia,
+        )
 
 
 # ==================================================
@@ -216,30 +292,62 @@ class MaterialOrden(models.Model):
         return 0
     
     def asignar_material(self, cantidad, usuario):
-        """Asigna material del inventario a esta OT"""
-        if cantidad > self.cantidad_faltante:
-            raise ValueError("No se puede asignar más de lo requerido")
-        
-        # Verificar stock disponible
-        if self.insumo.stock_actual < cantidad:
-            raise ValueError("Stock insuficiente en inventario")
-        
-        # Crear movimiento de salida en el kardex
+        """Asigna material del inventario a esta OT (ver asignar_lote)"""
+        self.asignar_lote(self.orden, [(self, cantidad)], usuario)
+        self.refresh_from_db(fields=['cantidad_asignada', 'estado', 'fecha_asignacion', 'asignado_por'])
+
+    @classmethod
+    def asignar_lote(cls, orden, asignaciones, usuario):
+        """
+        Asigna varios materiales de una OT en una sola transacción.
+
+        `asignaciones` es una lista de (material_orden, cantidad); las cantidades
+        pueden ser fraccionarias. El stock se descuenta con UPDATE condicionales
+        (MovimientoKardex.registrar_salidas) y la asignación de cada material solo
+        avanza si no supera lo requerido, así dos operarios asignando a la vez no
+        dejan el inventario negativo ni sobreasignan. Si una línea falla, no se
+        asigna ninguna (ValueError / StockInsuficiente).
+        """
         from nexusone.administrativa.inventario.models import MovimientoKardex
-        MovimientoKardex.objects.create(
-            insumo=self.insumo,
-            tipo='salida',
-            cantidad=int(cantidad),
-            observacion=f'Asignado a OT-{self.orden.numero}',
-            fecha=timezone.now()
-        )
-        
-        # Actualizar asignación
-        self.cantidad_asignada += cantidad
-        self.estado = 'asignado' if self.cantidad_asignada >= self.cantidad_requerida else 'pendiente'
-        self.fecha_asignacion = timezone.now()
-        self.asignado_por = usuario
-        self.save()
+
+        lineas = []
+        for material, cantidad in asignaciones:
+            cantidad = Decimal(str(cantidad))
+            if material.orden_id != orden.pk:
+                raise ValueError(f"{material} no pertenece a la OT-{orden.numero}")
+            if cantidad <= 0:
+                raise ValueError("La cantidad a asignar debe ser mayor que cero")
+            lineas.append((material, cantidad))
+
+        # Orden de bloqueo en dos fases: primero las filas de MaterialOrden por pk
+        # (aquí) y luego los saldos por insumo (registrar_salidas los ordena por
+        # su cuenta). Dos lotes de la misma OT con las líneas en otro orden
+        # toman los bloqueos en el mismo orden y no se bloquean mutuamente
+        lineas.sort(key=lambda linea: linea[0].pk)
+
+        ahora = timezone.now()
+        with transaction.atomic():
+            for material, cantidad in lineas:
+                actualizados = cls.objects.filter(
+                    pk=material.pk,
+                    cantidad_asignada__lte=F('cantidad_requerida') - cantidad,
+                ).update(
+                    cantidad_asignada=F('cantidad_asignada') + cantidad,
+                    estado=Case(
+                        When(cantidad_requerida__lte=F('cantidad_asignada') + cantidad, then=Value('asignado')),
+                        default=Value('pendiente'),
+                    ),
+                    fecha_asignacion=ahora,
+                    asignado_por=usuario,
+                )
+                if not actualizados:
+                    raise ValueError(f"No se puede asignar más de lo requerido (insumo {material.insumo_id})")
+
+            MovimientoKardex.registrar_salidas(
+                [(material.insumo_id, cantidad) for material, cantidad in lineas],
+                observacion=f'Asignado a OT-{orden.numero}',
+                fecha=ahora,
+            )
 
 
 # ==================================================
@@ -278,10 +386,24 @@ class PausaProduccion(models.Model):
     
     activa = models.BooleanField("Activa", default=True)
     
+    # Agrupaciones del reporte de paradas: nombre -> campos de values()
+    AGRUPACIONES = {
+        'motivo': ('motivo',),
+        'proceso': ('orden__proceso',),
+        'orden': ('orden_id', 'orden__numero'),
+        'proyecto': ('orden__proyecto_fk_id', 'orden__proyecto_fk__nombre', 'orden__proyecto'),
+        'semana': ('semana',),
+        'operario': ('registrado_por_id', 'registrado_por__username'),
+    }
+    
     class Meta:
         verbose_name = "Pausa de Producción"
         verbose_name_plural = "Pausas de Producción"
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Filtro por periodo de los reportes (pausas que se solapan con [desde, hasta))
+            models.Index(fields=['fecha_inicio', 'fecha_fin'], name='pausa_periodo_idx'),
+        ]
     
     def __str__(self):
         return f"OT-{self.orden.numero}: {self.get_motivo_display()}"
@@ -303,4 +425,109 @@ class PausaProduccion(models.Model):
         # Cambiar estado de la OT de 'pausada' a 'en_proceso'
         if self.orden.estado == 'pausada':
             self.orden.estado = 'en_proceso'
-            self.orden.save(update_fields=['estado'])
\ No newline at end of file
+            self.orden.save(update_fields=['estado'])
+    
+    # ═══════════════════════════════════════════════
+    # REPORTES DE PARADAS (calculados en la base de datos)
+    # ═══════════════════════════════════════════════
+    @staticmethod
+    def tiempo_en_periodo(inicio, fin, desde=None, hasta=None, ahora=None):
+        """
+        Expresión SQL con la duración de [inicio, fin] recortada a [desde, hasta);
+        un `fin` nulo (pausa u OT abierta) cuenta hasta `ahora`.
+        """
+        ahora = ahora or timezone.now()
+        fin = Coalesce(fin, Value(ahora, output_field=DateTimeField()))
+        inicio = F(inicio) if isinstance(inicio, str) else inicio
+        if hasta:
+            fin = Least(fin, Value(hasta, output_field=DateTimeField()))
+        if desde:
+            inicio = Greatest(inicio, Value(desde, output_field=DateTimeField()))
+        return ExpressionWrapper(fin - inicio, output_field=DurationField())
+    
+    @classmethod
+    def en_periodo(cls, desde=None, hasta=None):
+        """Pausas que se solapan con [desde, hasta)"""
+        pausas = cls.objects.all()
+        if hasta:
+            pausas = pausas.filter(fecha_inicio__lt=hasta)
+        if desde:
+            pausas = pausas.filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gt=desde))
+        return pausas
+    
+    @classmethod
+    def reporte(cls, por='motivo', desde=None, hasta=None, **filtros):
+        """
+        Tiempo total y promedio de pausa agrupado por `por` (ver AGRUPACIONES),
+        en una sola consulta GROUP BY. Las pausas abiertas cuentan hasta ahora y,
+        con desde/hasta, cada pausa se recorta al periodo.
+        Filtros opcionales: motivo=..., orden__proceso=..., orden__proyecto_fk=...
+        
+        Returns:
+            lista de dicts con los campos de la agrupación + pausas, total, promedio
+            (timedelta), de mayor a menor tiempo total
+        """
+        if por not in cls.AGRUPACIONES:
+            raise ValueError(f"Agrupación inválida: {por}")
+        
+        pausas = cls.en_periodo(desde, hasta).filter(**filtros).annotate(
+            duracion_sql=cls.tiempo_en_periodo('fecha_inicio', F('fecha_fin'), desde, hasta),
+        )
+        if por == 'semana':
+            pausas = pausas.annotate(semana=TruncWeek('fecha_inicio'))
+        return list(
+            pausas.values(*cls.AGRUPACIONES[por])
+            .annotate(
+                pausas=Count('id'),
+                total=Sum('duracion_sql'),
+                promedio=Avg('duracion_sql'),
+            )
+            .order_by('-total')
+        )
+    
+    @classmethod
+    def disponibilidad(cls, desde, hasta):
+        """
+        Disponibilidad por proceso en [desde, hasta):
+        1 - tiempo en pausa / tiempo en producción, donde el tiempo en producción es
+        el solapamiento de [fecha_inicio_real, fecha_cierre o ahora] de cada OT con
+        el periodo. Dos consultas GROUP BY (OT y pausas).
+        
+        Returns:
+            lista de dicts: proceso, nombre, ordenes, produccion, pausa (timedelta),
+            disponibilidad (0..1, None sin tiempo en producción)
+        """
+        ahora = timezone.now()
+        produccion = {
+            fila['proceso']: fila
+            for fila in OrdenTrabajo.objects.filter(
+                Q(fecha_cierre__isnull=True) | Q(fecha_cierre__gt=desde),
+                fecha_inicio_real__lt=hasta,
+            )
+            .values('proceso')
+            .annotate(
+                ordenes=Count('id'),
+                produccion=Sum(cls.tiempo_en_periodo('fecha_inicio_real', F('fecha_cierre'), desde, hasta, ahora)),
+            )
+        }
+        pausa = dict(
+            cls.en_periodo(desde, hasta)
+            .values('orden__proceso')
+            .annotate(total=Sum(cls.tiempo_en_periodo('fecha_inicio', F('fecha_fin'), desde, hasta, ahora)))
+            .values_list('orden__proceso', 'total')
+        )
+        
+        filas = []
+        for clave, nombre in OrdenTrabajo.PROCESO_CHOICES:
+            fila = produccion.get(clave, {})
+            tiempo_produccion = fila.get('produccion') or timedelta(0)
+            tiempo_pausa = min(pausa.get(clave) or timedelta(0), tiempo_produccion)
+            filas.append({
+                'proceso': clave,
+                'nombre': nombre,
+                'ordenes': fila.get('ordenes', 0),
+                'produccion': tiempo_produccion,
+                'pausa': tiempo_pausa,
+                'disponibilidad': 1 - tiempo_pausa / tiempo_produccion if tiempo_produccion else None,
+            })
+        return filas
\ No newline at end of file
@@ -0,0 +1,298 @@
+# nexusone/produccion/planificacion.py
+"""
+Planificación de operarios con capacidad finita para las OT abiertas.
+La usan las vistas `planificacion` / `aplicar_planificacion` y el comando
+`benchmark_planificacion`.
+
+- Entradas: OT abiertas/pendientes (proceso, cantidad, prioridad, fecha de envío,
+  dependencia) y operarios disponibles: usuarios activos de los grupos de cada
+  proceso cuyo empleado no está de vacaciones, incapacitado ni suspendido
+- Trabajo de cada OT en horas = duracion_dias × jornada × fracción pendiente
+  (cantidad_producir - cantidad_producida)
+- Heurística de lista con colas de prioridad: la OT lista más urgente
+  (prioridad, fecha de envío y trabajo que habilita, heredados de las OT que
+  dependen de ella) va al operario de su proceso que se libera primero, nunca
+  antes de que termine su dependencia
+- Las asignaciones activas se respetan: esa OT sigue con su operario
+- Todo en memoria sobre diccionarios (3 consultas para cargar), sin consultas por OT
+"""
+import heapq
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from nexusone.administrativa.ordenes.dependencias import CAMPOS_NODO, GrafoDependencias
+from nexusone.administrativa.ordenes.models import OrdenTrabajo
+
+from .models import AsignacionOperario
+
+# Grupos de usuarios (ver comando crear-usuarios) → proceso que atienden
+GRUPOS_PROCESO = {
+    "Mecanizados": "mecanizado",
+    "Ensamble": "ensamble",
+    "Despacho": "despacho",
+}
+ESTADOS_NO_DISPONIBLE = ("inactivo", "vacaciones", "incapacidad", "suspendido")
+ESTADOS_PLANIFICABLES = ("pendiente", "abierta", "en_proceso", "pausada")
+RANGO_PRIORIDAD = {"urgente": 0, "alta": 1, "media": 2, "baja": 3}
+HORAS_JORNADA = 8
+DIAS_LABORABLES = (0, 1, 2, 3, 4, 5)  # lunes a sábado
+CAMPOS_PLAN = CAMPOS_NODO + ("proceso", "prioridad", "cantidad_producir", "cantidad_producida")
+
+
+class Planificador:
+    """
+    Plan de una corrida: operarios con su hora libre y OT con su trabajo pendiente.
+    Las horas se cuentan en horas laborables desde el inicio de `hoy`.
+    """
+
+    def __init__(self, ordenes, operarios, asignadas=None, hoy=None, horas_jornada=HORAS_JORNADA):
+        # ordenes: {id: {CAMPOS_PLAN}}
+        # operarios: {id: {"id", "nombre", "procesos": set}}
+        # asignadas: {orden_id: operario_id} con asignación activa
+        self.grafo = GrafoDependencias(ordenes)
+        self.ordenes = ordenes
+        self.operarios = operarios
+        self.asignadas = asignadas or {}
+        self.hoy = hoy or timezone.localdate()
+        self.horas_jornada = horas_jornada
+        self._dias = []
+
+    @classmethod
+    def cargar(cls, hoy=None):
+        """Lee OT, operarios y asignaciones activas (3 consultas)"""
+        ordenes = {
+            fila["id"]: fila
+            for fila in OrdenTrabajo.objects.filter(estado__in=ESTADOS_PLANIFICABLES)
+            .order_by()
+            .values(*CAMPOS_PLAN)
+        }
+
+        operarios = {}
+        for fila in (
+            User.objects.filter(is_active=True, groups__name__in=GRUPOS_PROCESO)
+            .exclude(empleado__estado__in=ESTADOS_NO_DISPONIBLE)
+            .values("id", "username", "first_name", "last_name", "groups__name")
+        ):
+            operario = operarios.setdefault(fila["id"], {
+                "id": fila["id"],
+                "nombre": f"{fila['first_name']} {fila['last_name']}".strip() or fila["username"],
+                "procesos": set(),
+            })
+            operario["procesos"].add(GRUPOS_PROCESO[fila["groups__name"]])
+
+        asignadas = {}
+        for orden_id, operario_id in (
+            AsignacionOperario.objects.filter(activo=True, orden_id__in=ordenes, operario_id__in=operarios)
+            .order_by("fecha_asignacion")
+            .values_list("orden_id", "operario_id")
+        ):
+            asignadas.setdefault(orden_id, operario_id)
+
+        return cls(ordenes, operarios, asignadas, hoy=hoy)
+
+    # ---------- trabajo y urgencia ----------
+
+    def horas(self, orden):
+        """Horas de trabajo pendientes de la OT"""
+        total = (orden["duracion_dias"] or 0) * self.horas_jornada
+        producir = orden["cantidad_producir"]
+        if producir:
+            pendiente = max(0, min(1, 1 - float(orden["cantidad_producida"] or 0) / float(producir)))
+            total *= pendiente
+        return total
+
+    def _urgencias(self, orden_topologico, horas):
+        """
+        Clave de cada OT para la cola de listas. Una OT hereda la prioridad y la
+        fecha de envío más exigentes de las que dependen de ella, y `cola` es el
+        trabajo de la cadena más larga que habilita (desempate: primero la que más libera).
+        """
+        rango, envio, cola = {}, {}, {}
+        for id_orden in reversed(orden_topologico):
+            orden = self.ordenes[id_orden]
+            rango[id_orden] = RANGO_PRIORIDAD.get(orden["prioridad"], len(RANGO_PRIORIDAD))
+            envio[id_orden] = orden["fecha_envio"] or date.max
+            cola[id_orden] = horas[id_orden]
+            for sucesor in self.grafo.sucesores[id_orden]:
+                rango[id_orden] = min(rango[id_orden], rango[sucesor])
+                envio[id_orden] = min(envio[id_orden], envio[sucesor])
+                cola[id_orden] = max(cola[id_orden], horas[id_orden] + cola[sucesor])
+        return {
+            id_orden: (rango[id_orden], envio[id_orden].toordinal(), -cola[id_orden], id_orden)
+            for id_orden in orden_topologico
+        }
+
+    # ---------- calendario ----------
+
+    def fecha(self, hora, fin=False):
+        """Día laborable en que cae la hora `hora` del plan"""
+        if fin and hora > 0:
+            hora -= 1e-9  # una tarea que termina justo al cierre de la jornada es de ese día
+        dia = int(hora // self.horas_jornada)
+        while len(self._dias) <= dia:
+            siguiente = self._dias[-1] + timedelta(days=1) if self._dias else self.hoy
+            while siguiente.weekday() not in DIAS_LABORABLES:
+                siguiente += timedelta(days=1)
+            self._dias.append(siguiente)
+        return self._dias[dia]
+
+    # ---------- planificación ----------
+
+    def planificar(self):
+        """
+        Returns:
+            dict con
+            - tareas: en el orden en que se planificaron, cada una con orden_id, numero,
+              proceso, prioridad, operario_id, posicion, inicio / fin (horas), fecha_inicio,
+              fecha_fin, fecha_envio, dias_atraso, fija (ya estaba asignada)
+            - por_operario: {operario_id: [tareas en secuencia]}
+            - sin_operario: tareas de procesos sin operarios disponibles
+            - carga: {operario_id: horas planificadas}
+        """
+        orden_topologico = self.grafo.orden_topologico()  # DependenciaCircular si hay ciclos
+        horas = {id_orden: self.horas(self.ordenes[id_orden]) for id_orden in orden_topologico}
+        claves = self._urgencias(orden_topologico, horas)
+
+        # Operarios por proceso, cada cola ordenada por la hora en que se libera el operario
+        libre = {id_operario: 0.0 for id_operario in self.operarios}
+        colas_operarios = {}
+        for id_operario, operario in self.operarios.items():
+            for proceso in operario["procesos"]:
+                colas_operarios.setdefault(proceso, []).append((0.0, id_operario))
+        for cola in colas_operarios.values():
+            heapq.heapify(cola)
+
+        # OT listas: sin dependencia pendiente dentro del plan
+        faltan = {}
+        listas = []
+        for id_orden in orden_topologico:
+            padre = self.ordenes[id_orden]["orden_dependiente_id"]
+            faltan[id_orden] = 1 if padre in self.ordenes else 0
+            if not faltan[id_orden]:
+                listas.append(claves[id_orden])
+        heapq.heapify(listas)
+        listo_en = dict.fromkeys(orden_topologico, 0.0)
+
+        tareas, sin_operario = [], []
+        por_operario = {id_operario: [] for id_operario in self.operarios}
+        while listas:
+            id_orden = heapq.heappop(listas)[-1]
+            orden = self.ordenes[id_orden]
+            id_operario = self._operario(orden, colas_operarios, libre)
+            fija = id_operario is not None and self.asignadas.get(id_orden) == id_operario
+
+            if id_operario is None:
+                inicio = listo_en[id_orden]
+            else:
+                inicio = max(libre[id_operario], listo_en[id_orden])
+                libre[id_operario] = inicio + horas[id_orden]
+                if not fija:
+                    # Vuelve a la cola de la que salió; en las demás queda una entrada vieja
+                    heapq.heappush(colas_operarios[orden["proceso"]], (libre[id_operario], id_operario))
+            fin = inicio + horas[id_orden]
+
+            fecha_fin = self.fecha(fin, fin=True)
+            tarea = {
+                "orden_id": id_orden,
+                "numero": orden["numero"],
+                "proceso": orden["proceso"],
+                "prioridad": orden["prioridad"],
+                "operario_id": id_operario,
+                "inicio": inicio,
+                "fin": fin,
+                "horas": horas[id_orden],
+                "fecha_inicio": self.fecha(inicio),
+                "fecha_fin": fecha_fin,
+                "fecha_envio": orden["fecha_envio"],
+                "dias_atraso": max(0, (fecha_fin - orden["fecha_envio"]).days) if orden["fecha_envio"] else 0,
+                "fija": fija,
+            }
+            tareas.append(tarea)
+            if id_operario is None:
+                sin_operario.append(tarea)
+            else:
+                tarea["posicion"] = len(por_operario[id_operario]) + 1
+                por_operario[id_operario].append(tarea)
+
+            for sucesor in self.grafo.sucesores[id_orden]:
+                listo_en[sucesor] = fin
+                faltan[sucesor] -= 1
+                if not faltan[sucesor]:
+                    heapq.heappush(listas, claves[sucesor])
+
+        return {
+            "tareas": tareas,
+            "por_operario": por_operario,
+            "sin_operario": sin_operario,
+            "carga": {id_operario: sum(t["horas"] for t in lista) for id_operario, lista in por_operario.items()},
+        }
+
+    def _operario(self, orden, colas_operarios, libre):
+        """Operario asignado de antes o el que se libera primero en el proceso de la OT"""
+        fijo = self.asignadas.get(orden["id"])
+        if fijo in libre:
+            return fijo
+        cola = colas_operarios.get(orden["proceso"])
+        while cola:
+            hora, id_operario = heapq.heappop(cola)
+            if hora == libre[id_operario]:
+                return id_operario
+            # Entrada vieja: el operario tomó trabajo en otro proceso o una OT fija
+            heapq.heappush(cola, (libre[id_operario], id_operario))
+        return None
+
+
+def asignaciones_propuestas(plan):
+    """[(orden_id, operario_id, posicion, fecha_inicio)] de las tareas nuevas del plan (para firmar y aplicar)"""
+    return [
+        (t["orden_id"], t["operario_id"], t["posicion"], t["fecha_inicio"].isoformat())
+        for t in plan["tareas"]
+        if t["operario_id"] is not None and not t["fija"]
+    ]
+
+
+def aplicar(asignaciones):
+    """
+    Crea en bloque las asignaciones confirmadas (bulk_create) y pone de responsable
+    al operario en las OT que no tenían. Se omiten las OT que ya no están abiertas
+    y los pares OT-operario que ya estaban asignados.
+
+    Returns:
+        número de asignaciones creadas
+    """
+    ids_ordenes = {orden_id for orden_id, _, _, _ in asignaciones}
+    with transaction.atomic():
+        ordenes = OrdenTrabajo.objects.select_for_update().filter(
+            pk__in=ids_ordenes, estado__in=ESTADOS_PLANIFICABLES
+        ).only("id", "responsable")
+        ordenes = {orden.pk: orden for orden in ordenes}
+        operarios = set(User.objects.filter(
+            pk__in={operario_id for _, operario_id, _, _ in asignaciones}, is_active=True
+        ).values_list("id", flat=True))
+        existentes = set(
+            AsignacionOperario.objects.filter(orden_id__in=ordenes, activo=True)
+            .values_list("orden_id", "operario_id")
+        )
+
+        nuevas, responsables = [], []
+        for orden_id, operario_id, posicion, fecha_inicio in asignaciones:
+            orden = ordenes.get(orden_id)
+            if orden is None or operario_id not in operarios or (orden_id, operario_id) in existentes:
+                continue
+            existentes.add((orden_id, operario_id))
+            inicio = date.fromisoformat(fecha_inicio)
+            nuevas.append(AsignacionOperario(
+                orden_id=orden_id,
+                operario_id=operario_id,
+                observaciones=f"Planificada: turno {posicion}, inicio estimado {inicio:%d/%m/%Y}",
+            ))
+            if not orden.responsable_id:
+                orden.responsable_id = operario_id
+                responsables.append(orden)
+
+        AsignacionOperario.objects.bulk_create(nuevas, batch_size=1000)
+        OrdenTrabajo.objects.bulk_update(responsables, ["responsable"], batch_size=1000)
+    return len(nuevas)
@@ -0,0 +1,270 @@
+# nexusone/produccion/sincronizacion.py
+"""
+Sincronización por lotes de los eventos de planta registrados sin conexión.
+La usa la vista `sincronizar_eventos` (POST JSON desde las tabletas).
+
+- Cada evento trae una clave generada por el cliente (UUID); EventoSincronizado
+  garantiza que un reintento del mismo lote no cuente dos veces
+- Los eventos se aplican en el orden recibido dentro de una transacción; cada uno
+  en su propio savepoint, así un evento rechazado no deshace los demás
+- Avances, pausas y asignaciones se insertan con bulk_create al final del lote;
+  las cantidades se suman a la OT con el UPDATE atómico de AvanceProduccion
+- Se conserva la fecha en que el operario registró el evento (no la de subida)
+
+Formato de cada evento:
+    {"clave": "<uuid>", "tipo": "avance", "orden": 12, "fecha": "2026-10-17T08:15:00-05:00",
+     "cantidad": "2.5", "observaciones": ""}
+    tipo "pausar": motivo, descripcion · "reanudar" · "asignar_operario": operario (id)
+    · "cambiar_estado": estado
+"""
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from nexusone.administrativa.models import EventoSincronizado
+from nexusone.administrativa.ordenes.models import OrdenTrabajo
+
+from .models import AsignacionOperario, AvanceProduccion, PausaProduccion, a_cantidad
+
+MAX_EVENTOS_LOTE = 500
+ESTADOS_VALIDOS = {clave for clave, _ in OrdenTrabajo.ESTADO_CHOICES}
+MOTIVOS_VALIDOS = {clave for clave, _ in PausaProduccion.MOTIVO_CHOICES}
+
+
+class EventoInvalido(ValueError):
+    """El evento (o el lote) no se puede aplicar"""
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fecha(valor, ahora):
+    """Fecha del evento en el cliente; nunca en el futuro"""
+    if not valor:
+        return ahora
+    try:
+        fecha = parse_datetime(str(valor))
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise EventoInvalido(f"Fecha inválida: {valor}")
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return min(fecha, ahora)
+
+
+class _Lote:
+    """Lo que el lote va a insertar al final, más lo que ya consultó"""
+
+    def __init__(self, usuario, ordenes, operarios, asignados):
+        self.usuario = usuario
+        self.ordenes = ordenes          # {id: OrdenTrabajo}
+        self.operarios = operarios      # {id: User}
+        self.asignados = asignados      # {(orden_id, operario_id)} con asignación activa
+        self.avances = []               # [(AvanceProduccion, fecha)]
+        self.pausas = []                # [(PausaProduccion, fecha)]
+        self.asignaciones = []          # [(AsignacionOperario, fecha)]
+
+    # ---------- manejadores (todo acceso a BD antes de tocar memoria) ----------
+
+    def avance(self, orden, evento, fecha):
+        cantidad = a_cantidad(evento.get("cantidad"))
+        producida, estado, inicio_real = AvanceProduccion.sumar_a_orden(orden.pk, cantidad, fecha)
+        orden.cantidad_producida, orden.estado, orden.fecha_inicio_real = producida, estado, inicio_real
+        self.avances.append((
+            AvanceProduccion(
+                orden=orden,
+                cantidad_avance=cantidad,
+                cantidad_acumulada=producida,
+                registrado_por=self.usuario,
+                observaciones=evento.get("observaciones") or "",
+            ),
+            fecha,
+        ))
+        return {"cantidad_producida": str(producida), "estado": estado}
+
+    def pausar(self, orden, evento, fecha):
+        motivo = evento.get("motivo")
+        if motivo not in MOTIVOS_VALIDOS:
+            raise EventoInvalido(f"Motivo de pausa inválido: {motivo}")
+        if orden.estado == "cerrada":
+            raise EventoInvalido(f"La OT {orden.numero} está cerrada")
+        orden.estado = "pausada"
+        orden.save(update_fields=["estado"])
+        self.pausas.append((
+            PausaProduccion(
+                orden=orden,
+                motivo=motivo,
+                descripcion=evento.get("descripcion") or "",
+                registrado_por=self.usuario,
+            ),
+            fecha,
+        ))
+        return {"estado": orden.estado}
+
+    def reanudar(self, orden, evento, fecha):
+        if orden.estado == "cerrada":
+            raise EventoInvalido(f"La OT {orden.numero} está cerrada")
+        orden.estado = "en_proceso"
+        orden.save(update_fields=["estado"])
+        PausaProduccion.objects.filter(orden=orden, activa=True).update(activa=False, fecha_fin=fecha)
+        for pausa, inicio in self.pausas:
+            if pausa.orden_id == orden.pk and pausa.activa:
+                pausa.activa = False
+                pausa.fecha_fin = max(fecha, inicio)
+        return {"estado": orden.estado}
+
+    def asignar_operario(self, orden, evento, fecha):
+        operario = self.operarios.get(_entero(evento.get("operario")))
+        if operario is None:
+            raise EventoInvalido("Operario no encontrado")
+        if (orden.pk, operario.pk) in self.asignados:
+            return {"ya_asignado": True}
+        if not orden.responsable_id:
+            orden.responsable = operario
+            orden.save(update_fields=["responsable"])
+        self.asignados.add((orden.pk, operario.pk))
+        self.asignaciones.append((AsignacionOperario(orden=orden, operario=operario), fecha))
+        return {"ya_asignado": False}
+
+    def cambiar_estado(self, orden, evento, fecha):
+        nuevo_estado = evento.get("estado")
+        if nuevo_estado not in ESTADOS_VALIDOS:
+            raise EventoInvalido(f"Estado inválido: {nuevo_estado}")
+        if nuevo_estado == "en_proceso" and not orden.puede_iniciar:
+            raise EventoInvalido("No se puede iniciar. Dependencia no cumplida.")
+        if nuevo_estado == "cerrada":
+            orden.cerrar()
+        else:
+            orden.estado = nuevo_estado
+            if nuevo_estado == "en_proceso" and not orden.fecha_inicio_real:
+                orden.fecha_inicio_real = fecha
+            orden.save()
+        return {"estado": orden.estado}
+
+    # ---------- inserciones del lote ----------
+
+    @staticmethod
+    def _insertar(modelo, objetos_fechas, campo_fecha):
+        """bulk_create y luego la fecha del cliente (auto_now_add la reemplaza al insertar)"""
+        if not objetos_fechas:
+            return
+        objetos = modelo.objects.bulk_create([objeto for objeto, _ in objetos_fechas])
+        for objeto, (_, fecha) in zip(objetos, objetos_fechas):
+            setattr(objeto, campo_fecha, fecha)
+        modelo.objects.bulk_update(objetos, [campo_fecha])
+
+    def guardar(self):
+        self._insertar(AvanceProduccion, self.avances, "fecha_registro")
+        self._insertar(PausaProduccion, self.pausas, "fecha_inicio")
+        self._insertar(AsignacionOperario, self.asignaciones, "fecha_asignacion")
+
+
+MANEJADORES = {
+    "avance": _Lote.avance,
+    "pausar": _Lote.pausar,
+    "reanudar": _Lote.reanudar,
+    "asignar_operario": _Lote.asignar_operario,
+    "cambiar_estado": _Lote.cambiar_estado,
+}
+
+
+def aplicar_lote(usuario, eventos):
+    """
+    Aplica una cola de eventos de producción del usuario.
+
+    Returns:
+        lista de resultados, uno por evento y en el mismo orden:
+        {"clave", "tipo", "estado": "aplicado" | "duplicado" | "error", "datos" | "mensaje"}
+    """
+    if not isinstance(eventos, list):
+        raise EventoInvalido("Se esperaba una lista de eventos")
+    if len(eventos) > MAX_EVENTOS_LOTE:
+        raise EventoInvalido(f"Máximo {MAX_EVENTOS_LOTE} eventos por lote")
+
+    ahora = timezone.now()
+    resultados = [None] * len(eventos)
+    validos = []
+    vistas = set()
+    for indice, evento in enumerate(eventos):
+        evento = evento if isinstance(evento, dict) else {}
+        clave = str(evento.get("clave") or "").strip()
+        tipo = evento.get("tipo")
+        resultado = {"clave": clave, "tipo": tipo}
+        if not clave or len(clave) > 64:
+            resultados[indice] = {**resultado, "estado": "error", "mensaje": "Clave de evento faltante o inválida"}
+        elif tipo not in MANEJADORES:
+            resultados[indice] = {**resultado, "estado": "error", "mensaje": f"Tipo de evento desconocido: {tipo}"}
+        elif clave in vistas:
+            resultados[indice] = {**resultado, "estado": "duplicado"}
+        else:
+            vistas.add(clave)
+            validos.append((indice, evento, clave, tipo))
+
+    if not validos:
+        return resultados
+
+    ids_ordenes = {_entero(evento.get("orden")) for _, evento, _, _ in validos} - {None}
+    ids_operarios = {
+        _entero(evento.get("operario")) for _, evento, _, tipo in validos if tipo == "asignar_operario"
+    } - {None}
+    id_lote = uuid.uuid4()
+
+    with transaction.atomic():
+        reclamadas, anteriores = EventoSincronizado.reclamar(
+            usuario, [(clave, tipo) for _, _, clave, tipo in validos], id_lote
+        )
+        lote = _Lote(
+            usuario,
+            OrdenTrabajo.objects.in_bulk(ids_ordenes),
+            User.objects.in_bulk(ids_operarios),
+            set(
+                AsignacionOperario.objects.filter(orden_id__in=ids_ordenes, activo=True)
+                .values_list("orden_id", "operario_id")
+            ),
+        )
+
+        aplicados, fallidos = {}, []
+        for indice, evento, clave, tipo in validos:
+            resultado = {"clave": clave, "tipo": tipo}
+            if clave not in reclamadas:
+                # Ya aplicado en un envío anterior: se devuelve lo que se respondió entonces
+                resultados[indice] = {**resultado, "estado": "duplicado", **anteriores.get(clave, {})}
+                continue
+
+            id_orden = _entero(evento.get("orden"))
+            orden = lote.ordenes.get(id_orden)
+            try:
+                if orden is None:
+                    raise EventoInvalido(f"OT no encontrada: {evento.get('orden')}")
+                fecha = _fecha(evento.get("fecha"), ahora)
+                with transaction.atomic():
+                    datos = MANEJADORES[tipo](lote, orden, evento, fecha)
+            except ValueError as error:
+                fallidos.append(clave)
+                if orden is not None:
+                    # El savepoint deshizo los cambios en BD: recargar la OT
+                    lote.ordenes[id_orden] = OrdenTrabajo.objects.get(pk=id_orden)
+                resultados[indice] = {**resultado, "estado": "error", "mensaje": str(error)}
+            else:
+                aplicados[clave] = {"datos": datos}
+                resultados[indice] = {**resultado, "estado": "aplicado", "datos": datos}
+
+        lote.guardar()
+
+        # Los rechazados se liberan para que el cliente pueda corregir y reenviar
+        if fallidos:
+            EventoSincronizado.objects.filter(lote=id_lote, clave__in=fallidos).delete()
+        registros = list(EventoSincronizado.objects.filter(lote=id_lote))
+        for registro in registros:
+            registro.resultado = aplicados.get(registro.clave, {})
+        EventoSincronizado.objects.bulk_update(registros, ["resultado"])
+
+    return resultados
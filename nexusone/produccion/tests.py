@@ -0,0 +1,114 @@
+# nexusone/produccion/tests.py
+import threading
+from decimal import Decimal
+
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import TransactionTestCase
+
+from nexusone.administrativa.inventario.models import Insumo, MovimientoKardex, StockInsumo, StockInsuficiente
+from nexusone.administrativa.ordenes.models import OrdenTrabajo
+
+from .models import AvanceProduccion, MaterialOrden, ProduccionExcedida
+
+
+def correr_en_hilos(funciones):
+    """Ejecuta cada función en su propio hilo (y conexión) y espera a que terminen"""
+    def envolver(funcion):
+        def trabajar():
+            try:
+                funcion()
+            finally:
+                connection.close()
+        return trabajar
+
+    hilos = [threading.Thread(target=envolver(funcion)) for funcion in funciones]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+
+class AsignacionMaterialesConcurrenteTest(TransactionTestCase):
+    """MaterialOrden.asignar_lote desde varios hilos, con las líneas en distinto orden"""
+
+    HILOS = 6
+    LOTES_POR_HILO = 10
+    CANTIDAD = Decimal("0.5")
+
+    def test_no_sobreasigna_ni_deja_stock_negativo(self):
+        orden = OrdenTrabajo.objects.create(descripcion="OT concurrencia", proceso="mecanizado")
+        materiales = []
+        for codigo in ("MAT-A", "MAT-B"):
+            insumo = Insumo.objects.create(codigo=codigo, nombre=codigo, unidad="UND")
+            MovimientoKardex.objects.create(insumo=insumo, tipo="entrada", cantidad=Decimal("100"))
+            materiales.append(MaterialOrden.objects.create(
+                orden=orden, insumo=insumo, cantidad_requerida=Decimal("12")
+            ))
+        exitos, rechazos, errores = [], [], []
+
+        def asignar(invertido):
+            lineas = [(material, self.CANTIDAD) for material in materiales]
+            if invertido:
+                lineas.reverse()
+            for _ in range(self.LOTES_POR_HILO):
+                try:
+                    MaterialOrden.asignar_lote(orden, lineas, usuario=None)
+                    exitos.append(1)
+                except (ValueError, StockInsuficiente):
+                    rechazos.append(1)
+                except OperationalError as error:  # SQLite: base bloqueada
+                    errores.append(str(error))
+
+        correr_en_hilos([lambda i=i: asignar(i % 2) for i in range(self.HILOS)])
+
+        asignado = len(exitos) * self.CANTIDAD
+        for material in materiales:
+            material.refresh_from_db()
+            self.assertEqual(material.cantidad_asignada, asignado)
+            self.assertLessEqual(material.cantidad_asignada, material.cantidad_requerida)
+            salidas = MovimientoKardex.objects.filter(insumo=material.insumo, tipo="salida")
+            self.assertEqual(salidas.aggregate(total=Sum("cantidad"))["total"] or 0, asignado)
+            self.assertEqual(StockInsumo.objects.get(insumo=material.insumo).cantidad, Decimal("100") - asignado)
+        self.assertEqual(len(exitos) + len(rechazos) + len(errores), self.HILOS * self.LOTES_POR_HILO)
+
+
+class AvancesConcurrentesTest(TransactionTestCase):
+    """AvanceProduccion.registrar desde varios hilos sobre la misma OT"""
+
+    HILOS = 8
+    AVANCES_POR_HILO = 25
+    CANTIDAD = Decimal("0.25")
+    META = Decimal("40")
+
+    def test_no_pierde_unidades_ni_supera_la_meta(self):
+        orden = OrdenTrabajo.objects.create(
+            descripcion="OT concurrencia", proceso="mecanizado", cantidad_producir=self.META
+        )
+        exitos, rechazos, errores = [], [], []
+
+        def registrar():
+            for _ in range(self.AVANCES_POR_HILO):
+                try:
+                    AvanceProduccion.registrar(orden, self.CANTIDAD)
+                    exitos.append(1)
+                except ProduccionExcedida:
+                    rechazos.append(1)
+                except OperationalError as error:  # SQLite: base bloqueada
+                    errores.append(str(error))
+
+        correr_en_hilos([registrar] * self.HILOS)
+
+        orden.refresh_from_db(fields=["cantidad_producida"])
+        avances = AvanceProduccion.objects.filter(orden=orden)
+        suma = avances.aggregate(total=Sum("cantidad_avance"))["total"] or Decimal("0")
+        acumulados = list(avances.values_list("cantidad_acumulada", flat=True))
+
+        self.assertEqual(len(exitos) + len(rechazos) + len(errores), self.HILOS * self.AVANCES_POR_HILO)
+        self.assertEqual(suma, len(exitos) * self.CANTIDAD)
+        self.assertEqual(orden.cantidad_producida, suma)
+        # Cada avance vio un acumulado distinto y el último coincide con el total
+        self.assertEqual(len(set(acumulados)), len(acumulados))
+        if acumulados:
+            self.assertEqual(max(acumulados), suma)
+        self.assertLessEqual(orden.cantidad_producida, self.META)
@@ -10,6 +10,8 @@ urlpatterns = [
     
     # Dashboard
     path("dashboard/", views.dashboard_produccion, name="dashboard"),
+    path("dashboard/datos/", views.dashboard_datos, name="dashboard_datos"),
+    path("dashboard/stream/", views.dashboard_stream, name="dashboard_stream"),
     
     # Órdenes de trabajo (vista operativa)
     path("ordenes/", views.lista_ordenes_produccion, name="lista_ordenes"),
@@ -21,4 +23,14 @@ urlpatterns = [
     path("ordenes/<int:pk>/asignar/", views.asignar_operario, name="asignar_operario"),
     path("ordenes/<int:pk>/pausar/", views.pausar_orden, name="pausar_orden"),
     path("ordenes/<int:pk>/reanudar/", views.reanudar_orden, name="reanudar_orden"),
+    
+    # Planificación de operarios
+    path("planificacion/", views.planificacion, name="planificacion"),
+    path("planificacion/aplicar/", views.aplicar_planificacion, name="aplicar_planificacion"),
+    
+    # Reportes
+    path("reportes/pausas/", views.reporte_pausas, name="reporte_pausas"),
+    
+    # Sincronización por lotes (tabletas)
+    path("api/eventos/", views.sincronizar_eventos, name="sincronizar_eventos"),
 ]
\ No newline at end of file
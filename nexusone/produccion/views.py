@@ -1,18 +1,30 @@
 # nexusone/produccion/views.py
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count, Sum
+from django.core import signing
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_POST
+from django.db.models import Q
 from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 
 # Importar modelos
+from nexusone.administrativa.ordenes.dependencias import DependenciaCircular
 from nexusone.administrativa.ordenes.models import OrdenTrabajo
 from .models import (
+    a_cantidad,
     AvanceProduccion,
     AsignacionOperario,
     MaterialOrden,
-    PausaProduccion
+    PausaProduccion,
+    ProduccionExcedida,
 )
+from . import indicadores
+from .planificacion import Planificador, aplicar, asignaciones_propuestas
+from .sincronizacion import EventoInvalido, aplicar_lote
 
 
 # ==================================================
@@ -27,59 +39,71 @@ def menu_produccion(request):
 # ==================================================
 # DASHBOARD PRODUCCIÓN
 # ==================================================
+TOKEN_DASHBOARD_SALT = "produccion.dashboard"
+TOKEN_DASHBOARD_MAX_AGE = 7 * 24 * 3600  # pantallas de planta que quedan abiertas días
+SSE_DASHBOARD_REINTENTO_MS = 5000
+
+
 @login_required(login_url='/login/')
 def dashboard_produccion(request):
-    """Dashboard con indicadores en tiempo real"""
-    
-    # Órdenes activas
-    ots_activas = OrdenTrabajo.objects.filter(
-        estado__in=['abierta', 'en_proceso']
-    ).count()
-    
-    # Órdenes completadas hoy
-    hoy = timezone.now().date()
-    ots_completadas_hoy = OrdenTrabajo.objects.filter(
-        estado='cerrada',
-        fecha_cierre__date=hoy
-    ).count()
-    
-    # Órdenes atrasadas
-    ots_atrasadas = OrdenTrabajo.objects.filter(
-        estado__in=['abierta', 'en_proceso'],
-        fecha_envio__lt=hoy
-    ).count()
-    
-    # Órdenes en riesgo (próximas 3 días)
-    from datetime import timedelta
-    fecha_riesgo = hoy + timedelta(days=3)
-    ots_en_riesgo = OrdenTrabajo.objects.filter(
-        estado__in=['abierta', 'en_proceso'],
-        fecha_envio__lte=fecha_riesgo,
-        fecha_envio__gte=hoy
-    ).count()
-    
-    # Por proceso
-    por_proceso = OrdenTrabajo.objects.filter(
-        estado__in=['abierta', 'en_proceso']
-    ).values('proceso').annotate(total=Count('id'))
-    
-    # Últimas OTs
-    ultimas_ots = OrdenTrabajo.objects.filter(
-        estado__in=['abierta', 'en_proceso', 'pendiente']
-    ).order_by('-prioridad', 'fecha_envio')[:10]
-    
+    """Dashboard con indicadores en tiempo real (se actualiza por SSE sin recargar)"""
     context = {
-        'ots_activas': ots_activas,
-        'ots_completadas_hoy': ots_completadas_hoy,
-        'ots_atrasadas': ots_atrasadas,
-        'ots_en_riesgo': ots_en_riesgo,
-        'por_proceso': por_proceso,
-        'ultimas_ots': ultimas_ots,
+        'indicadores': indicadores.obtener(),
+        'token_dashboard': signing.dumps(request.user.pk, salt=TOKEN_DASHBOARD_SALT),
     }
-    
     return render(request, 'produccion/dashboard.html', context)
 
 
+@login_required(login_url='/login/')
+def dashboard_datos(request):
+    """Indicadores en JSON; ETag = versión, responde 304 si no cambiaron"""
+    datos = indicadores.obtener()
+    etag = f'"{datos["version"]}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        return HttpResponseNotModified(headers={'ETag': etag})
+    response = JsonResponse(datos)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def dashboard_stream(request):
+    """
+    Server-Sent Events del dashboard (mismo esquema que stream_notificaciones):
+    token firmado en vez de sesión, la respuesta se cierra de inmediato y
+    `retry` fija la próxima reconexión. Last-Event-ID es la versión de los
+    indicadores; si no cambió solo se envía un comentario.
+    Con el token vencido se usa la sesión y se envía un evento `token` nuevo;
+    sin sesión responde 403 y la página se recarga (lleva al login).
+    """
+    token_nuevo = None
+    try:
+        signing.loads(
+            request.GET.get('token', ''),
+            salt=TOKEN_DASHBOARD_SALT,
+            max_age=TOKEN_DASHBOARD_MAX_AGE,
+        )
+    except signing.BadSignature:
+        if not request.user.is_authenticated:
+            return HttpResponseForbidden("Token del dashboard inválido o vencido")
+        token_nuevo = signing.dumps(request.user.pk, salt=TOKEN_DASHBOARD_SALT)
+
+    datos = indicadores.obtener()
+    partes = [f"retry: {SSE_DASHBOARD_REINTENTO_MS}\n\n"]
+    if token_nuevo:
+        partes.append(f"event: token\ndata: {json.dumps({'token': token_nuevo})}\n\n")
+    version_vista = request.headers.get('Last-Event-ID') or request.GET.get('desde', '')
+    if version_vista == datos['version']:
+        partes.append(": sin cambios\n\n")
+    else:
+        partes.append(f"id: {datos['version']}\nevent: indicadores\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n")
+
+    response = HttpResponse("".join(partes), content_type="text/event-stream; charset=utf-8")
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ==================================================
 # LISTA DE ÓRDENES (Vista Operativa)
 # ==================================================
@@ -93,8 +117,8 @@ def lista_ordenes_produccion(request):
     prioridad = request.GET.get('prioridad', '')
     busqueda = request.GET.get('q', '')
     
-    # Base queryset
-    ordenes = OrdenTrabajo.objects.all()
+    # Base queryset (con bloqueo por dependencia anotado, sin consulta por fila)
+    ordenes = OrdenTrabajo.con_bloqueo()
     
     # Aplicar filtros
     if estado == 'urgentes':
@@ -195,34 +219,22 @@ def registrar_avance(request, pk):
     
     if request.method == 'POST':
         try:
-            cantidad = float(request.POST.get('cantidad_avance', 0))
+            cantidad = a_cantidad(request.POST.get('cantidad_avance') or 0)
             observaciones = request.POST.get('observaciones', '')
             
             if cantidad <= 0:
                 messages.error(request, '⚠️ La cantidad debe ser mayor a cero')
                 return redirect('produccion:detalle_orden', pk=pk)
             
-            # Verificar que no exceda la cantidad a producir
-            if orden.cantidad_producir:
-                if (orden.cantidad_producida + cantidad) > orden.cantidad_producir:
-                    messages.error(request, '⚠️ La cantidad excede lo requerido')
-                    return redirect('produccion:detalle_orden', pk=pk)
-            
-            # Crear avance
-            AvanceProduccion.objects.create(
-                orden=orden,
-                cantidad_avance=cantidad,
-                registrado_por=request.user,
-                observaciones=observaciones
+            # Suma atómica a la OT; el tope de cantidad_producir se valida en el mismo UPDATE
+            # (también pasa la OT a "en proceso" si estaba pendiente o abierta)
+            AvanceProduccion.registrar(
+                orden,
+                cantidad,
+                usuario=request.user,
+                observaciones=observaciones,
             )
             
-            # Cambiar estado si estaba pendiente o abierta
-            if orden.estado in ['pendiente', 'abierta']:
-                orden.estado = 'en_proceso'
-                if not orden.fecha_inicio_real:
-                    orden.fecha_inicio_real = timezone.now()
-                orden.save()
-            
             # Si completó la cantidad, sugerir cerrar
             if orden.cantidad_producir and orden.cantidad_producida >= orden.cantidad_producir:
                 messages.success(request, '✅ ¡Cantidad completada! Puedes cerrar la orden.')
@@ -230,7 +242,10 @@ def registrar_avance(request, pk):
                 messages.success(request, f'✅ Avance registrado: +{cantidad}')
             
             return redirect('produccion:detalle_orden', pk=pk)
-            
+        
+        except ProduccionExcedida:
+            messages.error(request, '⚠️ La cantidad excede lo requerido')
+            return redirect('produccion:detalle_orden', pk=pk)
         except Exception as e:
             messages.error(request, f'❌ Error al registrar avance: {str(e)}')
             return redirect('produccion:detalle_orden', pk=pk)
@@ -364,4 +379,178 @@ def reanudar_orden(request, pk):
     orden.save()
     
     messages.success(request, '▶️ Orden reanudada')
-    return redirect('produccion:detalle_orden', pk=pk)
\ No newline at end of file
+    return redirect('produccion:detalle_orden', pk=pk)
+
+
+# ==================================================
+# SINCRONIZAR EVENTOS (tabletas sin conexión)
+# ==================================================
+@login_required(login_url='/login/')
+@require_POST
+def sincronizar_eventos(request):
+    """
+    Recibe en un solo POST la cola de eventos registrados sin conexión
+    ({"eventos": [...]}, ver produccion/sincronizacion.py) y responde el
+    resultado de cada uno. Reenviar el mismo lote no duplica nada.
+    """
+    try:
+        cuerpo = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+    eventos = cuerpo.get('eventos') if isinstance(cuerpo, dict) else cuerpo
+    try:
+        resultados = aplicar_lote(request.user, eventos)
+    except EventoInvalido as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    conteo = {'aplicado': 0, 'duplicado': 0, 'error': 0}
+    for resultado in resultados:
+        conteo[resultado['estado']] += 1
+    return JsonResponse({
+        'resultados': resultados,
+        'aplicados': conteo['aplicado'],
+        'duplicados': conteo['duplicado'],
+        'errores': conteo['error'],
+    })
+
+
+# ==================================================
+# REPORTE DE PARADAS
+# ==================================================
+DIAS_REPORTE_PAUSAS = 30
+
+
+def _horas(duracion):
+    return round(duracion.total_seconds() / 3600, 1) if duracion else 0
+
+
+def _etiqueta_pausa(por, fila):
+    """Texto de la agrupación de una fila de PausaProduccion.reporte()"""
+    if por == 'motivo':
+        return dict(PausaProduccion.MOTIVO_CHOICES).get(fila['motivo'], fila['motivo'])
+    if por == 'proceso':
+        return dict(OrdenTrabajo.PROCESO_CHOICES).get(fila['orden__proceso'], fila['orden__proceso'])
+    if por == 'orden':
+        return f"OT {fila['orden__numero']}"
+    if por == 'proyecto':
+        return fila['orden__proyecto_fk__nombre'] or fila['orden__proyecto'] or 'Sin proyecto'
+    if por == 'semana':
+        return f"Semana del {timezone.localtime(fila['semana']).strftime('%d/%m/%Y')}"
+    return fila['registrado_por__username'] or 'Sin registrar'
+
+
+@login_required(login_url='/login/')
+def reporte_pausas(request):
+    """Tiempo de paradas por motivo/proceso/OT/proyecto/semana/operario y disponibilidad por proceso"""
+    hoy = timezone.localdate()
+    try:
+        hasta = date.fromisoformat(request.GET.get('hasta') or hoy.isoformat())
+        desde = date.fromisoformat(
+            request.GET.get('desde') or (hasta - timedelta(days=DIAS_REPORTE_PAUSAS - 1)).isoformat()
+        )
+    except ValueError:
+        messages.error(request, '❌ Fecha inválida (use AAAA-MM-DD)')
+        return redirect('produccion:reporte_pausas')
+    por = request.GET.get('por', 'motivo')
+    if por not in PausaProduccion.AGRUPACIONES:
+        por = 'motivo'
+
+    # Periodo [desde 00:00, día siguiente a hasta 00:00) en hora local
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+
+    filas = PausaProduccion.reporte(por, desde=inicio, hasta=fin)
+    for fila in filas:
+        fila['etiqueta'] = _etiqueta_pausa(por, fila)
+        fila['horas_total'] = _horas(fila['total'])
+        fila['horas_promedio'] = _horas(fila['promedio'])
+    disponibilidad = PausaProduccion.disponibilidad(inicio, fin)
+    for fila in disponibilidad:
+        fila['horas_produccion'] = _horas(fila['produccion'])
+        fila['horas_pausa'] = _horas(fila['pausa'])
+        if fila['disponibilidad'] is not None:
+            fila['porcentaje'] = round(fila['disponibilidad'] * 100, 1)
+
+    context = {
+        'filas': filas,
+        'disponibilidad': disponibilidad,
+        'desde': desde,
+        'hasta': hasta,
+        'por': por,
+        'agrupaciones': [
+            ('motivo', 'Motivo'), ('proceso', 'Proceso'), ('orden', 'OT'),
+            ('proyecto', 'Proyecto'), ('semana', 'Semana'), ('operario', 'Operario'),
+        ],
+        'total_pausas': sum(fila['pausas'] for fila in filas),
+        'horas_totales': _horas(sum((fila['total'] for fila in filas if fila['total']), timedelta(0))),
+    }
+    return render(request, 'produccion/reporte_pausas.html', context)
+
+
+# ==================================================
+# PLANIFICACIÓN DE OPERARIOS
+# ==================================================
+TOKEN_PLAN_SALT = "produccion.planificacion"
+TOKEN_PLAN_MAX_AGE = 3600
+
+
+@login_required(login_url='/login/')
+def planificacion(request):
+    """Propuesta de asignación y secuencia por operario para las OT abiertas (no guarda nada)"""
+    planificador = Planificador.cargar()
+    try:
+        plan = planificador.planificar()
+    except DependenciaCircular as error:
+        messages.error(request, f'❌ {error}')
+        return redirect('produccion:menu_produccion')
+
+    procesos = dict(OrdenTrabajo.PROCESO_CHOICES)
+    for tarea in plan['tareas']:
+        tarea['proceso_nombre'] = procesos.get(tarea['proceso'], tarea['proceso'])
+        tarea['horas'] = round(tarea['horas'], 1)
+
+    operarios = sorted(
+        (
+            {
+                'nombre': planificador.operarios[id_operario]['nombre'],
+                'procesos': ', '.join(sorted(procesos.get(p, p) for p in planificador.operarios[id_operario]['procesos'])),
+                'tareas': tareas,
+                'horas': round(plan['carga'][id_operario], 1),
+                'fin': tareas[-1]['fecha_fin'] if tareas else None,
+                'atrasadas': sum(1 for t in tareas if t['dias_atraso']),
+            }
+            for id_operario, tareas in plan['por_operario'].items()
+        ),
+        key=lambda o: o['nombre'].lower(),
+    )
+    propuestas = asignaciones_propuestas(plan)
+
+    context = {
+        'operarios': operarios,
+        'sin_operario': plan['sin_operario'],
+        'total_ordenes': len(plan['tareas']),
+        'total_atrasadas': sum(1 for t in plan['tareas'] if t['dias_atraso']),
+        'nuevas': len(propuestas),
+        'plan_firmado': signing.dumps(propuestas, salt=TOKEN_PLAN_SALT, compress=True) if propuestas else '',
+    }
+    return render(request, 'produccion/planificacion.html', context)
+
+
+@login_required(login_url='/login/')
+@require_POST
+def aplicar_planificacion(request):
+    """Crea en bloque las asignaciones del plan confirmado"""
+    try:
+        propuestas = signing.loads(
+            request.POST.get('plan', ''),
+            salt=TOKEN_PLAN_SALT,
+            max_age=TOKEN_PLAN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        messages.error(request, '❌ El plan venció o no es válido. Revise la propuesta de nuevo.')
+        return redirect('produccion:planificacion')
+
+    creadas = aplicar(propuestas)
+    messages.success(request, f'✅ {creadas} asignación(es) creadas según el plan')
+    return redirect('produccion:lista_ordenes')
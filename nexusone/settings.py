@@ -149,6 +149,13 @@ else:
     MEDIA_ROOT = BASE_DIR / "media"
     MEDIA_URL = "/media/"
 
+# Entrega de MEDIA (ver nexusone/administrativa/archivos.py):
+#   ""           -> Django envía el archivo (Range, ETag)
+#   "x-accel"    -> nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+#   "x-sendfile" -> Apache mod_xsendfile / lighttpd
+MEDIA_SENDFILE = env("MEDIA_SENDFILE", default="")
+MEDIA_SENDFILE_PREFIX = env("MEDIA_SENDFILE_PREFIX", default="/protected-media/")
+
 # Tamaño máximo de archivo (25 MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 26214400  # 25 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 26214400  # 25 MB
@@ -0,0 +1,68 @@
+/*
+ * Autocompletado de insumos para los <select data-autocomplete-url>.
+ * Agrega un campo de texto encima del select y, al escribir, reemplaza
+ * sus opciones por los resultados de la búsqueda (JSON: {results: [{id, text}]}).
+ */
+(function () {
+    "use strict";
+
+    if (window.insumoAutocomplete) {
+        return;
+    }
+
+    const ESPERA_MS = 250;
+    const MIN_CARACTERES = 2;
+
+    function activar(select) {
+        if (select.dataset.autocompleteActivo) {
+            return;
+        }
+        select.dataset.autocompleteActivo = "1";
+
+        const buscador = document.createElement("input");
+        buscador.type = "search";
+        buscador.className = "form-control mb-1";
+        buscador.placeholder = "Buscar insumo por código o nombre...";
+        buscador.autocomplete = "off";
+        select.parentNode.insertBefore(buscador, select);
+
+        let temporizador = null;
+        let consulta = 0;
+
+        buscador.addEventListener("input", () => {
+            clearTimeout(temporizador);
+            const texto = buscador.value.trim();
+            if (texto.length < MIN_CARACTERES) {
+                return;
+            }
+            temporizador = setTimeout(() => {
+                const actual = ++consulta;
+                const url = select.dataset.autocompleteUrl + "?q=" + encodeURIComponent(texto);
+                fetch(url, {headers: {"X-Requested-With": "XMLHttpRequest"}})
+                    .then((respuesta) => respuesta.json())
+                    .then((datos) => {
+                        if (actual !== consulta) {
+                            return;  // llegó una respuesta vieja
+                        }
+                        const elegido = select.value;
+                        select.innerHTML = "";
+                        select.add(new Option("---------", ""));
+                        datos.results.forEach((item) => {
+                            select.add(new Option(item.text, item.id, false, String(item.id) === elegido));
+                        });
+                        if (datos.results.length === 1) {
+                            select.value = datos.results[0].id;
+                            select.dispatchEvent(new Event("change", {bubbles: true}));
+                        }
+                    });
+            }, ESPERA_MS);
+        });
+    }
+
+    function activarTodos(raiz) {
+        (raiz || document).querySelectorAll("select[data-autocomplete-url]").forEach(activar);
+    }
+
+    window.insumoAutocomplete = {activar: activar, activarTodos: activarTodos};
+    document.addEventListener("DOMContentLoaded", () => activarTodos());
+})();
@@ -4,6 +4,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from datetime import date, timedelta
 
+from nexusone.administrativa.models import Secuencia
+
 # ============================================================================
 # 1. ADMINISTRACIÓN DE PERSONAL
 # ============================================================================
@@ -209,8 +211,10 @@ class Contrato(models.Model):
     def save(self, *args, **kwargs):
         # Generar número de contrato automáticamente
         if not self.numero_contrato:
-            ultimo = Contrato.objects.order_by('-id').first()
-            numero = 1 if not ultimo else ultimo.id + 1
+            numero = Secuencia.siguiente(
+                'CONTRATO',
+                semilla=lambda: Secuencia.ultimo_id(Contrato.objects.all()),
+            )
             self.numero_contrato = f"{self.empleado.numero_documento}-{numero:02d}"
         
         # Desactivar otros contratos del mismo empleado
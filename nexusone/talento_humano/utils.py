@@ -4,6 +4,8 @@ from django.db.models import Sum
 import os
 from django.conf import settings
 
+from nexusone.administrativa.models import Secuencia
+
 # ============================================================================
 # CONSTANTES LEGALES COLOMBIA 2025
 # ============================================================================
@@ -333,15 +335,17 @@ def numero_a_letras(numero):
 
 def generar_numero_documento(prefijo, modelo):
     """
-    Genera número de documento consecutivo
+    Genera número de documento consecutivo (secuencia atómica por prefijo y año)
     
     Args:
         prefijo: Prefijo del documento (ej: 'CERT', 'CONT')
-        modelo: Modelo para obtener el último número
+        modelo: Modelo cuyo último id inicia la secuencia la primera vez
     """
-    ultimo = modelo.objects.order_by('-id').first()
-    numero = 1 if not ultimo else ultimo.id + 1
     año = date.today().year
+    numero = Secuencia.siguiente(
+        f"{prefijo}-{año}",
+        semilla=lambda: Secuencia.ultimo_id(modelo.objects.all()),
+    )
     
     return f"{prefijo}-{año}-{numero:05d}"
 
@@ -3,9 +3,8 @@ from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
 from . import views
-import os
+import re
 
 urlpatterns = [
     # 🛠️ Administración de Django
@@ -23,17 +22,21 @@ urlpatterns = [
     path("produccion/", include("nexusone.produccion.urls")),
     path("talento-humano/", include("nexusone.talento_humano.urls")),
 
-    # 📂 Servir archivos desde carpeta Ordenes (para descargas directas)
+    # 📂 Servir archivos desde carpeta Ordenes (para descargas directas, requiere login)
     re_path(
-        r'^Ordenes/(?P<path>.*)$',
-        serve,
-        {'document_root': os.path.join(settings.MEDIA_ROOT, 'Ordenes')},
+        r'^Ordenes/(?P<ruta>.*)$',
+        views.servir_media,
+        {'carpeta': 'Ordenes'},
         name='ordenes_files'
     ),
-]
 
-# 🖼️ Archivos MEDIA
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # 🖼️ Archivos MEDIA (requiere login; Range, ETag y X-Accel-Redirect opcional)
+    re_path(
+        r'^%s(?P<ruta>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        views.servir_media,
+        name='media'
+    ),
+]
 
 # 🧱 Archivos estáticos (solo en desarrollo)
 if settings.DEBUG:
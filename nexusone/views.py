@@ -1,7 +1,27 @@
 # views.py
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.utils._os import safe_join
+
+from nexusone.administrativa.archivos import respuesta_archivo
 
 @login_required
 def home(request):
     return render(request, "home.html")
+
+
+@login_required(login_url='/login/')
+def servir_media(request, ruta, carpeta=""):
+    """Archivos de MEDIA_ROOT solo para usuarios autenticados (Range, ETag, sendfile)"""
+    try:
+        absoluta = safe_join(settings.MEDIA_ROOT, carpeta, ruta)
+    except SuspiciousFileOperation:
+        raise Http404("Archivo no encontrado")
+    # Los blobs de Ordenes/_blobs/ se nombran por su hash: su contenido nunca cambia
+    relativa = os.path.relpath(absoluta, settings.MEDIA_ROOT).replace(os.sep, "/")
+    return respuesta_archivo(request, absoluta, inmutable=relativa.startswith("Ordenes/_blobs/"))